@@ -206,60 +206,62 @@ def handle_signup():
 
 
 # --- Main Application Window ---
-app = ttk.Window(themename="superhero")
-app.title("Narad Medical Courier")
-app.state('zoomed') # Set window to zoomed (maximised) state
+# Guarded so the map's tile decoder processes, which are spawned and re-import this script, don't open windows
+if __name__ == "__main__":
+    app = ttk.Window(themename="superhero")
+    app.title("Narad Medical Courier")
+    app.state('zoomed') # Set window to zoomed (maximised) state
 
-# --- Sign-In Frame ---
-FrameSign = ttk.Frame(app)
-FrameSign.pack(fill="both", expand=True) # Occupy the entire window
+    # --- Sign-In Frame ---
+    FrameSign = ttk.Frame(app)
+    FrameSign.pack(fill="both", expand=True) # Occupy the entire window
 
-# Configure grid for centering elements in FrameSign
-FrameSign.grid_rowconfigure(0, weight=1)
-FrameSign.grid_rowconfigure(7, weight=1) # Increased row count for better spacing
-FrameSign.grid_columnconfigure(0, weight=1)
-FrameSign.grid_columnconfigure(4, weight=1)
+    # Configure grid for centering elements in FrameSign
+    FrameSign.grid_rowconfigure(0, weight=1)
+    FrameSign.grid_rowconfigure(7, weight=1) # Increased row count for better spacing
+    FrameSign.grid_columnconfigure(0, weight=1)
+    FrameSign.grid_columnconfigure(4, weight=1)
 
-# Welcome Label
-label_welcome = ttk.Label(FrameSign, text="Welcome to Narad Medical Courier!", font=("Helvetica", 20, "bold"), bootstyle="primary")
-label_welcome.grid(row=1, column=1, columnspan=3, pady=(50, 10), padx=20)
+    # Welcome Label
+    label_welcome = ttk.Label(FrameSign, text="Welcome to Narad Medical Courier!", font=("Helvetica", 20, "bold"), bootstyle="primary")
+    label_welcome.grid(row=1, column=1, columnspan=3, pady=(50, 10), padx=20)
 
-# Sign-in instruction
-label_sign_in_instruction = ttk.Label(FrameSign, text="Please Sign-In with your Staff ID and Contact Number", font=("Helvetica", 10), bootstyle="info")
-label_sign_in_instruction.grid(row=2, column=1, columnspan=3, pady=10, padx=20)
+    # Sign-in instruction
+    label_sign_in_instruction = ttk.Label(FrameSign, text="Please Sign-In with your Staff ID and Contact Number", font=("Helvetica", 10), bootstyle="info")
+    label_sign_in_instruction.grid(row=2, column=1, columnspan=3, pady=10, padx=20)
 
-# Staff ID Entry
-ttk.Label(FrameSign, text="Staff ID:", font=("Helvetica", 11)).grid(row=3, column=1, pady=5, padx=(20, 5), sticky="e")
-entry_staff_id = ttk.Entry(FrameSign, bootstyle="info", width=30)
-entry_staff_id.grid(row=3, column=2, columnspan=2, pady=5, padx=(5, 20), sticky='ew')
+    # Staff ID Entry
+    ttk.Label(FrameSign, text="Staff ID:", font=("Helvetica", 11)).grid(row=3, column=1, pady=5, padx=(20, 5), sticky="e")
+    entry_staff_id = ttk.Entry(FrameSign, bootstyle="info", width=30)
+    entry_staff_id.grid(row=3, column=2, columnspan=2, pady=5, padx=(5, 20), sticky='ew')
 
-# Contact Number Entry
-ttk.Label(FrameSign, text="Contact No.:", font=("Helvetica", 11)).grid(row=4, column=1, pady=5, padx=(20, 5), sticky="e")
-entry_contact_number = ttk.Entry(FrameSign, bootstyle="info", width=30)
-entry_contact_number.grid(row=4, column=2, columnspan=2, pady=5, padx=(5, 20), sticky='ew')
+    # Contact Number Entry
+    ttk.Label(FrameSign, text="Contact No.:", font=("Helvetica", 11)).grid(row=4, column=1, pady=5, padx=(20, 5), sticky="e")
+    entry_contact_number = ttk.Entry(FrameSign, bootstyle="info", width=30)
+    entry_contact_number.grid(row=4, column=2, columnspan=2, pady=5, padx=(5, 20), sticky='ew')
 
-# Login/Sign-up Buttons
-button_sign_in = ttk.Button(FrameSign, text="Sign-In", command=handle_login, bootstyle="success")
-button_sign_in.grid(row=5, column=2, pady=20, padx=(10, 5), sticky='e')
+    # Login/Sign-up Buttons
+    button_sign_in = ttk.Button(FrameSign, text="Sign-In", command=handle_login, bootstyle="success")
+    button_sign_in.grid(row=5, column=2, pady=20, padx=(10, 5), sticky='e')
 
-button_sign_up = ttk.Button(FrameSign, text="Sign-Up", command=handle_signup, bootstyle="light-outline")
-button_sign_up.grid(row=5, column=3, pady=20, padx=(5, 10), sticky='w')
+    button_sign_up = ttk.Button(FrameSign, text="Sign-Up", command=handle_signup, bootstyle="light-outline")
+    button_sign_up.grid(row=5, column=3, pady=20, padx=(5, 10), sticky='w')
 
-# Initialize login_message_label here for consistent placement
-login_message_label = ttk.Label(FrameSign, text="", bootstyle="danger", font=("Helvetica", 9))
-login_message_label.grid(row=6, column=1, columnspan=3, pady=5, padx=10) # Place it below buttons and pad Y
+    # Initialize login_message_label here for consistent placement
+    login_message_label = ttk.Label(FrameSign, text="", bootstyle="danger", font=("Helvetica", 9))
+    login_message_label.grid(row=6, column=1, columnspan=3, pady=5, padx=10) # Place it below buttons and pad Y
 
-# --- Loading Frame ---
-FrLoad = ttk.Frame(app)
+    # --- Loading Frame ---
+    FrLoad = ttk.Frame(app)
 
-# Progress bar inside FrLoad
-progress = ttk.Progressbar(FrLoad, bootstyle="success-animated", maximum=100, mode='indeterminate')
-progress.pack(pady=40, padx=50, fill="x")
-ttk.Label(FrLoad, text="Authenticating and Loading System...", font=("Helvetica", 12)).pack(pady=10)
+    # Progress bar inside FrLoad
+    progress = ttk.Progressbar(FrLoad, bootstyle="success-animated", maximum=100, mode='indeterminate')
+    progress.pack(pady=40, padx=50, fill="x")
+    ttk.Label(FrLoad, text="Authenticating and Loading System...", font=("Helvetica", 12)).pack(pady=10)
 
 
-# --- Run the Application ---
-if not Logged: # Ensure the sign-in frame is visible initially
-    FrameSign.tkraise() # Bring FrameSign to the top
+    # --- Run the Application ---
+    if not Logged: # Ensure the sign-in frame is visible initially
+        FrameSign.tkraise() # Bring FrameSign to the top
 
-app.mainloop()
\ No newline at end of file
+    app.mainloop()
\ No newline at end of file
@@ -0,0 +1,571 @@
+"""
+Restricted airspace: airports, military areas and other no-fly zones.
+
+load_zones streams GeoJSON and KML restriction files into Zones without
+holding the whole document in memory (national airspace files run to
+hundreds of megabytes). Airspace indexes the zones' bounding boxes in an
+STR-packed R-tree and answers, for a whole fleet at once, which zone each
+drone is in. AirspaceLayer draws the zones that intersect the viewport,
+simplified for the current zoom level.
+
+Zones are kept in world coordinates (tile coordinates at zoom 0, see
+projection.py), so the index and the point-in-zone test work on the same
+straight-edged polygons that are drawn.
+"""
+import glob
+import json
+import math
+import os
+import re
+import xml.etree.ElementTree as ElementTree
+from typing import Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from map_paths import SIMPLIFY_TOLERANCE_PX, douglas_peucker_importance
+from projection import CanvasView, decimal_to_world
+
+AIRSPACE_EXTENSIONS = (".geojson", ".json", ".kml")
+READ_CHUNK = 1 << 16  # characters read at a time from GeoJSON files
+EDGE_BLOCK = 1 << 20  # point-edge tests per batch of Airspace.zones_at
+EDGES_PER_BAND = 4  # see Airspace._edge_table
+TINY_ZONE_PX = 4  # zones smaller than this on screen are drawn as their four extreme points
+NAME_KEYS = ("name", "NAME", "title", "id")
+KIND_KEYS = ("kind", "type", "category", "class", "TYPE", "CLASS")
+
+
+class AirspaceError(Exception):
+    pass
+
+
+class Zone:
+    """
+    One restricted polygon. `rings` are (n, 2) arrays of world coordinates,
+    the outer boundary first and holes after it; `bbox` is (min x, min y,
+    max x, max y) of the outer ring.
+    """
+    __slots__ = ("name", "kind", "properties", "rings", "bbox", "resolved_zoom", "_importance", "_kept", "_extremes")
+
+    def __init__(self, name: str, kind: str, rings: List[np.ndarray], properties: dict = None):
+        self.name = name
+        self.kind = kind
+        self.properties = properties or {}
+        self.rings = rings
+        outer = rings[0]
+        self.bbox = (*outer.min(axis=0), *outer.max(axis=0))
+        self.resolved_zoom = -1  # simplified down to this zoom level so far, see simplify_zones
+        self._importance = None  # per ring: Douglas-Peucker importance per point
+        self._kept = {}  # zoom -> per ring: indices of the points drawn
+        self._extremes = None  # the outer ring's leftmost, topmost, rightmost and bottommost points
+
+    def __repr__(self):
+        return f"Zone({self.name!r}, {self.kind!r}, {sum(len(ring) for ring in self.rings)} points)"
+
+    def _drawn_rings(self, zoom: int, tile_size: int) -> List[np.ndarray]:
+        """ the rings as drawn at `zoom`, see simplify_zones """
+        scale = tile_size * 2.0 ** zoom  # canvas pixels per world unit
+        min_x, min_y, max_x, max_y = self.bbox
+        if max(max_x - min_x, max_y - min_y) * scale < TINY_ZONE_PX:
+            if self._extremes is None:
+                outer = self.rings[0]
+                extremes = sorted({int(outer[:, 0].argmin()), int(outer[:, 1].argmin()), int(outer[:, 0].argmax()),
+                                   int(outer[:, 1].argmax())})
+                if len(extremes) < 3:
+                    extremes = np.linspace(0, len(outer) - 2, 3).astype(np.int64)
+                self._extremes = outer[extremes]
+            return [self._extremes]
+        kept = self._kept.get(zoom)
+        if kept is None:
+            kept = []
+            for importance in self._importance:
+                ring_kept = np.flatnonzero(importance >= SIMPLIFY_TOLERANCE_PX / scale)
+                if len(ring_kept) < 4:  # still a polygon, not a line: the most important points
+                    ring_kept = np.sort(np.argsort(importance)[-4:])
+                kept.append(ring_kept)
+            self._kept[zoom] = kept
+        return [ring[ring_kept] for ring, ring_kept in zip(self.rings, kept)]
+
+
+def simplify_zones(zones: Sequence[Zone], zoom: int, tile_size: int, max_zoom: int) -> List[List[np.ndarray]]:
+    """
+    Per zone, its rings as drawn at `zoom`: points within SIMPLIFY_TOLERANCE_PX
+    of the outline left out, zones smaller than TINY_ZONE_PX reduced to their
+    extreme points. Like SimplifiedPath, a zone is simplified only as finely
+    as needed so far (and two levels deeper); the zones that need it are
+    simplified together, in one douglas_peucker_importance pass.
+    """
+    scale = tile_size * 2.0 ** zoom
+    stale = [zone for zone in zones if zone.resolved_zoom < zoom and
+             max(zone.bbox[2] - zone.bbox[0], zone.bbox[3] - zone.bbox[1]) * scale >= TINY_ZONE_PX]
+    if stale:
+        resolved = min(zoom + 2, max_zoom)
+        rings = [ring for zone in stale for ring in zone.rings]
+        points = np.vstack(rings)
+        starts = np.cumsum([0] + [len(ring) for ring in rings[:-1]])
+        importance = np.split(douglas_peucker_importance(points[:, 0], points[:, 1],
+                                                         SIMPLIFY_TOLERANCE_PX / (tile_size * 2.0 ** resolved), starts),
+                              starts[1:])
+        first = 0
+        for zone in stale:
+            zone._importance = importance[first:first + len(zone.rings)]
+            zone.resolved_zoom, zone._kept = resolved, {}
+            first += len(zone.rings)
+    return [zone._drawn_rings(zoom, tile_size) for zone in zones]
+
+
+# --- Loading ---
+
+def _ring(coordinates) -> Optional[np.ndarray]:
+    """ world coordinates of a [lon, lat(, alt)] ring, closed; None if it is degenerate """
+    if len(coordinates) < 3:
+        return None
+    try:
+        points = np.array(coordinates, dtype=np.float64)[:, :2]
+    except (ValueError, IndexError):  # some points with an altitude, some without
+        points = np.array([point[:2] for point in coordinates], dtype=np.float64)
+    if not np.isfinite(points).all():
+        return None
+    x, y = decimal_to_world(points[:, 1], points[:, 0])
+    ring = np.column_stack((x, y))
+    if not np.array_equal(ring[0], ring[-1]):
+        ring = np.vstack((ring, ring[:1]))
+    return ring if len(ring) >= 4 else None
+
+
+def _first(properties: dict, keys: Sequence[str], default: str) -> str:
+    for key in keys:
+        value = properties.get(key)
+        if value not in (None, ""):
+            return str(value)
+    return default
+
+
+def _geojson_zones(feature: dict, default_name: str) -> Iterator[Zone]:
+    geometry = feature.get("geometry") if feature.get("type") == "Feature" else feature
+    properties = feature.get("properties") or {}
+    name = _first(properties, NAME_KEYS, default_name)
+    kind = _first(properties, KIND_KEYS, "restricted")
+    geometries = [geometry]
+    while geometries:
+        geometry = geometries.pop()
+        if not geometry:
+            continue
+        kind_of_geometry = geometry.get("type")
+        if kind_of_geometry == "GeometryCollection":
+            geometries.extend(geometry.get("geometries") or [])
+            continue
+        if kind_of_geometry == "Polygon":
+            polygons = [geometry.get("coordinates") or []]
+        elif kind_of_geometry == "MultiPolygon":
+            polygons = geometry.get("coordinates") or []
+        else:
+            continue  # points and lines restrict nothing
+        for polygon in polygons:
+            rings = [_ring(ring) for ring in polygon]
+            if rings and rings[0] is not None:
+                yield Zone(name, kind, [ring for ring in rings if ring is not None], properties)
+
+
+_FEATURES = re.compile(r'"features"\s*:\s*\[')
+_SEPARATORS = re.compile(r'[\s,]*')
+
+
+def _geojson_features(path: str, chunk_size: int = READ_CHUNK) -> Iterator[dict]:
+    """
+    The features of a GeoJSON FeatureCollection one by one, decoded with
+    JSONDecoder.raw_decode from a buffer of about one feature. A file that
+    is a single Feature or geometry is decoded whole.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8-sig") as f:
+        buffer = f.read(chunk_size)
+        while True:
+            match = _FEATURES.search(buffer)
+            if match is not None:
+                break
+            more = f.read(chunk_size)
+            if not more:
+                try:
+                    document = json.loads(buffer)
+                except json.JSONDecodeError as e:
+                    raise AirspaceError(f"{path}: {e}") from None
+                if isinstance(document, dict):
+                    yield from document.get("features") or [document]
+                return
+            buffer += more
+
+        buffer, position = buffer[match.end():], 0
+        while True:
+            position = _SEPARATORS.match(buffer, position).end()
+            if buffer.startswith("]", position):
+                return
+            try:
+                feature, position_after = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # read as much again as is buffered, so a huge feature costs linear time, not quadratic
+                more = f.read(max(chunk_size, len(buffer) - position))
+                if not more:
+                    raise AirspaceError(f"{path}: truncated or malformed GeoJSON") from None
+                buffer, position = buffer[position:] + more, 0
+                continue
+            if isinstance(feature, dict):
+                yield feature
+            position = position_after
+
+
+def _kml_zones(path: str, default_name: str) -> Iterator[Zone]:
+    """ the Polygons of every Placemark, parsed with iterparse and dropped as soon as they are read """
+    def local(tag: str) -> str:
+        return tag.rsplit("}", 1)[-1]
+
+    def coordinates(element) -> Optional[np.ndarray]:
+        for child in element.iter():
+            if local(child.tag) == "coordinates" and child.text:
+                return _ring([point.split(",")[:2] for point in child.text.split()])
+        return None
+
+    try:
+        for event, element in ElementTree.iterparse(path, events=("end",)):
+            if local(element.tag) != "Placemark":
+                continue
+            name, properties = default_name, {}
+            for child in element:
+                tag = local(child.tag)
+                if tag == "name" and child.text:
+                    name = child.text.strip()
+                elif tag == "ExtendedData":
+                    for data in child.iter():
+                        if local(data.tag) in ("Data", "SimpleData") and data.get("name"):
+                            value = data.findtext("{*}value") if local(data.tag) == "Data" else data.text
+                            properties[data.get("name")] = (value or "").strip()
+            kind = _first(properties, KIND_KEYS, "restricted")
+            for polygon in element.iter():
+                if local(polygon.tag) != "Polygon":
+                    continue
+                outer, holes = None, []
+                for boundary in polygon:
+                    tag = local(boundary.tag)
+                    if tag == "outerBoundaryIs":
+                        outer = coordinates(boundary)
+                    elif tag == "innerBoundaryIs":
+                        hole = coordinates(boundary)
+                        if hole is not None:
+                            holes.append(hole)
+                if outer is not None:
+                    yield Zone(name, kind, [outer] + holes, properties)
+            element.clear()
+    except ElementTree.ParseError as e:
+        raise AirspaceError(f"{path}: {e}") from None
+
+
+def load_zones(path: str) -> Iterator[Zone]:
+    """
+    the zones of a GeoJSON (.geojson, .json) or KML (.kml) file, streamed;
+    a file that can't be read as either raises AirspaceError
+    """
+    default_name = os.path.splitext(os.path.basename(path))[0]
+    try:
+        if path.lower().endswith(".kml"):
+            yield from _kml_zones(path, default_name)
+        else:
+            for feature in _geojson_features(path):
+                yield from _geojson_zones(feature, default_name)
+    except (ValueError, TypeError, AttributeError, IndexError) as e:  # bad text encoding, coordinates or structure
+        raise AirspaceError(f"{path}: {e}") from None
+
+
+# --- Index ---
+
+class STRTree:
+    """
+    Static R-tree over bounding boxes (min x, min y, max x, max y), packed
+    with Sort-Tile-Recursive: every level is the one below sorted into
+    vertical slices by x and each slice by y, then cut into nodes of
+    `node_capacity` neighbours. Queries walk the levels as arrays, for a box
+    or for many points at once.
+    """
+
+    def __init__(self, boxes: np.ndarray, node_capacity: int = 16):
+        self.node_capacity = node_capacity
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        self.count = len(boxes)
+        # per level, leaves first: the entries' boxes and their order (indices into the level below)
+        self.levels = []
+        while True:
+            order = self._pack(boxes)
+            self.levels.append((boxes, order))
+            if len(boxes) <= node_capacity:
+                break
+            packed = boxes[order]
+            starts = np.arange(0, len(packed), node_capacity)
+            boxes = np.column_stack((np.minimum.reduceat(packed[:, 0], starts), np.minimum.reduceat(packed[:, 1], starts),
+                                     np.maximum.reduceat(packed[:, 2], starts), np.maximum.reduceat(packed[:, 3], starts)))
+
+    def _pack(self, boxes: np.ndarray) -> np.ndarray:
+        n = len(boxes)
+        if n == 0:
+            return np.zeros(0, dtype=np.int64)
+        nodes = math.ceil(n / self.node_capacity)
+        per_slice = math.ceil(n / math.ceil(math.sqrt(nodes))) if nodes > 1 else n
+        per_slice = math.ceil(per_slice / self.node_capacity) * self.node_capacity  # slices of whole nodes
+        center_x, center_y = boxes[:, 0] + boxes[:, 2], boxes[:, 1] + boxes[:, 3]
+        by_x = np.argsort(center_x, kind="stable")
+        slice_of = np.empty(n, dtype=np.int64)
+        slice_of[by_x] = np.arange(n) // per_slice
+        return np.lexsort((center_y, slice_of))
+
+    def _children(self, level: int, nodes: np.ndarray):
+        """ (parent position in `nodes`, child index) of every child of `nodes` at `level` """
+        order = self.levels[level - 1][1]
+        slots = nodes[:, None] * self.node_capacity + np.arange(self.node_capacity)
+        parent = np.repeat(np.arange(len(nodes)), self.node_capacity)
+        slots = slots.ravel()
+        valid = slots < len(order)
+        return parent[valid], order[slots[valid]]
+
+    def query(self, min_x: float, min_y: float, max_x: float, max_y: float) -> np.ndarray:
+        """ indices of the boxes intersecting the box """
+        if self.count == 0:
+            return np.zeros(0, dtype=np.int64)
+        top = len(self.levels) - 1
+        candidates = np.arange(len(self.levels[top][0]))
+        for level in range(top, -1, -1):
+            boxes = self.levels[level][0][candidates]
+            hit = (boxes[:, 0] <= max_x) & (boxes[:, 2] >= min_x) & (boxes[:, 1] <= max_y) & (boxes[:, 3] >= min_y)
+            candidates = candidates[hit]
+            if level == 0 or not len(candidates):
+                break
+            candidates = self._children(level, candidates)[1]
+        return np.sort(candidates)
+
+    def query_points(self, x: np.ndarray, y: np.ndarray) -> tuple:
+        """ (point index, box index) arrays of every point inside a box """
+        x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+        if self.count == 0 or not len(x):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        top = len(self.levels) - 1
+        nodes = np.arange(len(self.levels[top][0]))
+        points, candidates = np.repeat(np.arange(len(x)), len(nodes)), np.tile(nodes, len(x))
+        for level in range(top, -1, -1):
+            boxes = self.levels[level][0][candidates]
+            px, py = x[points], y[points]
+            hit = (boxes[:, 0] <= px) & (px <= boxes[:, 2]) & (boxes[:, 1] <= py) & (py <= boxes[:, 3])
+            points, candidates = points[hit], candidates[hit]
+            if level == 0 or not len(candidates):
+                break
+            parent, candidates = self._children(level, candidates)
+            points = points[parent]
+        return points, candidates
+
+
+def points_in_rings(x: np.ndarray, y: np.ndarray, rings: Sequence[np.ndarray], block: int = 1 << 22) -> np.ndarray:
+    """ even-odd test of points against closed rings (outer boundary and holes alike), vectorized over both """
+    inside = np.zeros(len(x), dtype=bool)
+    edges = np.vstack([np.column_stack((ring[:-1], ring[1:])) for ring in rings])  # x0, y0, x1, y1
+    x0, y0, x1, y1 = edges.T
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = (x1 - x0) / (y1 - y0)
+    step = max(1, block // max(len(edges), 1))
+    for start in range(0, len(x), step):
+        px, py = x[start:start + step, None], y[start:start + step, None]
+        crosses = ((y0 > py) != (y1 > py)) & (px < x0 + (py - y0) * slope)
+        inside[start:start + step] = np.count_nonzero(crosses, axis=1) % 2 == 1
+    return inside
+
+
+class Airspace:
+    """
+    A set of Zones with their bounding boxes in an STRTree. The edges of all
+    zones are kept in one banded table as well (built on the first
+    zones_at), so testing a fleet against its candidate zones is a few array
+    operations however many zones, and however detailed, there are.
+    """
+
+    def __init__(self, zones: Sequence[Zone] = (), node_capacity: int = 16):
+        self.zones = list(zones)
+        self.index = STRTree(np.array([zone.bbox for zone in self.zones]).reshape(-1, 4), node_capacity)
+        self._edges = None  # (x0, y0, x1, y1, dx/dy) per edge, zone after zone
+        self._band_start = self._band_edges = None  # band -> edges, as in a CSR matrix
+        self._zone_bands = None  # per zone: first band, band count, band 0's min y, band height
+
+    def __len__(self):
+        return len(self.zones)
+
+    @classmethod
+    def from_files(cls, paths: Sequence[str], **kwargs) -> "Airspace":
+        zones = []
+        for path in paths:
+            zones.extend(load_zones(path))
+        return cls(zones, **kwargs)
+
+    @classmethod
+    def from_directory(cls, directory: str, **kwargs) -> Optional["Airspace"]:
+        """ airspace of every GeoJSON and KML file in `directory`, or None if there are none """
+        paths = sorted(path for path in glob.glob(os.path.join(directory, "*"))
+                       if path.lower().endswith(AIRSPACE_EXTENSIONS))
+        return cls.from_files(paths, **kwargs) if paths else None
+
+    def zones_in(self, min_x: float, min_y: float, max_x: float, max_y: float) -> np.ndarray:
+        """ indices of the zones whose bounding box intersects the world-coordinate box """
+        return self.index.query(min_x, min_y, max_x, max_y)
+
+    def zones_at(self, lats, lons) -> np.ndarray:
+        """ per point, the index of a zone containing it (the lowest, if several do), or -1 """
+        x, y = decimal_to_world(np.atleast_1d(lats), np.atleast_1d(lons))
+        found = np.full(len(x), len(self.zones), dtype=np.int64)
+        points, zones = self.index.query_points(x, y)  # pairs with the point inside the zone's bounding box
+        if len(points):
+            edges, band_start, band_edges, zone_bands = self._edge_table()
+            first_band, band_count, min_y, band_height = zone_bands[zones].T
+            band = first_band.astype(np.int64) + np.clip(((y[points] - min_y) / band_height).astype(np.int64),
+                                                         0, band_count.astype(np.int64) - 1)
+            counts = band_start[band + 1] - band_start[band]
+            keep = counts > 0  # nothing crosses this band of the zone
+            points, zones, band, counts = points[keep], zones[keep], band[keep], counts[keep]
+            ends = np.cumsum(counts)
+            start = 0
+            while start < len(points):  # pairs in batches of about EDGE_BLOCK point-edge tests
+                stop = max(int(np.searchsorted(ends, ends[start] - counts[start] + EDGE_BLOCK, side="right")), start + 1)
+                batch_counts = counts[start:stop]
+                offsets = np.cumsum(batch_counts) - batch_counts
+                pair = np.repeat(np.arange(start, stop), batch_counts)
+                entry = np.repeat(band_start[band[start:stop]] - offsets, batch_counts) + np.arange(len(pair))
+                x0, y0, x1, y1, slope = edges[band_edges[entry]].T
+                px, py = x[points[pair]], y[points[pair]]
+                crosses = ((y0 > py) != (y1 > py)) & (px < x0 + (py - y0) * slope)
+                inside = np.add.reduceat(crosses, offsets, dtype=np.int64) % 2 == 1
+                np.minimum.at(found, points[start:stop][inside], zones[start:stop][inside])
+                start = stop
+        found[found == len(self.zones)] = -1
+        return found
+
+    def _edge_table(self):
+        """
+        The edges of every zone, bucketed into horizontal bands per zone
+        (about EDGES_PER_BAND edges each): a horizontal ray from a point can
+        only cross the edges of the point's band, so a detailed outline costs
+        a handful of tests per point instead of one per edge.
+        """
+        if self._edges is None:
+            edges, zone_of_edge = [], []
+            for i, zone in enumerate(self.zones):
+                for ring in zone.rings:
+                    edges.append(np.column_stack((ring[:-1], ring[1:])))
+                    zone_of_edge.append(np.full(len(ring) - 1, i))
+            edges = np.vstack(edges) if edges else np.zeros((0, 4))
+            zone_of_edge = np.concatenate(zone_of_edge) if zone_of_edge else np.zeros(0, dtype=np.int64)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                slope = (edges[:, 2] - edges[:, 0]) / (edges[:, 3] - edges[:, 1])
+            self._edges = np.column_stack((edges, slope))
+
+            bboxes = np.array([zone.bbox for zone in self.zones]).reshape(-1, 4)
+            # about EDGES_PER_BAND edges per band, but no thinner than the zone's typical edge is tall, or
+            # jagged outlines would put each edge into many bands
+            edge_count = np.bincount(zone_of_edge, minlength=len(self.zones))
+            mean_dy = np.bincount(zone_of_edge, np.abs(edges[:, 3] - edges[:, 1]), len(self.zones)) / np.maximum(edge_count, 1)
+            zone_height = bboxes[:, 3] - bboxes[:, 1]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                band_count = np.minimum(edge_count // EDGES_PER_BAND, np.nan_to_num(zone_height / mean_dy, posinf=0))
+            band_count = np.maximum(band_count, 1).astype(np.int64)
+            first_band = np.cumsum(band_count) - band_count
+            height = zone_height / band_count
+            height[height <= 0] = 1.0
+            self._zone_bands = np.column_stack((first_band, band_count, bboxes[:, 1], height))
+
+            # every edge goes into each band its y range overlaps
+            zone_count, zone_min, zone_height = band_count[zone_of_edge], bboxes[zone_of_edge, 1], height[zone_of_edge]
+            low = np.clip(((np.minimum(edges[:, 1], edges[:, 3]) - zone_min) / zone_height).astype(np.int64), 0, zone_count - 1)
+            high = np.clip(((np.maximum(edges[:, 1], edges[:, 3]) - zone_min) / zone_height).astype(np.int64), 0, zone_count - 1)
+            spans = high - low + 1
+            edge = np.repeat(np.arange(len(edges)), spans)
+            band = np.repeat(first_band[zone_of_edge] + low - (np.cumsum(spans) - spans), spans) + np.arange(len(edge))
+            order = np.argsort(band, kind="stable")
+            self._band_edges = edge[order]
+            self._band_start = np.concatenate(([0], np.cumsum(np.bincount(band, minlength=int(band_count.sum())))))
+        return self._edges, self._band_start, self._band_edges, self._zone_bands
+
+
+# --- Drawing ---
+
+class AirspaceLayer:
+    """
+    Map layer (see map_layers) drawing the zones of an Airspace. Only zones
+    whose bounding box meets the viewport, padded by half a view, are drawn,
+    each simplified for the zoom level, from a pool of canvas polygons that
+    are re-pointed instead of recreated; panning within the padded area is
+    one canvas.move. Tk polygons have no holes, so holes get an outline only.
+    Items are tagged "polygon", under paths and markers.
+    """
+
+    def __init__(self, map_widget, airspace: Airspace, outline: str = "#d9534f", fill: str = "#d9534f",
+                 width: int = 2, stipple: str = "gray25"):
+        self.map_widget = map_widget
+        self.canvas = map_widget.canvas
+        self.airspace = airspace
+        self.outline, self.fill, self.width, self.stipple = outline, fill, width, stipple
+        self.tag = f"airspace-{id(self)}"
+        self.drawn_zones = np.zeros(0, dtype=np.int64)
+        self.drawn_points = 0
+        self._items: List[int] = []
+        self._holes: List[bool] = []  # per item: created as a hole (outline only)
+        self._shown = 0
+        self._view = None  # (zoom, width, height, view span, drawn area) of the last full draw
+        self._origin = None
+        map_widget.add_layer(self)
+
+    def draw(self):
+        widget = self.map_widget
+        view = CanvasView(widget)
+        span = round(view.right - view.left, 6)
+        if self._view is not None and self._view[:4] == (view.zoom, widget.width, widget.height, span):
+            area_left, area_top, area_right, area_bottom = self._view[4]
+            if area_left <= view.left and view.right <= area_right and area_top <= view.top and view.bottom <= area_bottom:
+                self.canvas.move(self.tag, float((self._origin[0] - view.left) * view.scale),
+                                 float((self._origin[1] - view.top) * view.scale))
+                self._origin = (view.left, view.top)
+                return
+
+        pad_x, pad_y = (view.right - view.left) / 2, (view.bottom - view.top) / 2
+        area = (view.left - pad_x, view.top - pad_y, view.right + pad_x, view.bottom + pad_y)
+        n = 1 << view.zoom
+        zones = self.airspace.zones_in(area[0] / n, area[1] / n, area[2] / n, area[3] / n)
+        rings, holes = [], []
+        for zone_rings in simplify_zones([self.airspace.zones[index] for index in zones.tolist()], view.zoom,
+                                         widget.tile_size, widget.max_zoom):
+            rings.extend(zone_rings)
+            holes.extend([False] + [True] * (len(zone_rings) - 1))
+        shown = len(rings)
+        points = sum(len(ring) for ring in rings)
+        if rings:  # projected as one array, handed to Tk ring by ring
+            world = np.vstack(rings)
+            coords = np.column_stack(view.world_to_canvas(world[:, 0], world[:, 1])).ravel().tolist()
+            end = 0
+            for i, (ring, hole) in enumerate(zip(rings, holes)):
+                start, end = end, end + 2 * len(ring)
+                self._polygon(i, coords[start:end], hole)
+        for item in self._items[shown:self._shown]:
+            self.canvas.itemconfigure(item, state="hidden")
+        self._shown = shown
+        self.drawn_zones, self.drawn_points = zones, points
+        self._view = (view.zoom, widget.width, widget.height, span, area)
+        self._origin = (view.left, view.top)
+        widget.manage_z_order()
+
+    def _polygon(self, i: int, coords: list, hole: bool):
+        canvas = self.canvas
+        if i == len(self._items):
+            self._items.append(canvas.create_polygon(coords, outline=self.outline, width=self.width, tags=("polygon", self.tag)))
+            self._holes.append(None)
+        else:
+            canvas.coords(self._items[i], coords)
+        if self._holes[i] != hole:
+            canvas.itemconfigure(self._items[i], fill="" if hole else self.fill, stipple="" if hole else self.stipple)
+            self._holes[i] = hole
+        if i >= self._shown:
+            canvas.itemconfigure(self._items[i], state="normal")
+
+    def delete(self):
+        self.canvas.delete(self.tag)
+        self._items, self._holes, self._shown = [], [], 0
+        if self in self.map_widget.layers:
+            self.map_widget.remove_layer(self)
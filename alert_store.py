@@ -0,0 +1,164 @@
+"""
+Persistent alert history in an embedded SQLite database.
+
+Every alert raised in any session is appended to one database (WAL mode),
+with an FTS5 index over its source and message so months of history can be
+searched, e.g. `payload released drone:7`.
+"""
+import re
+import sqlite3
+import threading
+from typing import List, Optional, Tuple
+
+from alerts import AlertRecord
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    level INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    message TEXT NOT NULL,
+    session TEXT NOT NULL
+);
+-- contentless: only the index is stored, rows are read from `alerts`. The source is indexed as one
+-- token ("drone 7" -> "drone_7"), so a source filter is a lookup of one short doclist.
+CREATE VIRTUAL TABLE IF NOT EXISTS alerts_fts USING fts5(source, message, content='',
+                                                           tokenize="unicode61 tokenchars '_'");
+CREATE TRIGGER IF NOT EXISTS alerts_fts_insert AFTER INSERT ON alerts BEGIN
+    INSERT INTO alerts_fts(rowid, source, message) VALUES (new.id, replace(new.source, ' ', '_'), new.message);
+END;
+"""
+
+_FILTER = re.compile(r"\b(drone|source):(\S+)")
+
+
+class AlertStore:
+    """
+    Appends alerts to the database from a background writer thread.
+
+    `add` only appends to a list under a lock, so the Tk thread never waits
+    for the disk. Every `commit_interval` seconds the writer inserts
+    everything queued in one transaction. `search` runs on the calling
+    thread with its own read connection; in WAL mode readers and the writer
+    don't block each other.
+    """
+
+    def __init__(self, path: str, session: str = "", commit_interval: float = 1.0):
+        self.path = path
+        self.session = session
+        self.commit_interval = commit_interval
+        self.written = 0
+        self.commits = 0
+
+        connection = self._connect()
+        connection.executescript(SCHEMA)
+        connection.close()
+
+        self._pending: List[tuple] = []
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._reader: Optional[sqlite3.Connection] = None
+        self._thread = threading.Thread(daemon=True, name="alert-store", target=self._run)
+        self._thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")  # durable at checkpoints, never corrupt
+        return connection
+
+    def add(self, timestamp: float, level: int, source: str, kind: str, message: str):
+        with self._lock:
+            self._pending.append((timestamp, level, source, kind, message, self.session))
+
+    def close(self):
+        """ writes out everything still queued """
+        self._stop_event.set()
+        self._thread.join()
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+    # --- writer ---
+
+    def _run(self):
+        connection = self._connect()
+        try:
+            while not self._stop_event.wait(self.commit_interval):
+                self._commit(connection)
+            self._commit(connection)
+        finally:
+            connection.close()
+
+    def _commit(self, connection: sqlite3.Connection):
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+        with connection:  # one transaction per batch
+            connection.executemany(
+                "INSERT INTO alerts (timestamp, level, source, kind, message, session) VALUES (?, ?, ?, ?, ?, ?)",
+                pending)
+        self.written += len(pending)
+        self.commits += 1
+
+    # --- search ---
+
+    def search(self, text: str, source: str = None, limit: int = 1000) -> List[AlertRecord]:
+        """
+        Newest-first alerts whose message contains every word of `text`
+        (the last word also as a prefix), optionally only from `source`.
+        `drone:<id>` or `source:<name>` in `text` set the source filter.
+        An empty query returns the newest alerts.
+        """
+        text, filter_source = parse_query(text)
+        source = source or filter_source
+        terms = []
+        words = re.findall(r"\w+", text)
+        if words:
+            phrases = [_quote(word) for word in words]
+            phrases[-1] += " *"
+            terms.append("message : (" + " AND ".join(phrases) + ")")
+        if source:
+            terms.append("source : " + _quote("_".join(re.findall(r"\w+", source))))
+
+        if self._reader is None:
+            self._reader = self._connect()
+        if terms:
+            rows = self._reader.execute(
+                "SELECT a.id, a.timestamp, a.level, a.message FROM alerts_fts JOIN alerts a ON a.id = alerts_fts.rowid "
+                "WHERE alerts_fts MATCH ? ORDER BY alerts_fts.rowid DESC LIMIT ?", (" AND ".join(terms), limit))
+        else:
+            rows = self._reader.execute(
+                "SELECT id, timestamp, level, message FROM alerts ORDER BY id DESC LIMIT ?", (limit,))
+        return [AlertRecord(row_id, timestamp, level, message, 1, timestamp) for row_id, timestamp, level, message in rows]
+
+
+def parse_query(text: str) -> Tuple[str, Optional[str]]:
+    """ splits "payload released drone:7" into ("payload released", "drone 7") """
+    source = None
+    match = _FILTER.search(text)
+    if match:
+        kind, value = match.groups()
+        source = f"drone {value}" if kind == "drone" else value
+        text = (text[:match.start()] + text[match.end():]).strip()
+    return text, source
+
+
+def _quote(phrase: str) -> str:
+    return '"' + phrase.replace('"', '""') + '"'
+
+
+class SearchResults:
+    """ row source (see VirtualAlertView) over the records returned by AlertStore.search """
+
+    def __init__(self, records: List[AlertRecord]):
+        self.records = records[::-1]  # oldest first, like every row source
+
+    def __len__(self):
+        return len(self.records)
+
+    def rows(self, start: int, stop: int) -> List[AlertRecord]:
+        return self.records[max(start, 0):max(stop, 0)]
@@ -0,0 +1,434 @@
+"""
+Alert history for the System Alerts panel.
+
+AlertLog keeps the newest alerts in a fixed-size in-memory ring. Alerts
+leaving the ring are spilled to a file on disk, together with an index of
+byte offsets, so any alert of the session can be read back in O(1) without
+keeping the whole history in memory:
+
+    alerts/<session id>.log   one "timestamp<TAB>last seen<TAB>count<TAB>level<TAB>message" line per alert
+    alerts/<session id>.idx   little-endian uint64 byte offset of every line
+
+Every alert is also added to an AlertIndex (level and time columns kept in
+memory, 12 bytes per alert), so FilteredAlerts can select e.g. the danger
+alerts of the last hour with binary searches instead of a scan.
+
+AlertEngine sits in front of the log: it collapses repeats of the same
+(source, type) into one line with a counter, rate-limits new lines per key
+and applies everything queued once per UI frame.
+
+VirtualAlertView shows an alert source newest first but only ever holds the
+rows that fit on screen, so scrolling costs the same with 100 or 1M alerts.
+"""
+import os
+import struct
+import time
+import tkinter as tk
+import tkinter.font as tkfont
+from collections import deque
+from tkinter import ttk
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+import numpy as np
+
+ALERT_LEVELS = ("info", "success", "warning", "danger")
+
+_OFFSET = struct.Struct("<Q")
+
+
+class AlertRecord(NamedTuple):
+    seq: int  # position in the session's alert history, 0 = first alert
+    timestamp: float  # seconds since the epoch, first occurrence
+    level: int  # index into ALERT_LEVELS
+    message: str
+    count: int = 1  # occurrences collapsed into this line
+    last_seen: float = 0.0  # seconds since the epoch, latest occurrence
+
+
+# --- Storage ---
+
+class AlertIndex:
+    """
+    Level and time lookup over every alert of a session.
+
+    `times` holds the timestamp of every alert by seq, clamped to be
+    non-decreasing (alerts are logged in arrival order; a replayed alert
+    stamped in the past files under the time it arrived after), so a time
+    range maps to a seq range by binary search. `seqs[level]` lists the seqs
+    of one level in ascending order, so a level filter is a slice of it.
+    """
+
+    def __init__(self, capacity: int = 4096):
+        self.count = 0
+        self.times = np.zeros(capacity, dtype=np.float64)
+        self.seqs = [np.zeros(capacity, dtype=np.uint32) for _ in ALERT_LEVELS]
+        self.level_counts = [0] * len(ALERT_LEVELS)
+
+    def add(self, seq: int, timestamp: float, level: int):
+        if seq >= len(self.times):
+            self.times = _grown(self.times)
+        latest = self.times[seq - 1] if seq else timestamp
+        self.times[seq] = timestamp if timestamp > latest else latest
+        self.count = seq + 1
+
+        n = self.level_counts[level]
+        if n >= len(self.seqs[level]):
+            self.seqs[level] = _grown(self.seqs[level])
+        self.seqs[level][n] = seq
+        self.level_counts[level] = n + 1
+
+    def seq_range(self, start_time: float = None, end_time: float = None, first_seq: int = 0) -> tuple:
+        """ [first, last) seqs of alerts logged between start_time and end_time (inclusive) """
+        times = self.times[:self.count]
+        first = first_seq if start_time is None else max(first_seq, int(np.searchsorted(times, start_time)))
+        last = self.count if end_time is None else int(np.searchsorted(times, end_time, side="right"))
+        return first, max(first, last)
+
+    def select(self, levels: Iterable[int] = None, start_time: float = None, end_time: float = None,
+               first_seq: int = 0) -> np.ndarray:
+        """ ascending seqs of the alerts at `levels` (default: all) in the time range, from `first_seq` on """
+        first, last = self.seq_range(start_time, end_time, first_seq)
+        if levels is None:
+            return np.arange(first, last, dtype=np.uint32)
+        parts = []
+        for level in sorted(set(levels)):
+            seqs = self.seqs[level][:self.level_counts[level]]
+            parts.append(seqs[np.searchsorted(seqs, first):np.searchsorted(seqs, last)])
+        if len(parts) == 1:
+            return parts[0]
+        # each part is sorted, a stable sort merges the runs in linear time
+        return np.sort(np.concatenate(parts), kind="stable")
+
+
+def _grown(array: np.ndarray) -> np.ndarray:
+    grown = np.zeros(2 * len(array), dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class AlertLog:
+    """
+    Bounded in-memory ring of the newest `capacity` alerts, backed by an
+    append-only spill file. An alert is written to the file when the ring
+    overwrites it (or on close), so until then its count can still grow.
+    Older alerts are read back from disk on demand, e.g. when the operator
+    scrolls far down.
+    """
+
+    def __init__(self, directory: str, session_id: str = None, capacity: int = 10_000):
+        if capacity <= 0:
+            raise ValueError("AlertLog: capacity must be positive")
+        if session_id is None:
+            session_id = datetime.now().strftime("%Y%m%d-%H%M%S")
+        os.makedirs(directory, exist_ok=True)
+        self.session_id = session_id
+        self.path = os.path.join(directory, session_id + ".log")
+        self.capacity = capacity
+
+        # parallel preallocated columns; plain lists, as records are touched one at a time
+        self._timestamps = [0.0] * capacity
+        self._last_seen = [0.0] * capacity
+        self._counts = [0] * capacity
+        self._levels = [0] * capacity
+        self._messages: List[Optional[str]] = [None] * capacity
+        self._count = 0
+        self._spilled = 0  # alerts written to the spill file
+        self.version = 0  # incremented on every append or update
+        self.index = AlertIndex()
+
+        self._data = open(self.path, "ab")
+        self._offsets = open(self.path[:-len(".log")] + ".idx", "ab")
+        self._data_reader = open(self.path, "rb")
+        self._offsets_reader = open(self._offsets.name, "rb")
+        self._data_offset = self._data.tell()
+        self._offsets_start = self._offsets.tell() // _OFFSET.size  # alerts already in a reused session file
+        self._unflushed = False
+
+    def __len__(self):
+        return self._count
+
+    def append(self, timestamp: float, level: int, message: str) -> int:
+        """ stores one alert and returns its seq """
+        seq = self._count
+        if seq >= self.capacity:
+            self._spill(seq - self.capacity)
+        i = seq % self.capacity
+        self._timestamps[i] = timestamp
+        self._last_seen[i] = timestamp
+        self._counts[i] = 1
+        self._levels[i] = level
+        self._messages[i] = message
+        self._count = seq + 1
+        self.index.add(seq, timestamp, level)
+        self.version += 1
+        return seq
+
+    def in_memory(self, seq: int) -> bool:
+        return self._count - self.capacity <= seq < self._count
+
+    def update(self, seq: int, last_seen: float, count: int = 1, message: str = None) -> bool:
+        """
+        Adds `count` occurrences to alert `seq` and optionally replaces its
+        text. Returns False if the alert already left the in-memory ring.
+        """
+        if not self.in_memory(seq):
+            return False
+        i = seq % self.capacity
+        self._counts[i] += count
+        if last_seen > self._last_seen[i]:
+            self._last_seen[i] = last_seen
+        if message is not None:
+            self._messages[i] = message
+        self.version += 1
+        return True
+
+    def get(self, seq: int) -> AlertRecord:
+        if not 0 <= seq < self._count:
+            raise IndexError(f"AlertLog: no alert {seq}")
+        if self.in_memory(seq):
+            i = seq % self.capacity
+            return AlertRecord(seq, self._timestamps[i], self._levels[i], self._messages[i], self._counts[i],
+                               self._last_seen[i])
+        return self._read_spilled(seq)
+
+    def rows(self, start: int, stop: int) -> List[AlertRecord]:
+        """ alerts start .. stop - 1, oldest first """
+        return [self.get(seq) for seq in range(max(start, 0), min(stop, self._count))]
+
+    def _spill(self, seq: int):
+        i = seq % self.capacity
+        message = self._messages[i].replace("\n", " ")
+        line = (f"{self._timestamps[i]:.3f}\t{self._last_seen[i]:.3f}\t{self._counts[i]}\t{self._levels[i]}\t"
+                f"{message}\n").encode("utf-8", "replace")
+        self._offsets.write(_OFFSET.pack(self._data_offset))
+        self._data.write(line)
+        self._data_offset += len(line)
+        self._spilled = seq + 1
+        self._unflushed = True
+
+    def _read_spilled(self, seq: int) -> AlertRecord:
+        if self._unflushed:
+            self.flush()
+        self._offsets_reader.seek((self._offsets_start + seq) * _OFFSET.size)
+        offset, = _OFFSET.unpack(self._offsets_reader.read(_OFFSET.size))
+        self._data_reader.seek(offset)
+        line = self._data_reader.readline().decode("utf-8", "replace").rstrip("\n")
+        timestamp, last_seen, count, level, message = line.split("\t", 4)
+        return AlertRecord(seq, float(timestamp), int(level), message, int(count), float(last_seen))
+
+    def flush(self):
+        self._data.flush()
+        self._offsets.flush()
+        self._unflushed = False
+
+    def close(self):
+        """ spills the alerts still in memory, so the file holds the whole session """
+        for seq in range(self._spilled, self._count):
+            self._spill(seq)
+        for file in (self._data, self._offsets, self._data_reader, self._offsets_reader):
+            file.close()
+
+
+class FilteredAlerts:
+    """
+    Row source (like AlertLog itself) over the alerts of `log` matching
+    `levels` (None = all) and a time range. The matching seqs come from the
+    log's AlertIndex and are extended, not recomputed, as new alerts arrive.
+    """
+
+    def __init__(self, log: AlertLog, levels: Iterable[int] = None, start_time: float = None,
+                 end_time: float = None):
+        self.log = log
+        self.levels = None if levels is None else tuple(levels)
+        self.start_time = start_time
+        self.end_time = end_time
+        self.seqs = log.index.select(self.levels, start_time, end_time)
+        self._indexed = len(log)
+
+    def _update(self):
+        count = len(self.log)
+        if count != self._indexed:
+            added = self.log.index.select(self.levels, self.start_time, self.end_time, first_seq=self._indexed)
+            if len(added):
+                self.seqs = np.concatenate((self.seqs, added))
+            self._indexed = count
+
+    def __len__(self):
+        self._update()
+        return len(self.seqs)
+
+    def rows(self, start: int, stop: int) -> List[AlertRecord]:
+        self._update()
+        return [self.log.get(int(seq)) for seq in self.seqs[max(start, 0):max(stop, 0)]]
+
+
+# --- Aggregation ---
+
+class _KeyState:
+    __slots__ = ("seq", "tokens", "refilled")
+
+    def __init__(self, tokens: float, now: float):
+        self.seq = -1  # newest line of this key
+        self.tokens = tokens
+        self.refilled = now
+
+
+class AlertEngine:
+    """
+    Deduplicates, rate-limits and batches alerts on their way into an AlertLog.
+
+    Alerts are keyed by (source, type). Each key has a token bucket holding
+    up to `burst` tokens, refilled at `rate` tokens per second. An alert that
+    finds a token starts a new line; otherwise it is folded into the key's
+    newest line, which counts the repeats and remembers when the last one
+    arrived. So a GPS flapping once a second shows up as a few lines, then as
+    one line every 1 / `rate` seconds carrying the count in between.
+
+    `raise_alert` only queues (it is safe to call from any thread); `flush`
+    applies the queue and should be called once per UI frame.
+    """
+
+    def __init__(self, log: AlertLog, rate: float = 1 / 30, burst: int = 3):
+        self.log = log
+        self.rate = rate
+        self.burst = burst
+        self.received = 0
+        self.collapsed = 0
+        self._pending = deque()
+        self._keys: Dict[tuple, _KeyState] = {}
+
+    def raise_alert(self, source: str, kind: str, message: str, level: int, timestamp: float = None):
+        self._pending.append((source, kind, message, level, time.time() if timestamp is None else timestamp))
+
+    def flush(self) -> int:
+        """ applies every queued alert; returns how many were applied """
+        pending, log, keys = self._pending, self.log, self._keys
+        applied = 0
+        while pending:
+            source, kind, message, level, timestamp = pending.popleft()
+            key = (source, kind)
+            state = keys.get(key)
+            if state is None:
+                state = keys[key] = _KeyState(self.burst, timestamp)
+            elif timestamp > state.refilled:
+                state.tokens = min(self.burst, state.tokens + (timestamp - state.refilled) * self.rate)
+                state.refilled = timestamp
+
+            if state.tokens >= 1 or not log.update(state.seq, timestamp, message=message):
+                state.tokens = max(state.tokens - 1, 0.0)
+                state.seq = log.append(timestamp, level, message)
+            else:
+                self.collapsed += 1
+            applied += 1
+        self.received += applied
+        return applied
+
+    def clear(self):
+        """ forgets rate-limit and collapse state, e.g. after a replay seek """
+        self._keys.clear()
+
+
+# --- View ---
+
+def format_alert(record: AlertRecord) -> str:
+    text = f"[{time.strftime('%H:%M:%S', time.localtime(record.timestamp))}] {record.message}"
+    if record.count > 1:
+        text += f" (x{record.count}, last {time.strftime('%H:%M:%S', time.localtime(record.last_seen))})"
+    return text
+
+
+class VirtualAlertView(ttk.Frame):
+    """
+    Listbox + scrollbar over any row source with `__len__()` and
+    `rows(start, stop)` (e.g. an AlertLog or FilteredAlerts), newest row on
+    top, each row colored by its level (`level_colors`: level name -> color).
+
+    The listbox only ever contains the rows that fit in it. The scrollbar is
+    driven by hand from the row index of the top line, and scrolling just
+    refills those few rows from the source. While the view is scrolled away
+    from the top, new alerts don't move the rows being read.
+    """
+
+    def __init__(self, master, source, level_colors: Dict[str, str] = None, scrollbar_options: dict = None,
+                 **listbox_options):
+        super().__init__(master)
+        self.source = source
+        level_colors = level_colors or {}
+        self.level_colors = [level_colors.get(level) for level in ALERT_LEVELS]
+        self.listbox = tk.Listbox(self, borderwidth=0, highlightthickness=0, activestyle="none", **listbox_options)
+        self.scrollbar = ttk.Scrollbar(self, command=self._scroll, **(scrollbar_options or {}))
+        self.scrollbar.pack(side="right", fill="y")
+        self.listbox.pack(side="left", fill="both", expand=True)
+
+        self.first = 0  # row (0 = newest) shown in the top line
+        self.visible_rows = int(self.listbox.cget("height"))
+        self._line_height = tkfont.Font(font=self.listbox.cget("font")).metrics("linespace") + 1
+        self._known_count = 0  # len(source) at the last refresh
+        self._refresh_job = None
+
+        self.listbox.bind("<Configure>", self._resized)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.listbox.bind(sequence, self._wheel)
+
+    def refresh(self):
+        """ schedules a redraw once the event loop is idle; cheap to call for every new alert """
+        if self._refresh_job is None:
+            self._refresh_job = self.after_idle(self._redraw)
+
+    def _redraw(self):
+        self._refresh_job = None
+        count = len(self.source)
+        if self.first > 0:
+            self.first += count - self._known_count  # keep the same alerts in view
+        self._known_count = count
+        self.first = max(0, min(self.first, count - self.visible_rows))
+
+        newest = count - 1 - self.first
+        records = self.source.rows(newest - self.visible_rows + 1, newest + 1)
+        records.reverse()
+        self.listbox.delete(0, "end")
+        if records:
+            self.listbox.insert(0, *map(format_alert, records))
+            for row, record in enumerate(records):
+                color = self.level_colors[record.level]
+                if color:
+                    self.listbox.itemconfig(row, foreground=color, selectforeground=color)
+
+        if count:
+            self.scrollbar.set(self.first / count, min(1.0, (self.first + self.visible_rows) / count))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def set_source(self, source):
+        """ shows another row source (e.g. a different filter), starting at its newest row """
+        self.source = source
+        self.scroll_to(0)
+
+    def scroll_to(self, first: int):
+        if self._refresh_job is not None:
+            self.after_cancel(self._refresh_job)
+            self._refresh_job = None
+        self.first = max(0, first)
+        self._known_count = len(self.source)
+        self._redraw()
+
+    def _scroll(self, *args):
+        if args[0] == "moveto":
+            self.scroll_to(round(float(args[1]) * len(self.source)))
+        elif args[0] == "scroll":
+            step = self.visible_rows - 1 if args[2] == "pages" else 1
+            self.scroll_to(self.first + int(args[1]) * max(step, 1))
+
+    def _wheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            self.scroll_to(self.first - 3)
+        else:
+            self.scroll_to(self.first + 3)
+        return "break"  # the listbox only holds the visible rows, never let it scroll itself
+
+    def _resized(self, event):
+        rows = max(1, event.height // self._line_height)
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.refresh()
@@ -0,0 +1,142 @@
+"""
+Airspace loading, fleet checks and drawing with many no-fly zones.
+
+Writes a GeoJSON FeatureCollection of --zones random zones around New
+Delhi (every 50th a detailed outline of --detail points, like a coastline
+or a military area boundary) and measures:
+
+1. load:   load_zones streaming the file vs json.load of the whole document,
+           with the Python memory each one peaks at
+2. check:  Airspace.zones_at for --drones drones vs testing every zone
+3. draw:   AirspaceLayer redraws at several zoom levels (zones and points
+           drawn, time) and a pan, on a stand-in canvas like bench_clusters.py
+
+    python benchmarks/bench_airspace.py --zones 20000 --drones 1000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+from airspace import Airspace, AirspaceLayer, load_zones, points_in_rings
+from bench_clusters import CENTER, CountingCanvas, View
+from projection import decimal_to_world
+
+
+class PolygonCanvas(CountingCanvas):
+    """ CountingCanvas with the polygon calls AirspaceLayer makes """
+    create_polygon = CountingCanvas._create
+
+
+class MapView(View):
+    def manage_z_order(self):
+        pass
+
+
+def write_zones(path, zones, detail, rng):
+    with open(path, "w") as f:
+        f.write('{"type": "FeatureCollection", "features": [\n')
+        for i in range(zones):
+            points = detail if i % 50 == 0 else int(rng.integers(6, 40))
+            lat, lon = CENTER[0] + rng.normal(0, 1.0), CENTER[1] + rng.normal(0, 1.0)
+            radius = rng.uniform(0.002, 0.03) * (8 if points == detail else 1)
+            angle = np.linspace(0, 2 * np.pi, points, endpoint=False)
+            wobble = 1 + 0.15 * np.sin(angle * 7) + rng.normal(0, 0.02, points)
+            ring = np.column_stack((lon + radius * wobble * np.cos(angle), lat + radius * wobble * np.sin(angle)))
+            ring = np.vstack((ring, ring[:1])).round(6).tolist()
+            feature = {"type": "Feature", "properties": {"name": f"Zone {i}", "type": "restricted"},
+                       "geometry": {"type": "Polygon", "coordinates": [ring]}}
+            f.write(("," if i else "") + json.dumps(feature) + "\n")
+        f.write("]}\n")
+
+
+def measured(func):
+    """ (result, seconds, peak MB); timed and traced in separate runs, tracemalloc slows everything down """
+    started = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - started
+    del result
+    tracemalloc.start()
+    result = func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--zones", type=int, default=20000)
+    parser.add_argument("--detail", type=int, default=5000, help="points of the detailed zones")
+    parser.add_argument("--drones", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "zones.geojson")
+        write_zones(path, args.zones, args.detail, rng)
+        print(f"{args.zones:,} zones, {os.path.getsize(path) / 1e6:.0f} MB of GeoJSON")
+
+        zones, seconds, peak = measured(lambda: list(load_zones(path)))
+        print(f"load       load_zones {seconds:6.2f} s, peak {peak:6.0f} MB (the zones themselves included)")
+
+        def load_whole():
+            with open(path) as f:
+                return json.load(f)
+        _, seconds, peak = measured(load_whole)
+        print(f"           json.load  {seconds:6.2f} s, peak {peak:6.0f} MB (the document alone)")
+
+    started = time.perf_counter()
+    airspace = Airspace(zones)
+    print(f"index      {(time.perf_counter() - started) * 1000:6.1f} ms for {len(airspace):,} zones, "
+          f"{len(airspace.index.levels)} levels")
+
+    lats = CENTER[0] + rng.normal(0, 1.0, args.drones)
+    lons = CENTER[1] + rng.normal(0, 1.0, args.drones)
+    started = time.perf_counter()
+    found = airspace.zones_at(lats, lons)
+    first_ms = (time.perf_counter() - started) * 1000  # builds the edge table
+    started = time.perf_counter()
+    for _ in range(10):
+        found = airspace.zones_at(lats, lons)
+    indexed_ms = (time.perf_counter() - started) * 100
+    x, y = decimal_to_world(lats, lons)
+    started = time.perf_counter()
+    inside = np.zeros(args.drones, dtype=bool)
+    for zone in airspace.zones:
+        inside |= points_in_rings(x, y, zone.rings)
+    every_zone_ms = (time.perf_counter() - started) * 1000
+    assert ((found >= 0) == inside).all()
+    print(f"check      zones_at {indexed_ms:6.2f} ms for {args.drones:,} drones ({(found >= 0).sum()} in a zone, "
+          f"first call {first_ms:.0f} ms), every zone {every_zone_ms:8.1f} ms")
+
+    view = MapView(PolygonCanvas(), 8)
+    view.max_zoom = 19
+    layer = AirspaceLayer(view, airspace)
+    for zoom in (8, 11, 14, 17):
+        for attempt in ("first", "again"):
+            view.set_view(CENTER, zoom)
+            layer._view = None  # a full redraw, not a move
+            started = time.perf_counter()
+            layer.draw()
+            ms = (time.perf_counter() - started) * 1000
+            if attempt == "first":
+                first_ms = ms
+        print(f"draw z{zoom:<2d}   {len(layer.drawn_zones):5,} zones, {layer.drawn_points:7,} points   "
+              f"first {first_ms:7.1f} ms   again {ms:6.1f} ms")
+    calls = view.canvas.calls
+    started = time.perf_counter()
+    view.pan(8, 3)
+    layer.draw()
+    print(f"pan        {(time.perf_counter() - started) * 1000:6.2f} ms, {view.canvas.calls - calls} canvas call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+AlertStore write throughput and search latency on a long history.
+
+Fills a fresh database with `--alerts` alerts from `--drones` drones through
+the background writer, then times full-text searches like the operator's
+"payload released" for one drone.
+
+    python benchmarks/bench_alert_store.py --alerts 2000000 --drones 200
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from alert_store import AlertStore
+
+MESSAGES = (
+    ("gps_lost", 3, "Drone {}: GPS signal lost!"),
+    ("gps_regained", 1, "Drone {}: GPS signal regained."),
+    ("battery_low", 2, "Drone {}: Battery low (18%)."),
+    ("payload", 1, "Drone {}: Payload released."),
+    ("route", 0, "Drone {}: Route set to Noida. Drone en route."),
+)
+
+QUERIES = ("payload released drone:7", "gps lost drone:42", "battery low", "noida", "payload rel")
+
+
+def bench(alert_count, drone_count, repeats):
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as directory:
+        store = AlertStore(os.path.join(directory, "alerts.sqlite3"), session="bench", commit_interval=0.2)
+        started = time.perf_counter()
+        now = time.time() - alert_count  # one alert per second of history
+        for i in range(alert_count):
+            drone = rng.randrange(1, drone_count + 1)
+            kind, level, message = MESSAGES[rng.randrange(len(MESSAGES))]
+            store.add(now + i, level, f"drone {drone}", kind, message.format(drone))
+        queued = time.perf_counter() - started
+        store.close()
+        elapsed = time.perf_counter() - started
+        size = os.path.getsize(store.path) / 1e6
+        print(f"write: {alert_count:,} alerts queued in {queued:.2f} s, committed after {elapsed:.2f} s "
+              f"-> {alert_count / elapsed:,.0f} alerts/s ({store.commits} commits, {size:.0f} MB)")
+
+        store = AlertStore(store.path)
+        for query in QUERIES:
+            timings = []
+            for _ in range(repeats):
+                began = time.perf_counter()
+                results = store.search(query, limit=1000)
+                timings.append((time.perf_counter() - began) * 1000)
+            timings.sort()
+            print(f"search {query!r:>28}: {len(results):>4} results, median {timings[len(timings) // 2]:.1f} ms, "
+                  f"max {timings[-1]:.1f} ms")
+        store.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--alerts", type=int, default=2_000_000)
+    parser.add_argument("--drones", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+    bench(args.alerts, args.drones, args.repeats)
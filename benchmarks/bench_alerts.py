@@ -0,0 +1,55 @@
+"""
+AlertLog cost with a long history.
+
+Appends `--alerts` alerts (most of them spill out of the in-memory ring),
+then reads random windows of `--rows` rows, the way VirtualAlertView does
+when the operator drags the scrollbar through the whole history.
+
+    python benchmarks/bench_alerts.py --alerts 1000000 --rows 20
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from alerts import AlertLog, format_alert
+
+
+def bench(alert_count, rows, windows):
+    with tempfile.TemporaryDirectory() as directory:
+        log = AlertLog(directory, "bench")
+        now = time.time()
+        started = time.perf_counter()
+        for i in range(alert_count):
+            log.append(now + i * 0.01, i % 4, f"Drone {i % 1000}: GPS signal lost!")
+        log.flush()
+        elapsed = time.perf_counter() - started
+        size = os.path.getsize(log.path) / 1e6
+        print(f"append: {alert_count:,} alerts in {elapsed:.2f} s -> {alert_count / elapsed:,.0f} alerts/s ({size:.0f} MB spilled)")
+
+        rng = random.Random(0)
+        timings = []
+        for _ in range(windows):
+            start = rng.randrange(alert_count - rows)
+            began = time.perf_counter()
+            lines = [format_alert(record) for record in log.rows(start, start + rows)]
+            timings.append((time.perf_counter() - began) * 1000)
+        timings.sort()
+        assert len(lines) == rows
+        print(f"scroll: {rows} rows from a random position: median {timings[len(timings) // 2]:.3f} ms, "
+              f"p99 {timings[int(len(timings) * 0.99)]:.3f} ms")
+        log.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--alerts", type=int, default=1_000_000)
+    parser.add_argument("--rows", type=int, default=20, help="visible rows per redraw")
+    parser.add_argument("--windows", type=int, default=2000)
+    args = parser.parse_args()
+    bench(args.alerts, args.rows, args.windows)
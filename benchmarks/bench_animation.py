@@ -0,0 +1,98 @@
+"""
+Dead-reckoned marker animation: frame cost and position error.
+
+Flies --drones drones around New Delhi on smooth curved tracks, reports
+their position every --report-interval seconds with --noise m of GPS noise
+and animates them at --fps, measuring:
+
+1. tick:  one FleetAnimator frame (positions of the whole fleet, the
+          visible drones that moved, set_many on a ClusterLayer)
+2. error: distance between the drawn and the true position, for the last
+          report (what the map drew before) and for DeadReckoning
+
+Draws on a stand-in canvas that only counts canvas calls, like
+bench_clusters.py, so the numbers are the animation's own work.
+
+    python benchmarks/bench_animation.py --drones 2000 --report-interval 1
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+from bench_clusters import CENTER, CountingCanvas, View
+from dead_reckoning import DeadReckoning
+from map_layers import ClusterLayer, FleetAnimator
+
+METERS_PER_DEGREE = 111_320
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--drones", type=int, default=2000)
+    parser.add_argument("--seconds", type=float, default=30.0, help="simulated flight time")
+    parser.add_argument("--fps", type=float, default=60.0)
+    parser.add_argument("--report-interval", type=float, default=1.0, help="seconds between telemetry reports")
+    parser.add_argument("--noise", type=float, default=3.0, help="GPS noise in m")
+    parser.add_argument("--zoom", type=int, default=13)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    start = np.column_stack((CENTER[0] + rng.normal(0, 0.05, args.drones),
+                             CENTER[1] + rng.normal(0, 0.05, args.drones)))
+    speed = rng.uniform(8, 20, args.drones) / METERS_PER_DEGREE  # degrees per second
+    heading = rng.uniform(0, 2 * np.pi, args.drones)
+    turn = rng.normal(0, 0.03, args.drones)  # rad/s
+
+    def truth(t):
+        """ (n, 2) positions at t, flying arcs of constant speed and turn rate """
+        angle = heading + turn * t
+        with np.errstate(divide="ignore", invalid="ignore"):
+            north = np.where(turn != 0, (np.sin(angle) - np.sin(heading)) / turn, np.cos(heading) * t)
+            east = np.where(turn != 0, (np.cos(heading) - np.cos(angle)) / turn, np.sin(heading) * t)
+        return start + speed[:, None] * np.column_stack((north, east))
+
+    view = View(CountingCanvas(), args.zoom)
+    tracker = DeadReckoning()
+    animator = FleetAnimator(view, tracker, ClusterLayer(view), fps=args.fps)
+    keys = np.arange(args.drones)
+
+    frame_s = 1 / args.fps
+    next_report, last_report = 0.0, None
+    ticks, naive_error, tracked_error = [], [], []
+    for frame in range(int(args.seconds * args.fps)):
+        t = frame * frame_s
+        if t >= next_report:
+            reported = truth(t) + rng.normal(0, args.noise / METERS_PER_DEGREE, (args.drones, 2))
+            tracker.update(keys, reported[:, 0], reported[:, 1], np.full(args.drones, t))
+            last_report, next_report = reported, next_report + args.report_interval
+
+        started = time.perf_counter()
+        animator.tick(t)
+        ticks.append((time.perf_counter() - started) * 1000)
+
+        if t > 3 * args.report_interval:  # the filter has settled
+            actual = truth(t)
+            lats, lons = tracker.positions(t)
+            naive_error.append(np.hypot(*(last_report - actual).T) * METERS_PER_DEGREE)
+            tracked_error.append(np.hypot(lats - actual[:, 0], lons - actual[:, 1]) * METERS_PER_DEGREE)
+
+    ticks = np.array(ticks)
+    print(f"{args.drones:,} drones, reports every {args.report_interval:g} s, {args.fps:g} fps")
+    print(f"tick   mean {ticks.mean():6.2f} ms   p99 {np.percentile(ticks, 99):6.2f} ms   "
+          f"worst {ticks.max():6.2f} ms   {animator.moved:,} markers moved in the last frame")
+    if not tracked_error:
+        print("no error measured: --seconds must be longer than 3 report intervals, for the filter to settle")
+        return
+    for name, error in (("last report", naive_error), ("dead reckoning", tracked_error)):
+        error = np.concatenate(error)
+        print(f"{name:15s} error   mean {error.mean():6.1f} m   p95 {np.percentile(error, 95):6.1f} m")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+ClusterLayer frame cost with many markers.
+
+Places --markers markers (--drones of them moving every frame, the rest
+static like hospitals and clinics) around New Delhi and measures, per
+frame:
+
+1. update: set_many for the moving drones and a redraw
+2. pan:    the view shifted by a few pixels (usually one canvas.move)
+3. zoom:   the view zoomed in or out one level (full regrid and redraw)
+
+and the canvas items it ends up with. Draws on a real Tk canvas when a
+display is available, otherwise on a stand-in that only counts canvas
+calls, which then measures the layer's own work.
+
+    python benchmarks/bench_clusters.py --markers 10000 --drones 500
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import tkintermapview
+
+from map_layers import ClusterLayer
+
+CENTER = (28.6139, 77.2090)
+WIDTH, HEIGHT = 1000, 700
+
+
+class CountingCanvas:
+    """ the canvas calls ClusterLayer makes, counted instead of drawn """
+
+    def __init__(self):
+        self.calls = 0
+        self.items = 0
+
+    def _call(self, *args, **kwargs):
+        self.calls += 1
+
+    def _create(self, *args, **kwargs):
+        self.calls += 1
+        self.items += 1
+        return self.items
+
+    create_oval = create_text = _create
+    coords = itemconfigure = move = tag_bind = _call
+
+    def after_idle(self, func):
+        pass  # the benchmark draws explicitly
+
+
+class View:
+    """ the parts of TkinterMapView a layer reads """
+
+    def __init__(self, canvas, zoom):
+        self.canvas = canvas
+        self.width, self.height, self.tile_size, self.max_zoom = WIDTH, HEIGHT, 256, 19
+        self.layers = []
+        self.set_view(CENTER, zoom)
+
+    def set_view(self, center, zoom):
+        self.zoom = zoom
+        x, y = tkintermapview.decimal_to_osm(*center, zoom)
+        half_w, half_h = WIDTH / 2 / self.tile_size, HEIGHT / 2 / self.tile_size
+        self.upper_left_tile_pos = (x - half_w, y - half_h)
+        self.lower_right_tile_pos = (x + half_w, y + half_h)
+
+    def pan(self, dx_px, dy_px):
+        shift = np.array([dx_px, dy_px]) / self.tile_size
+        self.upper_left_tile_pos = tuple(np.add(self.upper_left_tile_pos, shift))
+        self.lower_right_tile_pos = tuple(np.add(self.lower_right_tile_pos, shift))
+
+    def add_layer(self, layer):
+        self.layers.append(layer)
+
+
+def timed(frames, step):
+    times = []
+    for i in range(frames):
+        started = time.perf_counter()
+        step(i)
+        times.append((time.perf_counter() - started) * 1000)
+    times = np.array(times)
+    return f"mean {times.mean():6.2f} ms   p99 {np.percentile(times, 99):6.2f} ms   worst {times.max():6.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--markers", type=int, default=10000)
+    parser.add_argument("--drones", type=int, default=500, help="markers moving every frame")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--zoom", type=int, default=12)
+    args = parser.parse_args()
+
+    try:
+        import tkinter
+        root = tkinter.Tk()
+        canvas = tkinter.Canvas(root, width=WIDTH, height=HEIGHT)
+        canvas.pack()
+        root.update()
+        print("drawing on a Tk canvas")
+    except Exception:
+        root, canvas = None, CountingCanvas()
+        print("no display: canvas calls counted, not drawn")
+
+    rng = np.random.default_rng(0)
+    lats = CENTER[0] + rng.normal(0, 0.15, args.markers)
+    lons = CENTER[1] + rng.normal(0, 0.15, args.markers)
+    view = View(canvas, args.zoom)
+    layer = ClusterLayer(view)
+    started = time.perf_counter()
+    layer.set_many(np.arange(args.markers), lats, lons)
+    layer.draw()
+    print(f"{args.markers:,} markers added and drawn in {(time.perf_counter() - started) * 1000:.1f} ms, "
+          f"{len(layer._items)} clusters drawn")
+
+    drones = np.arange(args.drones)
+
+    def update(i):
+        lats[drones] += rng.normal(0, 2e-5, args.drones)
+        lons[drones] += rng.normal(0, 2e-5, args.drones)
+        layer.set_many(drones, lats[drones], lons[drones])
+        layer.draw()
+        if root is not None:
+            root.update_idletasks()
+
+    def pan(i):
+        view.pan(8 if i % 40 < 20 else -8, 3)
+        layer.draw()
+        if root is not None:
+            root.update_idletasks()
+
+    def zoom(i):
+        view.set_view(CENTER, args.zoom + (i % 4 - 1))
+        layer.draw()
+        if root is not None:
+            root.update_idletasks()
+
+    for name, step in (("update", update), ("pan", pan), ("zoom", zoom)):
+        calls = getattr(canvas, "calls", 0)
+        result = timed(args.frames, step)
+        extra = f"   {(canvas.calls - calls) / args.frames:6.1f} canvas calls/frame" if root is None else ""
+        print(f"{name:7s} {result}{extra}")
+    print(f"canvas items: {2 * len(layer._items)} for {args.markers:,} markers")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Sustained telemetry ingest rate vs. UI frame time.
+
+Runs a TelemetryIngest worker as fast as its source allows (each sample pays a
+simulated decode cost) while the main thread renders the latest sample on a
+~30 fps tick, the same way main_app.render_tick does. Uses a real Tk window
+when a display is available and a headless render loop otherwise.
+
+    python benchmarks/bench_ingest.py --seconds 5 --decode-us 50
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telemetry import DRONE_STATES, TelemetryIngest, TelemetryRingBuffer, TelemetrySample
+
+
+def make_source(decode_us):
+    counter = [0]
+
+    def source():
+        # busy-wait to stand in for frame decoding / validation work
+        end = time.perf_counter() + decode_us / 1e6
+        while time.perf_counter() < end:
+            pass
+        counter[0] += 1
+        return TelemetrySample(1, time.time(), counter[0] % len(DRONE_STATES), 0, 0,
+                               28.6, 77.2, 50.0, 12.5, 80.0, 5)
+
+    return source
+
+
+def render_text(sample):
+    return (DRONE_STATES[sample.state], f"Altitude: {sample.altitude:.1f} m",
+            f"Speed: {sample.speed:.1f} m/s", f"Estimated ETA: {sample.eta} min")
+
+
+def run_headless(ring, seconds, frame_ms):
+    frame_times, lateness = [], []
+    next_frame = time.perf_counter()
+    end = next_frame + seconds
+    while next_frame < end:
+        next_frame += frame_ms / 1000
+        delay = next_frame - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        lateness.append(max(0.0, time.perf_counter() - next_frame) * 1000)
+        start = time.perf_counter()
+        sample = ring.latest()
+        if sample is not None:
+            render_text(sample)
+        frame_times.append((time.perf_counter() - start) * 1000)
+    return frame_times, lateness
+
+
+def run_tk(ring, seconds, frame_ms):
+    import tkinter as tk
+    root = tk.Tk()
+    labels = [tk.Label(root) for _ in range(4)]
+    for label in labels:
+        label.pack()
+
+    frame_times, lateness = [], []
+    state = {"next": time.perf_counter() + frame_ms / 1000, "end": time.perf_counter() + seconds}
+
+    def tick():
+        now = time.perf_counter()
+        lateness.append(max(0.0, now - state["next"]) * 1000)
+        sample = ring.latest()
+        if sample is not None:
+            for label, text in zip(labels, render_text(sample)):
+                label.config(text=text)
+        root.update_idletasks()
+        frame_times.append((time.perf_counter() - now) * 1000)
+        if now >= state["end"]:
+            root.destroy()
+            return
+        state["next"] += frame_ms / 1000
+        root.after(max(0, int((state["next"] - time.perf_counter()) * 1000)), tick)
+
+    root.after(frame_ms, tick)
+    root.mainloop()
+    return frame_times, lateness
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--decode-us", type=float, default=50.0, help="simulated decode cost per sample")
+    parser.add_argument("--frame-ms", type=int, default=33)
+    parser.add_argument("--capacity", type=int, default=4096)
+    parser.add_argument("--headless", action="store_true", help="don't open a Tk window")
+    args = parser.parse_args()
+
+    ring = TelemetryRingBuffer(args.capacity)
+    ingest = TelemetryIngest(make_source(args.decode_us), ring)
+    ingest.start()
+
+    mode = "headless"
+    started = time.perf_counter()
+    if args.headless:
+        frame_times, lateness = run_headless(ring, args.seconds, args.frame_ms)
+    else:
+        try:
+            frame_times, lateness = run_tk(ring, args.seconds, args.frame_ms)
+            mode = "tk"
+        except Exception:  # no display available
+            frame_times, lateness = run_headless(ring, args.seconds, args.frame_ms)
+    elapsed = time.perf_counter() - started
+    ingest.stop()
+
+    print(f"mode:            {mode}")
+    print(f"ingest rate:     {ingest.received / elapsed:,.0f} samples/s ({ingest.received:,} total)")
+    print(f"frames:          {len(frame_times)} ({len(frame_times) / elapsed:.1f} fps)")
+    print(f"frame time ms:   p50 {statistics.median(frame_times):.3f}  p95 {percentile(frame_times, 95):.3f}  "
+          f"p99 {percentile(frame_times, 99):.3f}  max {max(frame_times):.3f}")
+    print(f"tick late ms:    p50 {statistics.median(lateness):.3f}  p95 {percentile(lateness, 95):.3f}  "
+          f"p99 {percentile(lateness, 99):.3f}  max {max(lateness):.3f}")
+
+
+if __name__ == "__main__":
+    main()
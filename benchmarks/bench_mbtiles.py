@@ -0,0 +1,127 @@
+"""
+MBTilesSource read latency against tiles already in memory.
+
+Builds a synthetic MBTiles file (random-noise PNG tiles around New Delhi,
+zoom 10 .. --max-zoom), then reads random tiles of the viewport area:
+
+1. memory:   encoded tiles from a dict, the floor for any tile source
+2. mbtiles:  MBTilesSource.get_tile, warm page cache, from `--threads`
+             loader threads sharing the connection pool
+3. overzoom: tiles one level past the file's max zoom (ancestor lookup)
+
+    python benchmarks/bench_mbtiles.py --max-zoom 14 --reads 20000 --threads 8
+"""
+import argparse
+import io
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import tkintermapview
+from PIL import Image
+
+from mbtiles import MBTilesSource
+
+CENTER = (28.6139, 77.2090)
+
+
+def area_tiles(max_zoom, radius=6):
+    tiles = []
+    for zoom in range(10, max_zoom + 1):
+        cx, cy = (int(v) for v in tkintermapview.decimal_to_osm(*CENTER, zoom))
+        tiles += [(zoom, x, y) for x in range(cx - radius, cx + radius + 1) for y in range(cy - radius, cy + radius + 1)]
+    return tiles
+
+
+def build(path, tiles):
+    rng = random.Random(0)
+    connection = sqlite3.connect(path)
+    connection.executescript("""
+        CREATE TABLE metadata (name TEXT, value TEXT);
+        CREATE TABLE tiles (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB);
+        CREATE UNIQUE INDEX tile_index ON tiles (zoom_level, tile_column, tile_row);
+    """)
+    zooms = [zoom for zoom, _, _ in tiles]
+    connection.executemany("INSERT INTO metadata VALUES (?, ?)", [
+        ("name", "bench"), ("format", "png"), ("minzoom", str(min(zooms))), ("maxzoom", str(max(zooms)))])
+    encoded = {}
+    for zoom, x, y in tiles:
+        buffer = io.BytesIO()
+        Image.frombytes("RGB", (256, 256), rng.randbytes(256 * 256 * 3)).save(buffer, "PNG")
+        encoded[(zoom, x, y)] = buffer.getvalue()
+    connection.executemany("INSERT INTO tiles VALUES (?, ?, ?, ?)",
+                           [(z, x, (1 << z) - 1 - y, data) for (z, x, y), data in encoded.items()])
+    connection.commit()
+    connection.close()
+    return encoded
+
+
+def timed_reads(read, keys, threads):
+    timings = []
+    lock = threading.Lock()
+
+    def worker(chunk):
+        local = []
+        for key in chunk:
+            began = time.perf_counter()
+            assert read(*key) is not None
+            local.append((time.perf_counter() - began) * 1e6)
+        with lock:
+            timings.extend(local)
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(keys[i::threads],)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    timings.sort()
+    return len(keys) / elapsed, timings[len(timings) // 2], timings[int(len(timings) * 0.99)]
+
+
+def main(max_zoom, reads, threads):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.mbtiles")
+        tiles = area_tiles(max_zoom)
+        encoded = build(path, tiles)
+        size = os.path.getsize(path) / 1e6
+        print(f"{len(tiles):,} tiles, zoom 10..{max_zoom}, {size:.0f} MB")
+
+        rng = random.Random(1)
+        keys = [rng.choice(tiles) for _ in range(reads)]
+        source = MBTilesSource([path], pool_size=threads)
+        source.get_tile(*keys[0])
+        for key in tiles:  # warm the page cache
+            source.get_tile(*key)
+
+        def from_memory(zoom, x, y):
+            return encoded.get((zoom, x, y))
+
+        overzoomed = [(zoom + 1, 2 * x, 2 * y) for zoom, x, y in keys if zoom == max_zoom] or [(max_zoom + 1, 0, 0)]
+        for label, read, sample in (("memory", from_memory, keys), ("mbtiles", source.get_tile, keys),
+                                    ("overzoom", source.get_tile, overzoomed)):
+            rate, median, p99 = timed_reads(read, sample, threads)
+            print(f"{label:>9}: {rate:>10,.0f} tiles/s, median {median:7.1f} us, p99 {p99:7.1f} us")
+
+        began = time.perf_counter()
+        for key in keys[:1000]:
+            Image.open(io.BytesIO(encoded[key])).load()
+        print(f"   decode: {(time.perf_counter() - began) / 1000 * 1e6:7.1f} us per tile (PNG, for scale)")
+        source.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-zoom", type=int, default=14)
+    parser.add_argument("--reads", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+    main(args.max_zoom, args.reads, args.threads)
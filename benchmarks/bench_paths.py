@@ -0,0 +1,141 @@
+"""
+SimplifiedPath against tkintermapview's CanvasPath for a long flight track.
+
+Builds a --hours long track at --rate Hz (a random walk around New Delhi)
+and measures a full redraw (zoom) and a pan at several zoom levels, plus
+the cost of appending live points. Draws on a real Tk canvas when a display
+is available, otherwise on a stand-in that only counts canvas calls and
+points, which then measures the projection work alone.
+
+    python benchmarks/bench_paths.py --hours 2 --rate 10
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import tkintermapview
+from tkintermapview.canvas_path import CanvasPath
+
+from map_paths import SimplifiedPath
+
+CENTER = (28.6139, 77.2090)
+WIDTH, HEIGHT = 1000, 700
+
+
+class CountingCanvas:
+    """ canvas calls counted instead of drawn, with the number of coordinates passed """
+
+    def __init__(self):
+        self.calls = self.items = self.points = 0
+
+    def _call(self, *args, **kwargs):
+        self.calls += 1
+
+    def create_line(self, coords, **kwargs):
+        self.calls += 1
+        self.items += 1
+        self.points += len(coords) // 2
+        return self.items
+
+    def coords(self, item, coords):
+        self.calls += 1
+        self.points += len(coords) // 2
+
+    itemconfigure = move = tag_bind = delete = lift = _call
+
+
+class View:
+    """ the parts of TkinterMapView a path reads """
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.width, self.height, self.tile_size, self.max_zoom = WIDTH, HEIGHT, 256, 19
+        self.canvas_path_list = []
+
+    def set_view(self, center, zoom):
+        self.zoom = zoom
+        x, y = tkintermapview.decimal_to_osm(*center, zoom)
+        half_w, half_h = WIDTH / 2 / self.tile_size, HEIGHT / 2 / self.tile_size
+        self.upper_left_tile_pos = (x - half_w, y - half_h)
+        self.lower_right_tile_pos = (x + half_w, y + half_h)
+
+    def pan(self, dx_px, dy_px):
+        (left, top), (right, bottom) = self.upper_left_tile_pos, self.lower_right_tile_pos
+        dx, dy = dx_px / self.tile_size, dy_px / self.tile_size
+        self.upper_left_tile_pos, self.lower_right_tile_pos = (left + dx, top + dy), (right + dx, bottom + dy)
+
+    def manage_z_order(self):
+        self.canvas.lift("path")
+
+
+def track(points, rate_hz, seed=0):
+    """ a drone flying legs of a few minutes at ~15 m/s with GPS noise """
+    rng = np.random.default_rng(seed)
+    heading = np.cumsum(np.where(rng.random(points) < 1 / (120 * rate_hz), rng.normal(0, 1.5, points), 0))
+    step_deg = 15 / rate_hz / 111_000
+    lat = CENTER[0] + np.cumsum(np.cos(heading) * step_deg) + rng.normal(0, 2e-6, points)
+    lon = CENTER[1] + np.cumsum(np.sin(heading) * step_deg) + rng.normal(0, 2e-6, points)
+    return list(zip(lat.tolist(), lon.tolist()))
+
+
+def measure(func, repeat):
+    started = time.perf_counter()
+    for i in range(repeat):
+        func(i)
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hours", type=float, default=2.0)
+    parser.add_argument("--rate", type=float, default=10.0)
+    parser.add_argument("--zooms", default="10,13,16,18")
+    args = parser.parse_args()
+
+    try:
+        import tkinter
+        root = tkinter.Tk()
+        canvas = tkinter.Canvas(root, width=WIDTH, height=HEIGHT)
+        canvas.pack()
+        print("drawing on a Tk canvas")
+    except Exception:
+        root, canvas = None, CountingCanvas()
+        print("no display: canvas calls counted, not drawn")
+
+    positions = track(int(args.hours * 3600 * args.rate), args.rate)
+    view = View(canvas)
+    view.set_view(positions[len(positions) // 2], 12)
+    started = time.perf_counter()
+    path = SimplifiedPath(view, positions)
+    path.draw()
+    print(f"{len(positions):,} points, SimplifiedPath built and drawn in {(time.perf_counter() - started) * 1000:.0f} ms "
+          f"({len(path._chunks)} chunks)")
+    plain = CanvasPath(view, positions)
+
+    for zoom in (int(z) for z in args.zooms.split(",")):
+        view.set_view(positions[len(positions) // 2], zoom)
+        path.draw()  # builds the zoom level's cache
+        row = f"zoom {zoom:2d}"
+        for name, obj in (("simplified", path), ("CanvasPath", plain)):
+            points = getattr(canvas, "points", 0)
+            repeat = 20 if obj is path else 2
+            redraw = measure(lambda i: obj.draw(), repeat)
+            drawn = (getattr(canvas, "points", 0) - points) / repeat
+            pan = measure(lambda i: (view.pan(4 if i % 2 else -4, 2), obj.draw(move=True)), repeat)
+            row += f"   {name}: redraw {redraw:7.2f} ms ({drawn:6,.0f} points), pan {pan:6.2f} ms"
+        print(row)
+
+    started = time.perf_counter()
+    for lat, lon in track(600, args.rate, seed=1):
+        path.add_position(lat, lon)
+        path.draw()
+    print(f"live append + redraw: {(time.perf_counter() - started) / 600 * 1000:.2f} ms per point")
+
+
+if __name__ == "__main__":
+    main()
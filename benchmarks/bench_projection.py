@@ -0,0 +1,106 @@
+"""
+Batch projection (projection.py) against tkintermapview's per-point
+conversions.
+
+Projects --points random positions around New Delhi:
+
+1. decimal_to_osm:    lat/lon to tile coordinates
+2. osm_to_decimal:    back to lat/lon
+3. polygon vertices:  a position list to canvas pixels, as CanvasPolygon.draw
+                      does per vertex on every zoom, and ProjectedPolygon does
+                      the first time (with the list to array conversion)
+4. polygon zoom:      the same after a zoom, ProjectedPolygon from its
+                      cached world coordinates
+
+and checks that both give the same coordinates.
+
+    python benchmarks/bench_projection.py --points 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import tkintermapview
+
+from bench_clusters import CENTER, View
+from projection import CanvasView, decimal_to_osm, decimal_to_world, osm_to_decimal
+
+
+def best_of(repeat, func):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        times.append((time.perf_counter() - started) * 1000)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=100_000)
+    parser.add_argument("--zoom", type=int, default=14)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    lats = CENTER[0] + rng.normal(0, 0.2, args.points)
+    lons = CENTER[1] + rng.normal(0, 0.2, args.points)
+    positions = list(zip(lats.tolist(), lons.tolist()))  # what map objects hold
+    zoom = args.zoom
+    view = View(None, zoom)
+
+    def loop_to_osm():
+        return [tkintermapview.decimal_to_osm(lat, lon, zoom) for lat, lon in positions]
+
+    def batch_to_osm():
+        return decimal_to_osm(lats, lons, zoom)
+
+    tiles = np.array(loop_to_osm())
+
+    def loop_to_decimal():
+        return [tkintermapview.osm_to_decimal(x, y, zoom) for x, y in tiles.tolist()]
+
+    def batch_to_decimal():
+        return osm_to_decimal(tiles[:, 0], tiles[:, 1], zoom)
+
+    def loop_to_canvas():
+        (left, top), (right, bottom) = view.upper_left_tile_pos, view.lower_right_tile_pos
+        width, height = right - left, bottom - top
+        coords = []
+        for position in positions:
+            x, y = tkintermapview.decimal_to_osm(*position, zoom)
+            coords.append((x - left) / width * view.width)
+            coords.append((y - top) / height * view.height)
+        return coords
+
+    def batch_to_canvas():
+        lat, lon = np.asarray(positions).T  # from the position list, like ProjectedPolygon
+        x, y = CanvasView(view).decimal_to_canvas(lat, lon)
+        return np.column_stack((x, y)).ravel().tolist()
+
+    world = np.column_stack(decimal_to_world(lats, lons))
+
+    def batch_zoom_to_canvas():
+        x, y = CanvasView(view).world_to_canvas(world[:, 0], world[:, 1])
+        return np.column_stack((x, y)).ravel().tolist()
+
+    print(f"{args.points:,} points at zoom {zoom}")
+    for name, loop, batch in (("decimal_to_osm", loop_to_osm, batch_to_osm),
+                              ("osm_to_decimal", loop_to_decimal, batch_to_decimal),
+                              ("polygon vertices", loop_to_canvas, batch_to_canvas),
+                              ("polygon zoom", loop_to_canvas, batch_zoom_to_canvas)):
+        loop_ms, expected = best_of(args.repeat, loop)
+        batch_ms, result = best_of(args.repeat, batch)
+        result = np.column_stack(result).ravel() if isinstance(result, tuple) else np.array(result)
+        error = np.abs(result - np.array(expected).ravel()).max()
+        print(f"{name:17s} per point {loop_ms:8.1f} ms   batch {batch_ms:6.1f} ms   "
+              f"{loop_ms / batch_ms:5.1f}x   max difference {error:.1e}")
+
+
+if __name__ == "__main__":
+    main()
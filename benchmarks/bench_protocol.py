@@ -0,0 +1,70 @@
+"""
+Telemetry link throughput in frames per second.
+
+1. decode: FrameDecoder over an in-memory buffer of back-to-back frames
+2. udp:    udp_simulator.py in a separate process, unthrottled, received by
+           UdpTelemetrySource on this process (the full link path)
+
+    python benchmarks/bench_protocol.py --frames 200000 --seconds 5 --drones 100
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from telemetry import TelemetrySample
+from telemetry_protocol import FrameDecoder, UdpTelemetrySource, encode_telemetry
+
+
+def bench_decode(frame_count):
+    sample = TelemetrySample(7, time.time(), 2, 0, 0, 28.6139, 77.2090, 85.5, 14.2, 64.0, 12)
+    buffer = bytearray()
+    for seq in range(frame_count):
+        buffer += encode_telemetry(sample, seq)
+
+    decoder = FrameDecoder()
+    started = time.perf_counter()
+    samples = decoder.decode(buffer)
+    elapsed = time.perf_counter() - started
+    assert len(samples) == frame_count and decoder.crc_errors == 0
+    print(f"decode: {frame_count:,} frames ({len(buffer) / 1e6:.1f} MB) in {elapsed * 1000:.0f} ms "
+          f"-> {frame_count / elapsed:,.0f} frames/s")
+
+
+def bench_udp(seconds, drone_count):
+    source = UdpTelemetrySource(port=0)
+    port = source.address[1]
+    simulator = subprocess.Popen([sys.executable, os.path.join(ROOT, "udp_simulator.py"), "--port", str(port),
+                                  "--drones", str(drone_count), "--rate", "0", "--seconds", str(seconds)],
+                                 cwd=ROOT)
+    received = 0
+    started = None
+    while simulator.poll() is None:
+        samples = source()
+        if samples:
+            if started is None:
+                started = time.perf_counter()
+            received += len(samples)
+    elapsed = time.perf_counter() - started if started else float("nan")
+    source.close()
+    print(f"udp:    received {received:,} frames in {elapsed:.1f} s -> {received / elapsed:,.0f} frames/s "
+          f"({source.datagrams:,} datagrams, {source.decoder.crc_errors} crc errors)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=200_000)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--drones", type=int, default=100)
+    args = parser.parse_args()
+
+    bench_decode(args.frames)
+    bench_udp(args.seconds, args.drones)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+DroneSimulator throughput: how many drones one core can step and emit.
+
+For each fleet size, runs `--steps` steps of 1 / rate seconds and reports the
+time per step for the physics alone and for physics plus TelemetrySample
+conversion (what TelemetryIngest pushes), and the sample rate the simulator
+could sustain.
+
+    python benchmarks/bench_simulator.py --drones 100 1000 5000 --rate 20
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from drone_simulator import DroneSimulator
+
+
+def bench(drone_count, rate_hz, steps):
+    simulator = DroneSimulator(drone_count, dt=1.0 / rate_hz)
+    started = time.perf_counter()
+    for _ in range(steps):
+        simulator.step(simulator.dt)
+    step_ms = (time.perf_counter() - started) / steps * 1000
+
+    started = time.perf_counter()
+    for _ in range(steps):
+        simulator()
+    call_ms = (time.perf_counter() - started) / steps * 1000
+
+    budget_ms = 1000 / rate_hz
+    print(f"{drone_count:>6} drones: step {step_ms:6.2f} ms, step + samples {call_ms:6.2f} ms "
+          f"({call_ms / budget_ms:5.1%} of a {budget_ms:.0f} ms tick) -> {drone_count * 1000 / call_ms:,.0f} samples/s max")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--drones", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--rate", type=float, default=20.0, help="telemetry rate per drone in Hz")
+    parser.add_argument("--steps", type=int, default=200)
+    args = parser.parse_args()
+    for drone_count in args.drones:
+        bench(drone_count, args.rate, args.steps)
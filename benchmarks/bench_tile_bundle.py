@@ -0,0 +1,110 @@
+"""
+TileBundleBuilder throughput and resume, against a local tile server.
+
+Starts a stand-in tile server on localhost (pre-rendered PNG tiles, each
+response delayed by --latency ms like a remote server, a 404 for every
+13th column) and builds a bundle of the area around New Delhi:
+
+1. sequential: one worker, as tkintermapview's OfflineLoader downloads
+2. parallel:   --workers workers
+3. resume:     a parallel build stopped after half the tiles, then run again
+
+    python benchmarks/bench_tile_bundle.py --zooms 10-14 --latency 30 --workers 16
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+from PIL import Image
+
+from mbtiles import MBTilesSource
+from tile_bundle import TileBundleBuilder, bbox_polygon, parse_zooms, plan_tiles
+
+AREA = (77.05, 28.50, 77.35, 28.75)  # west, south, east, north: about 800 km2 around New Delhi
+
+
+def tile_server(latency_s: float):
+    rng = np.random.default_rng(0)
+    images = []
+    for _ in range(16):
+        buffer = io.BytesIO()
+        Image.fromarray(rng.integers(0, 255, (8, 8, 3), dtype=np.uint8)).resize((256, 256)).save(buffer, "PNG")
+        images.append(buffer.getvalue())
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            z, x, y = (int(part) for part in self.path.strip("/").split(".")[0].split("/"))
+            time.sleep(latency_s)
+            if x % 13 == 0:
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = images[(x * 31 + y * 17 + z) % len(images)]
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/{{z}}/{{x}}/{{y}}.png"
+
+
+def build(path, url, workers, zooms, limit=None):
+    builder = TileBundleBuilder(path, url, workers, report_interval=60)
+    try:
+        return builder.build(bbox_polygon(*AREA), *zooms, limit=limit)
+    finally:
+        builder.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--zooms", default="10-14")
+    parser.add_argument("--latency", type=float, default=30.0, help="ms per tile request")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--sequential-limit", type=int, default=300, help="tiles for the (slow) sequential run")
+    args = parser.parse_args()
+
+    zooms = parse_zooms(args.zooms)
+    planned = sum(1 for _ in plan_tiles(bbox_polygon(*AREA), *zooms))
+    server, url = tile_server(args.latency / 1000)
+    print(f"{planned:,} tiles at zoom {zooms[0]}-{zooms[1]}, {args.latency:.0f} ms per request")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        stats = build(os.path.join(tmp, "sequential.mbtiles"), url, 1, zooms, limit=args.sequential_limit)
+        print(f"sequential: {stats.tiles_per_second:7.1f} tiles/s (first {args.sequential_limit} tiles)")
+
+        stats = build(os.path.join(tmp, "parallel.mbtiles"), url, args.workers, zooms)
+        print(f"parallel:   {stats.tiles_per_second:7.1f} tiles/s, {stats.fetched:,} fetched, "
+              f"{stats.missing:,} missing in {stats.seconds:.1f} s")
+
+        path = os.path.join(tmp, "resumed.mbtiles")
+        first = build(path, url, args.workers, zooms, limit=planned // 2)
+        second = build(path, url, args.workers, zooms)
+        third = build(path, url, args.workers, zooms)
+        print(f"resume:     first run {first.fetched + first.missing:,} tiles, second run skipped {second.skipped:,} "
+              f"and fetched {second.fetched + second.missing:,}, third run fetched {third.fetched + third.missing:,}")
+
+        source = MBTilesSource([path])
+        print(f"bundle:     zoom {source.min_zoom}-{source.max_zoom}, bounds {source.files[0].bounds}")
+        source.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Tile decoding on loader threads against TileDecoder's worker processes.
+
+Simulates zooming: every --zoom-interval seconds a burst of --burst encoded
+PNG tiles is handed to --threads loader threads, while the main thread runs
+a 60 Hz UI loop (a fixed chunk of Python work standing in for the telemetry
+render, plus the PhotoImage step for finished tiles within
+TILE_UPLOAD_BUDGET_MS). Reports decoded tiles per second and the main
+loop's worst and 99th percentile frame time:
+
+1. threads:   decode on the loader threads (TileDecoder with 0 processes)
+2. processes: decode in --processes worker processes through shared memory
+
+Without a display the PhotoImage step is replaced by copying the pixels out.
+
+    python benchmarks/bench_tile_decode.py --seconds 10 --processes 2
+"""
+import argparse
+import io
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+from PIL import Image
+
+from map_view import TILE_UPLOAD_BUDGET_MS
+from tile_decoder import TileDecoder
+
+FRAME_S = 1 / 60
+
+
+def make_tiles(count, tile_size, seed=0):
+    """ map-like PNG tiles: smooth colour areas with some noise, so they compress like real ones """
+    rng = np.random.default_rng(seed)
+    tiles = []
+    for _ in range(count):
+        base = rng.integers(0, 255, (8, 8, 3), dtype=np.uint8)
+        image = np.asarray(Image.fromarray(base).resize((tile_size, tile_size), Image.BILINEAR), dtype=np.int16)
+        image += rng.integers(-6, 7, image.shape, dtype=np.int16)
+        buffer = io.BytesIO()
+        Image.fromarray(np.clip(image, 0, 255).astype(np.uint8)).save(buffer, "PNG")
+        tiles.append(buffer.getvalue())
+    return tiles
+
+
+def ui_work(ms):
+    """ pure-Python work holding the GIL, like formatting and drawing telemetry """
+    end = time.perf_counter() + ms / 1000
+    total = 0
+    while time.perf_counter() < end:
+        total += sum(range(200))
+    return total
+
+
+def run(mode, tiles, args, make_photo):
+    decoder = TileDecoder(args.tile_size, args.processes if mode == "processes" else 0, slots=args.slots)
+    if decoder._pool is not None:  # start the workers outside the measurement
+        decoder.decode(tiles[0]).release()
+    tasks, results = [], []
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def loader():
+        while not stop.is_set():
+            with lock:
+                data = tasks.pop() if tasks else None
+            if data is None:
+                time.sleep(0.001)
+                continue
+            results.append(decoder.decode(data))
+
+    threads = [threading.Thread(target=loader, daemon=True) for _ in range(args.threads)]
+    for thread in threads:
+        thread.start()
+
+    frames, shown = [], 0
+    start = last = next_zoom = time.perf_counter()
+    while last - start < args.seconds:
+        now = time.perf_counter()
+        if now >= next_zoom:
+            with lock:
+                tasks[:] = [tiles[i % len(tiles)] for i in range(shown, shown + args.burst)]
+            next_zoom = now + args.zoom_interval
+        ui_work(args.ui_ms)
+        deadline = time.perf_counter() + TILE_UPLOAD_BUDGET_MS / 1000
+        while results and time.perf_counter() < deadline:
+            make_photo(results.pop(0))
+            shown += 1
+        elapsed = time.perf_counter() - now
+        if elapsed < FRAME_S:
+            time.sleep(FRAME_S - elapsed)
+        now = time.perf_counter()
+        frames.append(now - last)
+        last = now
+
+    stop.set()
+    for thread in threads:
+        thread.join()
+    results.clear()
+    decoder.close()
+    frames = np.array(frames[1:]) * 1000
+    print(f"{mode:10s} {shown / args.seconds:8.0f} tiles/s   frame p50 {np.percentile(frames, 50):5.1f} ms"
+          f"   p99 {np.percentile(frames, 99):6.1f} ms   worst {frames.max():6.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--tiles", type=int, default=64, help="distinct encoded tiles")
+    parser.add_argument("--tile-size", type=int, default=256)
+    parser.add_argument("--burst", type=int, default=48, help="tiles requested per zoom step")
+    parser.add_argument("--zoom-interval", type=float, default=0.5, help="seconds between zoom steps")
+    parser.add_argument("--threads", type=int, default=8, help="loader threads")
+    parser.add_argument("--processes", type=int, default=2)
+    parser.add_argument("--slots", type=int, default=64)
+    parser.add_argument("--ui-ms", type=float, default=4.0, help="main-thread work per frame")
+    args = parser.parse_args()
+
+    try:
+        import tkinter
+        root = tkinter.Tk()
+        root.withdraw()
+        make_photo = lambda tile: tile.photo_image()
+        print("PhotoImage creation on the main thread")
+    except Exception:
+        make_photo = lambda tile: tile.image()
+        print("no display: pixels copied out instead of creating PhotoImages")
+
+    tiles = make_tiles(args.tiles, args.tile_size)
+    print(f"{len(tiles)} tiles, {sum(map(len, tiles)) / len(tiles) / 1024:.0f} KB each on average, "
+          f"{os.cpu_count()} CPUs")
+    for mode in ("threads", "processes"):
+        run(mode, tiles, args, make_photo)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+LiveTrail append cost against rebuilding the track with set_path.
+
+--drones drones report at --rate Hz; every UI frame (--fps) appends the
+positions that arrived since the last one to each drone's trail. Measured
+per frame:
+
+1. LiveTrail:  append (canvas.insert, plus canvas.dchars once full)
+2. set_path:   what the map offered before, deleting and recreating each
+               drone's CanvasPath with its last --points positions
+
+Without a display the canvas is a stand-in that applies insert/dchars/move
+to plain coordinate lists; it also checks that the trails end up exactly
+where a full re-projection puts them.
+
+    python benchmarks/bench_trails.py --drones 100 --rate 20 --points 600
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import tkintermapview
+from tkintermapview.canvas_path import CanvasPath
+
+from map_paths import LiveTrail
+
+CENTER = (28.6139, 77.2090)
+WIDTH, HEIGHT = 1000, 700
+
+
+class ListCanvas:
+    """ line items as coordinate lists; enough of the canvas API for trails and paths """
+
+    def __init__(self):
+        self.lines = {}
+        self.calls = 0
+
+    def create_line(self, coords, **kwargs):
+        self.calls += 1
+        item = len(self.lines) + 1
+        self.lines[item] = [float(c) for c in coords]
+        return item
+
+    def coords(self, item, coords):
+        self.calls += 1
+        self.lines[item] = [float(c) for c in coords]
+
+    def insert(self, item, index, coords):
+        self.calls += 1
+        self.lines[item].extend(coords)
+
+    def dchars(self, item, first, last):
+        self.calls += 1
+        del self.lines[item][first & ~1:(last | 1) + 1]
+
+    def move(self, item, dx, dy):
+        self.calls += 1
+        line = self.lines[item]
+        line[0::2] = [c + dx for c in line[0::2]]
+        line[1::2] = [c + dy for c in line[1::2]]
+
+    def delete(self, item):
+        self.calls += 1
+        self.lines.pop(item, None)
+
+    def lift(self, *args):
+        pass
+
+    tag_bind = lift
+
+
+class View:
+    def __init__(self, canvas, zoom):
+        self.canvas = canvas
+        self.width, self.height, self.tile_size = WIDTH, HEIGHT, 256
+        self.zoom = zoom
+        x, y = tkintermapview.decimal_to_osm(*CENTER, zoom)
+        half_w, half_h = WIDTH / 2 / self.tile_size, HEIGHT / 2 / self.tile_size
+        self.upper_left_tile_pos, self.lower_right_tile_pos = (x - half_w, y - half_h), (x + half_w, y + half_h)
+        self.layers, self.canvas_path_list = [], []
+
+    def pan(self, dx, dy):
+        (left, top), (right, bottom) = self.upper_left_tile_pos, self.lower_right_tile_pos
+        self.upper_left_tile_pos, self.lower_right_tile_pos = (left + dx, top + dy), (right + dx, bottom + dy)
+        for layer in self.layers:
+            layer.draw()
+
+    def add_layer(self, layer):
+        self.layers.append(layer)
+
+    def remove_layer(self, layer):
+        self.layers.remove(layer)
+
+    def manage_z_order(self):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--drones", type=int, default=100)
+    parser.add_argument("--rate", type=float, default=20.0, help="positions per drone per second")
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--points", type=int, default=600, help="trail length")
+    parser.add_argument("--seconds", type=float, default=60.0, help="simulated time")
+    args = parser.parse_args()
+
+    try:
+        import tkinter
+        root = tkinter.Tk()
+        canvas = tkinter.Canvas(root, width=WIDTH, height=HEIGHT)
+        canvas.pack()
+        print("drawing on a Tk canvas")
+    except Exception:
+        root, canvas = None, ListCanvas()
+        print("no display: canvas emulated with coordinate lists")
+
+    rng = np.random.default_rng(0)
+    view = View(canvas, 14)
+    trails = [LiveTrail(view, args.points) for _ in range(args.drones)]
+    positions = np.column_stack((CENTER[0] + rng.normal(0, 0.05, args.drones),
+                                 CENTER[1] + rng.normal(0, 0.05, args.drones)))
+    history = [[] for _ in range(args.drones)]
+    per_frame = args.rate / args.fps
+    frames = int(args.seconds * args.fps)
+
+    times, owed = [], 0.0
+    for frame in range(frames):
+        owed += per_frame
+        steps, owed = int(owed), owed - int(owed)
+        batch = []
+        for _ in range(steps):
+            positions += rng.normal(0, 2e-5, positions.shape)
+            batch.append(positions.tolist())
+        started = time.perf_counter()
+        for step in batch:
+            for trail, (lat, lon) in zip(trails, step):
+                trail.append(lat, lon)
+        times.append((time.perf_counter() - started) * 1000)
+        for step in batch:
+            for drone, point in enumerate(step):
+                history[drone].append(tuple(point))
+        if frame % 200 == 199:
+            view.pan(0.01, -0.02)
+    times = np.array(times)
+    print(f"LiveTrail: {args.drones} drones x {args.rate:.0f} Hz, {per_frame * args.drones:.0f} appends per frame: "
+          f"mean {times.mean():.3f} ms, p99 {np.percentile(times, 99):.3f} ms, worst {times.max():.3f} ms")
+
+    paths = [None] * args.drones
+    started = time.perf_counter()
+    for _ in range(10):
+        for drone in range(args.drones):
+            if paths[drone] is not None:
+                paths[drone].delete()
+            paths[drone] = CanvasPath(view, history[drone][-args.points:])
+            paths[drone].draw()
+    print(f"set_path:  {(time.perf_counter() - started) / 10 * 1000:.1f} ms per frame")
+
+    if root is None:
+        worst = 0.0
+        for trail in trails:
+            drawn = np.array(canvas.lines[trail._line]).reshape(-1, 2)
+            tile_scale = WIDTH / (view.lower_right_tile_pos[0] - view.upper_left_tile_pos[0])
+            expected = (trail.points() * (1 << view.zoom) - view.upper_left_tile_pos) * tile_scale
+            worst = max(worst, float(np.abs(drawn - expected).max()))
+        print(f"trails match a full re-projection within {worst:.2e} px")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import tkinter
+from typing import Dict, Optional, Tuple
+
+from ttkbootstrap.style import Bootstyle
+
+# --- Style cache ---
+
+class StyleCache:
+    """
+    Maps (widget class, bootstyle) to the resolved ttk style name.
+
+    ttkbootstrap parses the bootstyle keywords and checks (or builds) the ttk
+    style on every `config(bootstyle=...)` call. The result only depends on
+    the widget class and the keyword string, so it is resolved once here and
+    later transitions are applied as a plain ttk `style=` option.
+    """
+
+    def __init__(self):
+        self._styles: Dict[Tuple[str, str], str] = {}
+
+    def resolve(self, widget, bootstyle: str) -> str:
+        key = (widget.winfo_class(), bootstyle)
+        ttkstyle = self._styles.get(key)
+        if ttkstyle is None:
+            ttkstyle = Bootstyle.update_ttk_widget_style(widget, bootstyle)
+            self._styles[key] = ttkstyle
+        return ttkstyle
+
+    def clear(self):
+        """ forget resolved styles, call after switching the theme """
+        self._styles.clear()
+
+
+style_cache = StyleCache()
+
+
+# --- Widget bindings ---
+
+class LabelBinding:
+    """ Remembers what a label currently shows and only calls Tk when it changes. """
+
+    __slots__ = ("widget", "text", "bootstyle", "style_cache")
+
+    def __init__(self, widget, style_cache: StyleCache = style_cache):
+        self.widget = widget
+        self.text: Optional[str] = None
+        self.bootstyle: Optional[str] = None
+        self.style_cache = style_cache
+
+    def update(self, text: str, bootstyle: str = None) -> bool:
+        """ returns True if the widget had to be reconfigured """
+        options = {}
+        if text != self.text:
+            options["text"] = text
+        if bootstyle is not None and bootstyle != self.bootstyle:
+            options["style"] = self.style_cache.resolve(self.widget, bootstyle)
+        if not options:
+            return False
+
+        # bypass ttkbootstrap's configure wrapper, the style is already resolved
+        tkinter.Misc.configure(self.widget, **options)
+        self.text = text
+        if bootstyle is not None:
+            self.bootstyle = bootstyle
+        return True
+
+    def invalidate(self):
+        """ force the next update to reach Tk, e.g. after the widget was reconfigured elsewhere """
+        self.text = None
+        self.bootstyle = None
+
+
+class ViewModel:
+    """
+    A named group of LabelBindings, e.g. the telemetry panel.
+
+    `render` takes {field: text} or {field: (text, bootstyle)} and returns the
+    number of widgets that actually had to be reconfigured.
+    """
+
+    def __init__(self, **widgets):
+        self.bindings: Dict[str, LabelBinding] = {name: LabelBinding(widget) for name, widget in widgets.items()}
+        self.tk_updates = 0
+
+    def __getitem__(self, name: str) -> LabelBinding:
+        return self.bindings[name]
+
+    def render(self, values: dict) -> int:
+        changed = 0
+        for name, value in values.items():
+            if isinstance(value, tuple):
+                changed += self.bindings[name].update(*value)
+            else:
+                changed += self.bindings[name].update(value)
+        self.tk_updates += changed
+        return changed
+
+    def invalidate(self):
+        for binding in self.bindings.values():
+            binding.invalidate()
@@ -0,0 +1,132 @@
+"""
+Dead reckoning for drone positions between telemetry updates.
+
+Telemetry arrives a few times a second at best (every few seconds over a
+weak link), so drawing the last reported position makes markers jump.
+DeadReckoning runs a constant-velocity alpha-beta filter (the steady-state
+form of a constant-velocity Kalman filter) per drone and answers "where is
+every drone now" for any moment, vectorized over the fleet.
+"""
+import time
+from typing import Hashable, List, Tuple
+
+import numpy as np
+
+
+class DeadReckoning:
+    """
+    Position and velocity estimates per drone, in degrees and degrees per
+    second, updated with `update` and read with `positions`.
+
+    Between updates a drone is extrapolated along its velocity, but at most
+    `max_extrapolation_s` past its last report, which bounds the error when
+    reports stop. A new report doesn't teleport the drone: the difference
+    between where it was shown and the corrected estimate is blended out
+    over `blend_s`.
+
+    Times are time.monotonic() at arrival unless given, so replayed
+    telemetry animates at the replay speed.
+    """
+
+    def __init__(self, alpha: float = 0.8, beta: float = 0.3, blend_s: float = 0.4,
+                 max_extrapolation_s: float = 3.0, capacity: int = 256):
+        self.alpha, self.beta = alpha, beta
+        self.blend_s = blend_s
+        self.max_extrapolation_s = max_extrapolation_s
+        self.count = 0
+        self.keys: List[Hashable] = []
+        self._row_of = {}
+        self.time = np.zeros(capacity)  # of the last report
+        self.position = np.zeros((capacity, 2))  # filtered (lat, lon) at self.time
+        self.velocity = np.zeros((capacity, 2))
+        self.offset = np.zeros((capacity, 2))  # shown minus filtered at self.time, decays over blend_s
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, key: Hashable):
+        return key in self._row_of
+
+    def update(self, keys, lats, lons, times=None):
+        """ applies a batch of reports; of several reports for one drone, the last one counts """
+        if len(keys) == 0:
+            return
+        keys = list(keys.tolist() if isinstance(keys, np.ndarray) else keys)
+        measured = np.column_stack((np.asarray(lats, dtype=np.float64), np.asarray(lons, dtype=np.float64)))
+        times = np.full(len(keys), time.monotonic()) if times is None else np.asarray(times, dtype=np.float64)
+        last = {key: i for i, key in enumerate(keys)}  # index of each drone's last report
+        if len(last) != len(keys):
+            index = np.fromiter(last.values(), dtype=np.int64, count=len(last))
+            keys, measured, times = list(last), measured[index], times[index]
+
+        rows = np.fromiter((self._row(key) for key in keys), dtype=np.int64, count=len(keys))
+        new = np.isnan(self.time[rows])
+        shown = self._shown(rows, times)
+
+        dt = times - self.time[rows]
+        predicted = self.position[rows] + self.velocity[rows] * np.clip(dt, 0.0, self.max_extrapolation_s)[:, None]
+        residual = measured - predicted
+        position = predicted + self.alpha * residual
+        with np.errstate(divide="ignore", invalid="ignore"):
+            velocity = np.where((dt > 0)[:, None], self.velocity[rows] + self.beta * residual / dt[:, None],
+                                self.velocity[rows])
+        # long gaps: the old velocity says nothing any more, start over from the report
+        stale = new | (dt > self.max_extrapolation_s * 2)
+        position[stale] = measured[stale]
+        velocity[stale] = 0.0
+
+        self.position[rows] = position
+        self.velocity[rows] = velocity
+        self.offset[rows] = np.where(new[:, None], 0.0, shown - position)
+        self.time[rows] = times
+
+    def positions(self, now: float = None) -> Tuple[np.ndarray, np.ndarray]:
+        """ (lat, lon) arrays of every drone (in self.keys order) at `now` """
+        now = time.monotonic() if now is None else now
+        return self._at(slice(0, self.count), now)
+
+    def remove(self, key: Hashable):
+        row = self._row_of.pop(key, None)
+        if row is None:
+            return
+        last = self.count - 1
+        if row != last:
+            moved_key = self.keys[last]
+            self.keys[row] = moved_key
+            self._row_of[moved_key] = row
+            for column in (self.time, self.position, self.velocity, self.offset):
+                column[row] = column[last]
+        self.keys.pop()
+        self.count = last
+
+    def clear(self):
+        self.count = 0
+        self.keys.clear()
+        self._row_of.clear()
+
+    def _at(self, rows, now) -> Tuple[np.ndarray, np.ndarray]:
+        shown = self._shown(rows, now)
+        return shown[:, 0], shown[:, 1]
+
+    def _shown(self, rows, now) -> np.ndarray:
+        elapsed = np.asarray(now, dtype=np.float64) - self.time[rows]
+        ahead = np.clip(np.nan_to_num(elapsed), 0.0, self.max_extrapolation_s)
+        fade = np.clip(1.0 - ahead / self.blend_s, 0.0, 1.0) if self.blend_s > 0 else np.zeros_like(ahead)
+        return self.position[rows] + self.velocity[rows] * ahead[:, None] + self.offset[rows] * fade[:, None]
+
+    def _row(self, key: Hashable) -> int:
+        row = self._row_of.get(key)
+        if row is not None:
+            return row
+        if self.count == len(self.time):
+            capacity = 2 * len(self.time)
+            self.time = np.resize(self.time, capacity)
+            self.position, self.velocity, self.offset = (np.resize(column, (capacity, 2)) for column in
+                                                         (self.position, self.velocity, self.offset))
+        row = self.count
+        self.keys.append(key)
+        self._row_of[key] = row
+        self.time[row] = np.nan
+        self.position[row] = self.velocity[row] = self.offset[row] = 0.0
+        self.count += 1
+        return row
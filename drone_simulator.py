@@ -0,0 +1,232 @@
+"""
+Deterministic fleet simulator for load testing the ground station.
+
+All drones are stepped together with NumPy: one `step()` advances the whole
+fleet, so a single core keeps up with thousands of drones. Given the same
+seed and the same sequence of step sizes every field but `timestamp` is
+bit-for-bit the same; timestamps come from the wall clock unless a
+`clock` is passed in (e.g. one returning `elapsed`).
+
+Each drone cycles through a delivery mission:
+
+    IDLE -> AWAITING ASSIGNMENT -> EN ROUTE -> DELIVERING -> RETURNING -> CHARGING -> AWAITING ASSIGNMENT ...
+
+flying between its depot and a random destination, draining its battery
+with speed and climb, aborting to the depot once what is left only covers
+the flight home plus the reserve (a drone that runs dry anyway lands where
+it is and stays there), and occasionally losing GPS (the last fix is reported until it is re-acquired).
+"""
+import math
+import time
+from typing import Callable, List
+
+import numpy as np
+
+from fleet_state import TELEMETRY_DTYPE
+from telemetry import DRONE_STATES, GPS_STATES, PAYLOAD_STATES, NO_ETA, TelemetrySample
+
+IDLE, AWAITING, EN_ROUTE, DELIVERING, RETURNING, CHARGING = (
+    DRONE_STATES.index(name) for name in ("IDLE", "AWAITING ASSIGNMENT", "EN ROUTE", "DELIVERING", "RETURNING", "CHARGING"))
+GPS_LOCKED, GPS_ACQUIRING, GPS_LOST = (GPS_STATES.index(name) for name in ("Locked", "Acquiring...", "Lost!"))
+PAYLOAD_SECURED, PAYLOAD_RELEASED = (PAYLOAD_STATES.index(name) for name in ("Secured", "Released"))
+
+METERS_PER_DEGREE = 111_320.0
+
+
+class DroneSimulator:
+    """
+    Simulates `drone_count` drones (ids 1..drone_count) around `home`.
+
+    Use `step(dt)` + `records()` / `samples()` directly, or pass the
+    simulator itself as a TelemetryIngest source: every call advances the
+    fleet by `dt * time_scale` simulated seconds and returns one sample per
+    drone, stamped by `clock` (the wall clock by default).
+    """
+
+    # --- flight model ---
+    CRUISE_SPEED = 15.0  # m/s
+    ACCELERATION = 3.0  # m/s^2
+    CRUISE_ALTITUDE = 80.0  # m
+    DROP_ALTITUDE = 15.0  # m, hover height while lowering the payload
+    CLIMB_RATE = 4.0  # m/s
+    ARRIVAL_RADIUS = 20.0  # m
+    DELIVERY_SECONDS = 30.0
+
+    # --- battery, percent ---
+    HOVER_DRAIN = 0.02  # per second in the air
+    SPEED_DRAIN = 0.002  # per second per m/s
+    CLIMB_DRAIN = 0.01  # per metre climbed
+    CHARGE_RATE = 0.5  # per second on the pad
+    RESERVE = 20.0  # kept for landing at the depot; an EN ROUTE drone returns with its payload before dipping into it
+    READY = 95.0  # charging stops here
+
+    # --- mission dispatch and GPS ---
+    ASSIGNMENTS_PER_MINUTE = 2.0  # per waiting drone
+    GPS_DROPOUTS_PER_HOUR = 6.0  # per drone
+    GPS_DROPOUT_SECONDS = 8.0  # mean
+    GPS_ACQUIRE_SECONDS = 4.0
+
+    def __init__(self, drone_count: int, seed: int = 0, home: tuple = (28.6139, 77.2090),
+                 radius_m: float = 10_000.0, depots: int = None, dt: float = 1.0, time_scale: float = 1.0,
+                 clock: Callable[[], float] = time.time):
+        if drone_count <= 0:
+            raise ValueError("DroneSimulator: drone_count must be positive")
+        self.count = drone_count
+        self.home = home
+        self.radius_m = radius_m
+        self.dt = dt
+        self.time_scale = time_scale
+        self.clock = clock
+        self.elapsed = 0.0  # simulated seconds
+        self._rng = np.random.default_rng(seed)
+        self._meters_per_lon_degree = METERS_PER_DEGREE * math.cos(math.radians(home[0]))
+
+        # positions are local east/north metres from `home`
+        depots = depots or max(1, drone_count // 50)
+        angles = self._rng.uniform(0.0, 2 * math.pi, depots)
+        distances = radius_m * 0.5 * np.sqrt(self._rng.uniform(0.0, 1.0, depots))
+        depots_xy = np.column_stack((distances * np.cos(angles), distances * np.sin(angles)))
+        depots_xy[0] = 0.0  # the first depot is `home`
+        self.depot = depots_xy[np.arange(drone_count) % depots]
+
+        n = drone_count
+        self.ids = np.arange(1, n + 1, dtype=np.uint32)
+        self.position = self.depot.copy()
+        self.target = self.depot.copy()
+        self.altitude = np.zeros(n)
+        self.speed = np.zeros(n)
+        self.battery = self._rng.uniform(self.RESERVE + 10.0, 100.0, n)
+        self.state = np.full(n, IDLE, dtype=np.uint8)
+        self.payload = np.full(n, PAYLOAD_SECURED, dtype=np.uint8)
+        self.gps = np.full(n, GPS_LOCKED, dtype=np.uint8)
+        self.fix = self.position.copy()  # last position reported with a GPS lock
+        self.timer = self._rng.uniform(0.0, 30.0, n)  # seconds left in IDLE / DELIVERING / a GPS outage
+        self.gps_timer = np.zeros(n)
+        self._records = np.zeros(n, dtype=TELEMETRY_DTYPE)
+        self._records["drone_id"] = self.ids
+
+    # --- stepping ---
+
+    def step(self, dt: float):
+        """ advances every drone by `dt` simulated seconds """
+        self.elapsed += dt
+        self._dispatch(dt)
+        self._fly(dt)
+        self._gps(dt)
+
+    def _dispatch(self, dt: float):
+        state = self.state
+        self.timer -= dt
+
+        ready = (state == IDLE) & (self.timer <= 0)
+        state[ready] = AWAITING
+
+        # waiting drones get a mission with a fixed probability per second
+        waiting = np.flatnonzero(state == AWAITING)
+        assigned = waiting[self._rng.random(len(waiting)) < self.ASSIGNMENTS_PER_MINUTE / 60 * dt]
+        if len(assigned):
+            angles = self._rng.uniform(0.0, 2 * math.pi, len(assigned))
+            distances = self.radius_m * np.sqrt(self._rng.uniform(0.05, 1.0, len(assigned)))
+            self.target[assigned] = np.column_stack((distances * np.cos(angles), distances * np.sin(angles)))
+            self.payload[assigned] = PAYLOAD_SECURED
+            state[assigned] = EN_ROUTE
+
+        home = np.hypot(*(self.depot - self.position).T)
+        abort = (state == EN_ROUTE) & (self.battery < self.RESERVE + self._return_drain(home))
+        self._return_home(abort)
+
+        delivered = (state == DELIVERING) & (self.timer <= 0)
+        self.payload[delivered] = PAYLOAD_RELEASED
+        self._return_home(delivered)
+
+        charging = state == CHARGING
+        self.battery[charging] = np.minimum(self.battery[charging] + self.CHARGE_RATE * dt, 100.0)
+        state[charging & (self.battery >= self.READY)] = AWAITING
+
+    def _return_drain(self, distance: np.ndarray) -> np.ndarray:
+        """ battery a drone at cruise altitude uses to fly `distance` metres at cruise speed and land """
+        cruise = (self.HOVER_DRAIN + self.SPEED_DRAIN * self.CRUISE_SPEED) * distance / self.CRUISE_SPEED
+        return cruise + self.HOVER_DRAIN * self.CRUISE_ALTITUDE / self.CLIMB_RATE
+
+    def _return_home(self, mask: np.ndarray):
+        self.target[mask] = self.depot[mask]
+        self.state[mask] = RETURNING
+
+    def _fly(self, dt: float):
+        state = self.state
+        flying = (state == EN_ROUTE) | (state == RETURNING)
+
+        offset = self.target - self.position
+        distance = np.hypot(offset[:, 0], offset[:, 1])
+
+        # vertical: cruise altitude while travelling, drop altitude while delivering, ground otherwise
+        # (a returning drone lands once it is over its depot)
+        target_altitude = np.where(flying, self.CRUISE_ALTITUDE, np.where(state == DELIVERING, self.DROP_ALTITUDE, 0.0))
+        target_altitude[(state == RETURNING) & (distance <= self.ARRIVAL_RADIUS)] = 0.0
+        empty = self.battery <= 0  # forced landing, wherever it is
+        target_altitude[empty] = 0.0
+        climb = np.clip(target_altitude - self.altitude, -self.CLIMB_RATE * dt, self.CLIMB_RATE * dt)
+        self.altitude += climb
+
+        # horizontal: accelerate towards cruise speed, brake for the last metres, only once airborne
+        cruising = flying & (self.altitude >= self.DROP_ALTITUDE)
+        braking_speed = np.sqrt(2 * self.ACCELERATION * distance)
+        wanted = np.where(cruising & ~empty, np.minimum(self.CRUISE_SPEED, braking_speed), 0.0)
+        self.speed = np.clip(wanted, self.speed - self.ACCELERATION * dt, self.speed + self.ACCELERATION * dt)
+        self.speed[~flying] = 0.0
+        travel = np.minimum(self.speed * dt, distance)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.position += np.where(distance[:, None] > 0, offset * (travel / distance)[:, None], 0.0)
+        distance -= travel
+
+        airborne = self.altitude > 0
+        self.battery[airborne] -= (self.HOVER_DRAIN + self.SPEED_DRAIN * self.speed[airborne]
+                                   ) * dt + self.CLIMB_DRAIN * np.maximum(climb[airborne], 0.0)
+        np.maximum(self.battery, 0.0, out=self.battery)
+
+        at_destination = (state == EN_ROUTE) & (distance <= self.ARRIVAL_RADIUS)
+        state[at_destination] = DELIVERING
+        self.timer[at_destination] = self.DELIVERY_SECONDS
+        landed = (state == RETURNING) & (distance <= self.ARRIVAL_RADIUS) & (self.altitude <= 0)
+        state[landed] = CHARGING
+
+    def _gps(self, dt: float):
+        gps = self.gps
+        self.gps_timer -= dt
+        dropout = (gps == GPS_LOCKED) & (self._rng.random(self.count) < self.GPS_DROPOUTS_PER_HOUR / 3600 * dt)
+        gps[dropout] = GPS_LOST
+        self.gps_timer[dropout] = self._rng.exponential(self.GPS_DROPOUT_SECONDS, int(dropout.sum()))
+
+        acquiring = (gps == GPS_LOST) & (self.gps_timer <= 0)
+        gps[acquiring] = GPS_ACQUIRING
+        self.gps_timer[acquiring] = self.GPS_ACQUIRE_SECONDS
+        gps[(gps == GPS_ACQUIRING) & (self.gps_timer <= 0)] = GPS_LOCKED
+
+        locked = gps == GPS_LOCKED
+        self.fix[locked] = self.position[locked]
+
+    # --- output ---
+
+    def records(self, timestamp: float = None) -> np.ndarray:
+        """ current state of every drone as TELEMETRY_DTYPE records (a reused buffer, copy to keep) """
+        records = self._records
+        records["timestamp"] = self.clock() if timestamp is None else timestamp
+        records["state"] = self.state
+        records["gps"] = self.gps
+        records["payload"] = self.payload
+        records["lat"] = self.home[0] + self.fix[:, 1] / METERS_PER_DEGREE
+        records["lon"] = self.home[1] + self.fix[:, 0] / self._meters_per_lon_degree
+        records["altitude"] = self.altitude
+        records["speed"] = self.speed
+        records["battery"] = self.battery
+        distance = np.hypot(*(self.target - self.position).T)
+        eta = np.ceil(distance / self.CRUISE_SPEED / 60)
+        records["eta"] = np.where(self.state == EN_ROUTE, eta, NO_ETA)
+        return records
+
+    def samples(self, timestamp: float = None) -> List[TelemetrySample]:
+        return list(map(TelemetrySample._make, self.records(timestamp).tolist()))
+
+    def __call__(self) -> List[TelemetrySample]:
+        self.step(self.dt * self.time_scale)
+        return self.samples()
@@ -0,0 +1,161 @@
+import numpy as np
+from typing import Iterable, Optional
+
+from telemetry import TelemetrySample
+
+# One telemetry record, field for field the same as TelemetrySample, so a list
+# of samples converts with np.array(samples, dtype=TELEMETRY_DTYPE).
+TELEMETRY_DTYPE = np.dtype([
+    ("drone_id", "<u4"),
+    ("timestamp", "<f8"),
+    ("state", "u1"),
+    ("gps", "u1"),
+    ("payload", "u1"),
+    ("lat", "<f8"),
+    ("lon", "<f8"),
+    ("altitude", "<f4"),
+    ("speed", "<f4"),
+    ("battery", "<f4"),
+    ("eta", "<i2"),
+])
+
+# columns kept per drone (drone_id and timestamp are stored as `ids` and `updated`)
+_COLUMNS = ("state", "gps", "payload", "lat", "lon", "altitude", "speed", "battery", "eta")
+
+
+class FleetState:
+    """
+    Latest known telemetry for every drone, stored column-wise in NumPy arrays.
+
+    Each drone owns one row; `ids[row]` is its drone id and `updated[row]` the
+    timestamp of the newest sample applied to it. Updates and queries work on
+    whole columns, so their cost barely depends on the fleet size.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self.count = 0
+        self.version = 0  # incremented whenever any row changes
+        self.ids = np.zeros(capacity, dtype=np.uint32)
+        self.updated = np.full(capacity, -np.inf)
+        for name in _COLUMNS:
+            setattr(self, name, np.zeros(capacity, dtype=TELEMETRY_DTYPE[name]))
+        self._row_of_id = np.full(1, -1, dtype=np.int64)  # drone id -> row, -1 if unknown
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, drone_id: int):
+        return 0 <= drone_id < len(self._row_of_id) and self._row_of_id[drone_id] >= 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self.ids)
+
+    def drone_ids(self) -> np.ndarray:
+        return self.ids[:self.count]
+
+    def row(self, drone_id: int) -> int:
+        """ returns the row of `drone_id` or -1 """
+        return int(self._row_of_id[drone_id]) if drone_id in self else -1
+
+    def clear(self):
+        """ forgets every drone but keeps the allocated columns """
+        self._row_of_id[self.ids[:self.count]] = -1
+        self.updated[:self.count] = -np.inf
+        self.count = 0
+        self.version += 1
+
+    # --- updates ---
+
+    def update_samples(self, samples: Iterable[TelemetrySample]) -> int:
+        records = np.array(list(samples), dtype=TELEMETRY_DTYPE)
+        return self.update_records(records)
+
+    def update_records(self, records: np.ndarray) -> int:
+        """
+        Applies a batch of TELEMETRY_DTYPE records. Samples older than what a
+        drone already has are ignored; if a drone appears several times in the
+        batch the newest sample wins. Returns the number of records applied.
+        """
+        if len(records) == 0:
+            return 0
+
+        records = records[np.argsort(records["timestamp"], kind="stable")]
+        rows = self._rows_for(records["drone_id"])
+
+        fresh = records["timestamp"] >= self.updated[rows]
+        if not fresh.all():
+            records, rows = records[fresh], rows[fresh]
+            if len(rows) == 0:
+                return 0
+
+        # with repeated rows, fancy-index assignment keeps the last (newest) value
+        self.updated[rows] = records["timestamp"]
+        for name in _COLUMNS:
+            getattr(self, name)[rows] = records[name]
+        self.version += 1
+        return len(rows)
+
+    def _rows_for(self, drone_ids: np.ndarray) -> np.ndarray:
+        """ maps drone ids to rows, allocating rows for drones seen the first time """
+        drone_ids = drone_ids.astype(np.int64)
+        max_id = int(drone_ids.max())
+        if max_id >= len(self._row_of_id):
+            grown = np.full(max(max_id + 1, 2 * len(self._row_of_id)), -1, dtype=np.int64)
+            grown[:len(self._row_of_id)] = self._row_of_id
+            self._row_of_id = grown
+
+        rows = self._row_of_id[drone_ids]
+        unknown = rows < 0
+        if unknown.any():
+            new_ids = np.unique(drone_ids[unknown])
+            self._reserve(self.count + len(new_ids))
+            new_rows = np.arange(self.count, self.count + len(new_ids))
+            self.ids[new_rows] = new_ids
+            self._row_of_id[new_ids] = new_rows
+            self.count += len(new_ids)
+            rows = self._row_of_id[drone_ids]
+        return rows
+
+    def _reserve(self, count: int):
+        if count <= self.capacity:
+            return
+        capacity = max(count, 2 * self.capacity)
+        for name in ("ids", "updated") + _COLUMNS:
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+        self.updated[self.count:] = -np.inf
+
+    # --- queries (all return drone ids) ---
+
+    def low_battery(self, threshold: float = 20.0) -> np.ndarray:
+        n = self.count
+        return self.ids[:n][self.battery[:n] < threshold]
+
+    def within(self, lat_min: float, lat_max: float, lon_min: float, lon_max: float) -> np.ndarray:
+        """ drones inside a lat/lon box, e.g. the visible map viewport """
+        n = self.count
+        lat, lon = self.lat[:n], self.lon[:n]
+        mask = (lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max)
+        return self.ids[:n][mask]
+
+    def in_state(self, state: int) -> np.ndarray:
+        n = self.count
+        return self.ids[:n][self.state[:n] == state]
+
+    def stale(self, max_age: float, now: float) -> np.ndarray:
+        """ drones that have not reported for more than `max_age` seconds """
+        n = self.count
+        return self.ids[:n][now - self.updated[:n] > max_age]
+
+    def sample(self, drone_id: int) -> Optional[TelemetrySample]:
+        """ latest telemetry of one drone as a TelemetrySample, or None if unknown """
+        row = self.row(drone_id)
+        if row < 0:
+            return None
+        return TelemetrySample(drone_id, float(self.updated[row]), int(self.state[row]), int(self.gps[row]),
+                               int(self.payload[row]), float(self.lat[row]), float(self.lon[row]),
+                               float(self.altitude[row]), float(self.speed[row]), float(self.battery[row]),
+                               int(self.eta[row]))
@@ -1,9 +1,81 @@
 import tkinter as tk
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
-import tkintermapview # For the map
 from datetime import datetime
+import os
+import sqlite3
 import time # For simulation purposes (e.g., updating time, drone status)
+from alert_store import AlertStore, SearchResults
+from airspace import Airspace, AirspaceError, AirspaceLayer
+from alerts import ALERT_LEVELS, AlertEngine, AlertLog, FilteredAlerts, VirtualAlertView
+from bindings import ViewModel
+from drone_simulator import DroneSimulator
+from fleet_state import FleetState
+from dead_reckoning import DeadReckoning
+from map_layers import ClusterLayer, FleetAnimator
+from map_paths import LiveTrail
+from map_view import DroneMapView
+from mbtiles import MBTilesError, MBTilesSource
+from projection import CanvasView
+from telemetry_protocol import UdpTelemetrySource
+from telemetry_recorder import TelemetryRecorder, list_flights
+from replay import TelemetryReplay
+from sparklines import Sparkline, TelemetryHistory
+from tk_monitor import CallbackProfiler, LagMonitor, LagHud
+from telemetry import (DRONE_STATES, GPS_STATES, PAYLOAD_STATES, NO_ETA,
+                       TelemetryRingBuffer, TelemetryIngest)
+
+# --- Telemetry pipeline settings ---
+RENDER_INTERVAL_MS = 33 # UI render tick, ~30 fps
+# Built-in fleet simulator; raise SIMULATED_DRONES to 1000+ to load test the UI and map
+SIMULATED_DRONES = 20
+SIMULATED_TELEMETRY_HZ = 5 # Samples per drone per second
+SIMULATOR_SEED = 0 # Same seed, same flights
+SIMULATOR_TIME_SCALE = 1.0 # Simulated seconds per wall-clock second
+# Set to e.g. ("127.0.0.1", 14550) to receive binary telemetry from a drone link
+# (or from udp_simulator.py) instead of the built-in simulator.
+TELEMETRY_UDP_ADDRESS = None
+# Every ingested sample is appended to recordings/<flight id>/ for post-flight analysis
+RECORD_TELEMETRY = True
+RECORDINGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recordings")
+REPLAY_SPEEDS = ("1x", "10x", "100x")
+LOW_BATTERY_PERCENT = 20.0
+HISTORY_SECONDS = 3600 # Sparkline history kept per drone
+HISTORY_RATE_HZ = 20 # Fastest expected telemetry rate; caps the per-drone history ring, which grows as samples arrive
+# Alerts: the newest ALERT_MEMORY_CAPACITY stay in memory, the full history of a session is spilled to ALERTS_DIR
+ALERTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alerts")
+ALERT_MEMORY_CAPACITY = 10000
+ALERT_DATABASE = os.path.join(ALERTS_DIR, "alerts.sqlite3") # Every alert of every session, searchable
+ALERT_COMMIT_INTERVAL = 1.0 # Seconds between batched database commits
+ALERT_SEARCH_LIMIT = 1000
+# Repeats of one alert (same source and type) get a new line at most every 1 / ALERT_RATE_PER_SECOND seconds
+# after an initial burst; in between they are counted on the newest line
+ALERT_RATE_PER_SECOND = 1 / 30
+ALERT_BURST = 3
+# Alert panel filters: label -> levels shown (None = all) and label -> seconds back from now (None = all)
+ALERT_LEVEL_FILTERS = {"All levels": None, "Danger": ("danger",), "Warning + danger": ("warning", "danger"),
+                       "Warning": ("warning",), "Success": ("success",), "Info": ("info",)}
+ALERT_TIME_FILTERS = {"Any time": None, "Last 15 min": 15 * 60, "Last hour": 60 * 60, "Last 24 h": 24 * 60 * 60}
+
+# --- Map ---
+MAP_TILE_CACHE_MB = 256 # Decoded tiles kept in memory, least recently used evicted first
+# Offline maps: every *.mbtiles file here is used instead of the online OSM server (overlapping
+# files are fine, the most detailed one wins). Past their highest zoom, tiles are scaled up.
+# Build or resume a bundle with tile_bundle.py.
+OFFLINE_TILES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "map_tiles")
+AIRSPACE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "airspace") # No-fly zones: GeoJSON/KML files loaded at startup
+MBTILES_CONNECTIONS = 8 # Read-only connections per file, shared by the map's tile loader threads
+TILE_DECODE_PROCESSES = 2 # Tiles are decoded in worker processes so zooming doesn't stall the UI; 0 decodes on the loader threads
+FLEET_CLUSTER_CELL_PX = 64 # Drones closer than this on screen are drawn as one badge with their count
+MARKER_ANIMATION_FPS = 60 # Drone markers are dead-reckoned between telemetry reports and moved this often
+TRAIL_POINTS = 600 # Positions kept per drone trail (2 min at 5 Hz); older ones age out
+ROUTE_PREFETCH_BUFFER_M = 500 # Tiles this close to an assigned route are loaded ahead of the drone
+
+# --- Diagnostics ---
+LAG_PROBE_INTERVAL_MS = 10 # Event-loop lag probe; lags over LAG_SPIKE_MS are logged with the running callback
+LAG_SPIKE_MS = 50
+SHOW_LAG_HUD = False # Lag overlay next to the clock, toggle with F9
+CALLBACK_BUDGET_MS = 16 # Tk callbacks slower than one 60 Hz frame are logged; F10 prints the per-callback table and map cache stats
 
 # --- Global references for dynamic updates (we'll expand these as needed) ---
 current_time_label = None
@@ -14,9 +86,45 @@ altitude_label = None
 speed_label = None
 payload_status_label = None
 eta_label = None
-alerts_listbox = None
+telemetry_view = None # ViewModel over the telemetry labels
+alerts_view = None # VirtualAlertView over alert_log
+alert_log = None
+alert_engine = None # Collapses and rate-limits alerts; applied to alert_log once per render tick
+alert_store = None # SQLite history written by a background thread
+alert_level_filter = None # Comboboxes above the alerts panel
+alert_time_filter = None
+alert_search_entry = None
 # Map view instance
 map_widget = None
+# Telemetry is ingested on a worker thread and rendered on the Tk thread
+telemetry_ring = TelemetryRingBuffer(capacity=65536) # Room for a frame's worth of 100x replay
+telemetry_ingest = None
+telemetry_recorder = None
+telemetry_cursor = 0 # ring position up to which samples were applied to fleet_state
+# Latest state of every drone in the fleet; the panels show the selected drone
+fleet_state = FleetState()
+selected_drone_id = 1
+last_rendered_version = -1
+battery_label = None
+telemetry_history = TelemetryHistory(HISTORY_SECONDS, HISTORY_RATE_HZ)
+sparklines = {} # field name -> Sparkline in the left panel
+fleet_summary_label = None
+drone_selector = None
+drone_marker = None # Map marker following the selected drone
+fleet_layer = None # Every drone on the map, clustered
+drone_tracker = DeadReckoning() # Estimated drone positions between telemetry reports
+fleet_animator = None # Moves fleet_layer and drone_marker along drone_tracker
+drone_trails = {} # drone id -> LiveTrail
+last_alert_state = {} # drone id -> (gps, low battery) as of the last telemetry alert check
+airspace = None # No-fly zones from AIRSPACE_DIR, None if there are none
+airspace_layer = None
+last_airspace_zone = {} # drone id -> index of the no-fly zone it was in at the last check, -1 for none
+# Flight replay (incident review / UI load testing); live ingest is paused while it runs
+telemetry_replay = None
+replay_window = None
+lag_monitor = None
+lag_hud = None
+callback_profiler = CallbackProfiler(budget_ms=CALLBACK_BUDGET_MS)
 
 # --- Functions for Main UI ---
 
@@ -26,43 +134,229 @@ def update_time():
     current_time_label.config(text=now.strftime("%d-%m-%Y | %I:%M:%S %p %Z"))
     current_time_label.after(1000, update_time) # Update every second
 
-def update_drone_telemetry():
-    """Simulates and updates drone telemetry data."""
-    # In a real app, this would get data from drone sensors/API
-    global drone_status_label, gps_status_label, altitude_label, speed_label, payload_status_label, eta_label
-
-    # Simulate states
-    import random
-    drone_states = ["IDLE", "AWAITING ASSIGNMENT", "EN ROUTE", "DELIVERING", "RETURNING", "CHARGING"]
-    gps_states = ["Locked", "Acquiring...", "Lost!"]
-    payload_states = ["Secured", "Released"]
-
-    current_drone_state = random.choice(drone_states)
-    current_gps_state = random.choice(gps_states)
-    current_payload_state = random.choice(payload_states)
-    current_altitude = round(random.uniform(0.0, 120.0), 1)
-    current_speed = round(random.uniform(0.0, 30.0), 1)
-    current_eta = random.randint(1, 60) if current_drone_state == "EN ROUTE" else "--"
-
-    drone_status_label.config(text=current_drone_state, bootstyle="info" if current_drone_state == "IDLE" else "primary")
-    gps_status_label.config(text=f"GPS: {current_gps_state}", bootstyle="success" if current_gps_state == "Locked" else "danger")
-    altitude_label.config(text=f"Altitude: {current_altitude:.1f} m")
-    speed_label.config(text=f"Speed: {current_speed:.1f} m/s")
-    payload_status_label.config(text=f"Payload: {current_payload_state}", bootstyle="success" if current_payload_state == "Secured" else "warning")
-    eta_label.config(text=f"Estimated ETA: {current_eta} min" if current_eta != "--" else "Estimated ETA: --",
-                     bootstyle="warning" if isinstance(current_eta, int) and current_eta <= 10 else "info")
-
-
-    # Schedule next update
-    drone_status_label.after(3000, update_drone_telemetry) # Update every 3 seconds
-
-def add_alert(message, level="info"):
-    """Adds a system alert to the alerts listbox."""
-    timestamp = datetime.now().strftime("[%H:%M:%S]")
-    alerts_listbox.insert(0, f"{timestamp} {message}") # Add to top
-    # You could add bootstyle for individual list items if supported,
-    # or just use the listbox's default styling.
-    # For now, just add the text.
+def start_telemetry_ingest():
+    """Starts the background thread that feeds telemetry_ring (and the recorder)."""
+    global telemetry_ingest, telemetry_recorder
+    if telemetry_ingest is None or not telemetry_ingest.is_alive():
+        listeners = []
+        if RECORD_TELEMETRY:
+            telemetry_recorder = TelemetryRecorder(RECORDINGS_DIR)
+            listeners.append(telemetry_recorder.append)
+
+        if TELEMETRY_UDP_ADDRESS is not None:
+            telemetry_ingest = TelemetryIngest(UdpTelemetrySource(*TELEMETRY_UDP_ADDRESS), telemetry_ring,
+                                               listeners=listeners)
+        else:
+            simulator = DroneSimulator(SIMULATED_DRONES, seed=SIMULATOR_SEED, dt=1 / SIMULATED_TELEMETRY_HZ,
+                                       time_scale=SIMULATOR_TIME_SCALE)
+            telemetry_ingest = TelemetryIngest(simulator, telemetry_ring,
+                                               rate_hz=SIMULATED_TELEMETRY_HZ, listeners=listeners)
+        telemetry_ingest.start()
+
+def stop_telemetry_ingest():
+    global telemetry_ingest, telemetry_recorder
+    if telemetry_ingest is not None:
+        telemetry_ingest.stop()
+        if isinstance(telemetry_ingest.source, UdpTelemetrySource):
+            telemetry_ingest.source.close()
+        telemetry_ingest = None
+    if telemetry_recorder is not None:
+        telemetry_recorder.close() # Flushes and fsyncs the last batch
+        telemetry_recorder = None
+
+def render_tick():
+    """Applies newly ingested telemetry to fleet_state once per UI frame and renders it."""
+    global telemetry_cursor, last_rendered_version
+    if not drone_status_label.winfo_exists():
+        return
+
+    samples, telemetry_cursor, dropped = telemetry_ring.read_since(telemetry_cursor)
+    if samples:
+        fleet_state.update_samples(samples)
+        telemetry_history.add_samples(samples)
+        update_trails(samples)
+        drone_tracker.update([s.drone_id for s in samples], [s.lat for s in samples], [s.lon for s in samples])
+
+    if fleet_state.version != last_rendered_version:
+        last_rendered_version = fleet_state.version
+        render_fleet()
+    draw_sparklines()
+    if alert_engine.flush():
+        alerts_view.refresh()
+
+    drone_status_label.after(RENDER_INTERVAL_MS, render_tick)
+
+def render_fleet():
+    """Refreshes the panels from fleet_state."""
+    global selected_drone_id
+    drone_ids = fleet_state.drone_ids()
+    if len(drone_ids) == 0:
+        return
+
+    if len(drone_ids) != len(drone_selector.cget("values")):
+        drone_selector.config(values=[f"Drone {drone_id}" for drone_id in drone_ids])
+    if selected_drone_id not in fleet_state:
+        selected_drone_id = int(drone_ids[0])
+    if drone_selector.get() != f"Drone {selected_drone_id}":
+        drone_selector.set(f"Drone {selected_drone_id}")
+
+    update_drone_telemetry(fleet_state.sample(selected_drone_id))
+    check_airspace(drone_ids)
+
+    summary = f"Fleet: {len(drone_ids)} drones | {len(fleet_state.low_battery(LOW_BATTERY_PERCENT))} low battery"
+    if map_widget:
+        bottom, left, top, right = CanvasView(map_widget).bounds()
+        summary += f" | {len(fleet_state.within(bottom, top, left, right))} in view"
+    telemetry_view["fleet"].update(summary)
+
+def draw_sparklines():
+    """Redraws the history charts of the selected drone (no-op if nothing new arrived)."""
+    if selected_drone_id in fleet_state:
+        history = telemetry_history[selected_drone_id]
+        for field, sparkline in sparklines.items():
+            sparkline.draw(history, field)
+
+def select_drone(event=None):
+    """Switches the telemetry panels to the drone picked in drone_selector."""
+    global selected_drone_id
+    selected_drone_id = int(drone_selector.get().split()[-1])
+    if selected_drone_id in fleet_state:
+        update_drone_telemetry(fleet_state.sample(selected_drone_id))
+
+def select_drone_on_map(drone_id, lat, lon):
+    """Selects a drone clicked on the map (a single dot of fleet_layer)."""
+    drone_selector.set(f"Drone {drone_id}")
+    select_drone()
+
+def reset_fleet_view():
+    """Forgets all fleet state, e.g. when switching between live and replayed telemetry."""
+    global telemetry_cursor, last_rendered_version
+    telemetry_cursor = telemetry_ring.write_seq # Skip whatever is still queued from the old source
+    fleet_state.clear()
+    telemetry_history.clear()
+    last_alert_state.clear()
+    last_airspace_zone.clear()
+    alert_engine.clear()
+    if fleet_layer is not None:
+        fleet_layer.clear()
+    drone_tracker.clear()
+    for trail in drone_trails.values():
+        trail.delete()
+    drone_trails.clear()
+    last_rendered_version = -1
+
+def update_trails(samples):
+    """Extends each drone's trail with its new positions."""
+    if not map_widget:
+        return
+    for sample in samples:
+        trail = drone_trails.get(sample.drone_id)
+        if trail is None:
+            trail = drone_trails[sample.drone_id] = LiveTrail(map_widget, TRAIL_POINTS)
+        trail.append(sample.lat, sample.lon)
+
+def update_drone_marker(sample):
+    """Points the map marker at the selected drone; fleet_animator moves it between reports."""
+    global drone_marker
+    if not map_widget:
+        return
+    if drone_marker is None or drone_marker.deleted:
+        drone_marker = map_widget.set_marker(sample.lat, sample.lon, text=f"Drone {sample.drone_id}")
+    elif drone_marker.text != f"Drone {sample.drone_id}":
+        drone_marker.set_text(f"Drone {sample.drone_id}")
+        drone_marker.set_position(sample.lat, sample.lon)
+    if fleet_animator is not None and fleet_animator.markers.get(sample.drone_id) is not drone_marker:
+        fleet_animator.markers.clear()
+        fleet_animator.follow(sample.drone_id, drone_marker)
+    map_widget.route_prefetcher.update_position(sample.lat, sample.lon) # Nearest tiles to the drone first
+
+def check_telemetry_alerts(sample):
+    """Raises alerts when the selected drone loses GPS or runs low on battery."""
+    gps_lost = GPS_STATES[sample.gps] == "Lost!"
+    low_battery = sample.battery < LOW_BATTERY_PERCENT
+    previous = last_alert_state.get(sample.drone_id)
+    last_alert_state[sample.drone_id] = (gps_lost, low_battery)
+    if previous is None:
+        return
+
+    source = f"drone {sample.drone_id}"
+    if gps_lost and not previous[0]:
+        add_alert(f"Drone {sample.drone_id}: GPS signal lost!", "danger", sample.timestamp, source, "gps_lost")
+    elif previous[0] and not gps_lost:
+        add_alert(f"Drone {sample.drone_id}: GPS signal regained.", "success", sample.timestamp, source, "gps_regained")
+    if low_battery and not previous[1]:
+        add_alert(f"Drone {sample.drone_id}: Battery low ({sample.battery:.0f}%).", "warning", sample.timestamp,
+                  source, "battery_low")
+
+def check_airspace(drone_ids):
+    """Raises an alert when a drone flies into or out of a no-fly zone; one index lookup for the whole fleet."""
+    if airspace is None or not len(drone_ids):
+        return
+    zones = airspace.zones_at(fleet_state.lat[:len(drone_ids)], fleet_state.lon[:len(drone_ids)])
+    for drone_id, zone in zip(drone_ids.tolist(), zones.tolist()):
+        previous = last_airspace_zone.get(drone_id, -1)
+        if zone == previous:
+            continue
+        last_airspace_zone[drone_id] = zone
+        source = f"drone {drone_id}"
+        if zone >= 0:
+            entered = airspace.zones[zone]
+            add_alert(f"Drone {drone_id}: entered no-fly zone {entered.name} ({entered.kind})!", "danger",
+                      source=source, kind="no_fly_zone")
+        else:
+            add_alert(f"Drone {drone_id}: left no-fly zone {airspace.zones[previous].name}.", "success",
+                      source=source, kind="no_fly_zone_left")
+
+def update_drone_telemetry(sample):
+    """Updates the telemetry labels from a TelemetrySample, touching only labels whose value changed."""
+    update_drone_marker(sample)
+    check_telemetry_alerts(sample)
+
+    current_drone_state = DRONE_STATES[sample.state]
+    current_gps_state = GPS_STATES[sample.gps]
+    current_payload_state = PAYLOAD_STATES[sample.payload]
+    current_eta = sample.eta
+
+    battery = sample.battery
+    telemetry_view.render({
+        "battery": (f"🔋 {battery:.0f}%", "success" if battery > 50 else "warning" if battery > 20 else "danger"),
+        "status": (current_drone_state, "info" if current_drone_state == "IDLE" else "primary"),
+        "gps": (f"GPS: {current_gps_state}", "success" if current_gps_state == "Locked" else "danger"),
+        "altitude": f"Altitude: {sample.altitude:.1f} m",
+        "speed": f"Speed: {sample.speed:.1f} m/s",
+        "payload": (f"Payload: {current_payload_state}", "success" if current_payload_state == "Secured" else "warning"),
+        "eta": (f"Estimated ETA: {current_eta} min" if current_eta != NO_ETA else "Estimated ETA: --",
+                "warning" if current_eta != NO_ETA and current_eta <= 10 else "info"),
+    })
+
+def add_alert(message, level="info", timestamp=None, source="system", kind=None):
+    """
+    Queues a system alert; it shows up in the alerts panel with the next render tick.
+    `timestamp` (epoch seconds) defaults to now. Alerts with the same `source` and `kind`
+    (default: the message itself) are collapsed and rate-limited together.
+    """
+    timestamp = time.time() if timestamp is None else timestamp
+    level = ALERT_LEVELS.index(level)
+    alert_engine.raise_alert(source, kind or message, message, level, timestamp)
+    alert_store.add(timestamp, level, source, kind or message, message)
+
+def apply_alert_filter(event=None):
+    """Shows only the alerts matching the level and time filters; selected through alert_log's index, not a scan."""
+    levels = ALERT_LEVEL_FILTERS[alert_level_filter.get()]
+    seconds = ALERT_TIME_FILTERS[alert_time_filter.get()]
+    if levels is None and seconds is None:
+        alerts_view.set_source(alert_log)
+    else:
+        alerts_view.set_source(FilteredAlerts(alert_log, levels=None if levels is None else map(ALERT_LEVELS.index, levels),
+                                              start_time=None if seconds is None else time.time() - seconds))
+
+def search_alerts(event=None):
+    """Full-text search over the stored alert history, e.g. "payload released drone:7"; empty shows the live log."""
+    query = alert_search_entry.get().strip()
+    if not query:
+        apply_alert_filter()
+        return
+    alerts_view.set_source(SearchResults(alert_store.search(query, limit=ALERT_SEARCH_LIMIT)))
 
 def launch_drone_action():
     print("Drone Launch Initiated!")
@@ -77,6 +371,12 @@ def launch_drone_action():
             (28.7041, 77.1025)  # Back to Delhi
         ]
         map_widget.set_path(path_points) # This adds a path line on the map
+        if selected_drone_id in fleet_state:
+            sample = fleet_state.sample(selected_drone_id)
+            drone_position = (sample.lat, sample.lon)
+        else:
+            drone_position = path_points[0]
+        map_widget.prefetch_route(path_points, drone_position) # Replaces the previous route's prefetch
         map_widget.set_marker(28.5355, 77.3910, text="Delivery Point")
         add_alert("Route set to Noida. Drone en route.", "info")
 
@@ -107,16 +407,148 @@ def maintenance_log_action():
     print("Accessing Maintenance Log...")
     add_alert("Accessing maintenance logs.", "info")
 
+# --- Flight Replay ---
+
+def start_replay(flight_dir, speed):
+    """Stops live telemetry and plays `flight_dir` into the telemetry ring instead."""
+    global telemetry_replay
+    stop_replay()
+    stop_telemetry_ingest()
+    telemetry_replay = TelemetryReplay(flight_dir, telemetry_ring, speed=speed)
+    reset_fleet_view()
+    telemetry_replay.start()
+    add_alert(f"Replaying flight {os.path.basename(flight_dir)} at {speed:g}x.", "info")
+
+def stop_replay():
+    global telemetry_replay
+    if telemetry_replay is not None:
+        telemetry_replay.stop()
+        telemetry_replay = None
+
+def close_replay_window():
+    """Ends the replay and goes back to live telemetry."""
+    global replay_window
+    stop_replay()
+    reset_fleet_view()
+    start_telemetry_ingest()
+    if replay_window is not None and replay_window.winfo_exists():
+        replay_window.destroy()
+    replay_window = None
+    add_alert("Replay closed. Back to live telemetry.", "info")
+
+def open_replay_window(parent_app):
+    """Opens the flight replay controls: flight, play/pause, speed and a seek bar."""
+    global replay_window
+    if replay_window is not None and replay_window.winfo_exists():
+        replay_window.lift()
+        return
+
+    flights = list_flights(RECORDINGS_DIR)
+    if not flights:
+        add_alert("No recorded flights to replay.", "warning")
+        return
+
+    replay_window = ttk.Toplevel(parent_app)
+    replay_window.title("Narad - Flight Replay")
+    replay_window.transient(parent_app)
+    replay_window.resizable(False, False)
+    replay_window.protocol("WM_DELETE_WINDOW", close_replay_window)
+    replay_window.grid_columnconfigure(1, weight=1)
+
+    ttk.Label(replay_window, text="Flight:", font=("Helvetica", 10)).grid(row=0, column=0, padx=10, pady=10, sticky="e")
+    flight_selector = ttk.Combobox(replay_window, state="readonly", bootstyle="info",
+                                   values=[os.path.basename(flight) for flight in flights])
+    flight_selector.grid(row=0, column=1, columnspan=2, padx=10, pady=10, sticky="ew")
+    flight_selector.set(os.path.basename(flights[-1]))
+
+    ttk.Label(replay_window, text="Speed:", font=("Helvetica", 10)).grid(row=1, column=0, padx=10, pady=5, sticky="e")
+    speed_selector = ttk.Combobox(replay_window, state="readonly", values=REPLAY_SPEEDS, width=6, bootstyle="info")
+    speed_selector.grid(row=1, column=1, padx=10, pady=5, sticky="w")
+    speed_selector.set(REPLAY_SPEEDS[0])
+
+    position = tk.DoubleVar(value=0.0)
+    seek_bar = ttk.Scale(replay_window, from_=0.0, to=1.0, variable=position, length=400, bootstyle="info")
+    seek_bar.grid(row=2, column=0, columnspan=3, padx=10, pady=5, sticky="ew")
+    time_label = ttk.Label(replay_window, text="--", font=("Helvetica", 10))
+    time_label.grid(row=3, column=0, columnspan=2, padx=10, pady=(0, 10), sticky="w")
+    play_button = ttk.Button(replay_window, text="Pause", bootstyle="primary-outline", width=8)
+    play_button.grid(row=3, column=2, padx=10, pady=(0, 10), sticky="e")
+
+    def current_speed():
+        return float(speed_selector.get().rstrip("x"))
+
+    def load_flight(event=None):
+        start_replay(os.path.join(RECORDINGS_DIR, flight_selector.get()), current_speed())
+        seek_bar.config(from_=telemetry_replay.index.start_time, to=telemetry_replay.index.end_time)
+        position.set(telemetry_replay.index.start_time)
+        play_button.config(text="Pause")
+
+    def change_speed(event=None):
+        telemetry_replay.set_speed(current_speed())
+
+    def toggle_pause():
+        if telemetry_replay.paused:
+            telemetry_replay.resume()
+            play_button.config(text="Pause")
+        else:
+            telemetry_replay.pause()
+            play_button.config(text="Play")
+
+    def seek(value):
+        # Only seek on user input; the progress update below sets the variable, which doesn't call this.
+        telemetry_replay.seek(float(value))
+        reset_fleet_view() # Samples from before the seek are stale now
+
+    def update_progress():
+        if not replay_window or not replay_window.winfo_exists() or telemetry_replay is None:
+            return
+        now = telemetry_replay.current_time()
+        position.set(now)
+        time_label.config(text=datetime.fromtimestamp(now).strftime("%d-%m-%Y %H:%M:%S")
+                          + (" (end)" if telemetry_replay.finished else ""))
+        replay_window.after(250, update_progress)
+
+    flight_selector.bind("<<ComboboxSelected>>", load_flight)
+    speed_selector.bind("<<ComboboxSelected>>", change_speed)
+    seek_bar.config(command=seek)
+    play_button.config(command=toggle_pause)
+
+    load_flight()
+    update_progress()
+
 def logout_action(parent_app, main_frame):
     """Destroys the current main UI and potentially returns to login screen."""
     if main_frame.winfo_exists():
         main_frame.destroy()
     print("Logged out. Application might return to login screen or exit.")
     # You could re-instantiate your login_screen.py's login frame here
+    stop_replay()
+    stop_telemetry_ingest()
+    if lag_monitor is not None:
+        lag_monitor.stop()
+    if fleet_animator is not None:
+        fleet_animator.stop()
+    if alert_log is not None:
+        alert_log.close()
+    if alert_store is not None:
+        alert_store.close()
+    dump_diagnostics()
+    callback_profiler.uninstall()
     # For now, let's just let it close if that's the only frame.
     # A cleaner approach would be to have a single "AppController" that swaps frames.
     parent_app.destroy() # For now, just close the application on logout.
 
+def dump_diagnostics(event=None):
+    """Prints the per-callback timing table and the map tile cache counters (F10)."""
+    callback_profiler.dump()
+    if map_widget is not None:
+        print("[map] tile cache:", ", ".join(f"{key} {value:,.2f}" if isinstance(value, float) else f"{key} {value:,}"
+                                            for key, value in map_widget.tile_image_cache.stats().items()))
+        job = map_widget.route_prefetcher.job
+        if job is not None:
+            print(f"[map] route prefetch: {job.loaded} loaded, {job.skipped} already cached, {job.total} tiles"
+                  + (", cancelled" if job.cancelled.is_set() else ""))
+
 # --- Main UI Build Function ---
 
 def build_main_ui(parent_app, staff_name):
@@ -125,9 +557,14 @@ def build_main_ui(parent_app, staff_name):
     """
     global current_time_label, logged_in_staff_name, drone_status_label, \
            gps_status_label, altitude_label, speed_label, payload_status_label, \
-           eta_label, alerts_listbox, map_widget
+           eta_label, telemetry_view, alerts_view, alert_log, alert_engine, alert_store, \
+           alert_level_filter, alert_time_filter, alert_search_entry, map_widget, battery_label, \
+           fleet_summary_label, drone_selector, lag_monitor, lag_hud, fleet_layer, \
+           fleet_animator, airspace, airspace_layer
 
     logged_in_staff_name = staff_name # Store the staff name globally
+    # Times every Tk callback dispatched from here on, including those of widgets created earlier
+    callback_profiler.install()
 
     main_frame = ttk.Frame(parent_app)
     main_frame.pack(fill="both", expand=True)
@@ -155,7 +592,19 @@ def build_main_ui(parent_app, staff_name):
     current_time_label.grid(row=0, column=2, sticky="e", padx=10)
     update_time() # Start updating time
 
-    ttk.Label(header_frame, text="🔋 85%", font=("Helvetica", 10), bootstyle="success").grid(row=0, column=3, padx=5, sticky="e")
+    # Event-loop lag monitor with an optional percentile overlay below the clock
+    lag_monitor = LagMonitor(parent_app, interval_ms=LAG_PROBE_INTERVAL_MS, spike_ms=LAG_SPIKE_MS)
+    lag_monitor.start()
+    lag_label = ttk.Label(header_frame, text="", font=("Helvetica", 8), bootstyle="light")
+    lag_label.grid(row=1, column=2, sticky="e", padx=10)
+    lag_hud = LagHud(lag_label, lag_monitor)
+    if SHOW_LAG_HUD:
+        lag_hud.toggle()
+    parent_app.bind("<F9>", lag_hud.toggle)
+    parent_app.bind("<F10>", dump_diagnostics)
+
+    battery_label = ttk.Label(header_frame, text="🔋 --%", font=("Helvetica", 10), bootstyle="success")
+    battery_label.grid(row=0, column=3, padx=5, sticky="e")
     ttk.Label(header_frame, text="📶 5G", font=("Helvetica", 10), bootstyle="success").grid(row=0, column=4, padx=5, sticky="e")
 
     ttk.Button(header_frame, text="Logout", command=lambda: logout_action(parent_app, main_frame), bootstyle="danger-outline").grid(row=0, column=5, padx=15, sticky="e")
@@ -167,6 +616,11 @@ def build_main_ui(parent_app, staff_name):
     left_panel.grid_columnconfigure(0, weight=1) # Center content within panel
 
     ttk.Label(left_panel, text="Current Mission Status", font=("Helvetica", 12, "bold"), bootstyle="info").pack(pady=(15, 5))
+    drone_selector = ttk.Combobox(left_panel, state="readonly", values=[], bootstyle="info")
+    drone_selector.pack(fill="x", padx=20, pady=5)
+    drone_selector.bind("<<ComboboxSelected>>", select_drone)
+    fleet_summary_label = ttk.Label(left_panel, text="Fleet: --", font=("Helvetica", 9))
+    fleet_summary_label.pack(pady=(0, 5))
     drone_status_label = ttk.Label(left_panel, text="IDLE", font=("Helvetica", 14), bootstyle="info")
     drone_status_label.pack(pady=5)
     ttk.Separator(left_panel).pack(fill="x", padx=10, pady=10)
@@ -182,14 +636,25 @@ def build_main_ui(parent_app, staff_name):
     payload_status_label.pack(anchor="w", padx=20)
     eta_label = ttk.Label(left_panel, text="Estimated ETA: --", font=("Helvetica", 10))
     eta_label.pack(anchor="w", padx=20, pady=(0, 10))
+
+    # Rolling history charts of the selected drone
+    chart_bg = parent_app.style.lookup("secondary.TFrame", "background") or "#2D323E"
+    chart_colors = parent_app.style.colors
+    for field, title, unit, color in (("altitude", "Altitude", "m", chart_colors.info),
+                                      ("speed", "Speed", "m/s", chart_colors.primary),
+                                      ("battery", "Battery", "%", chart_colors.success)):
+        sparklines[field] = Sparkline(left_panel, title, unit, color, chart_bg, window=HISTORY_SECONDS)
+        sparklines[field].pack(fill="x", padx=20, pady=2)
+    telemetry_view = ViewModel(status=drone_status_label, gps=gps_status_label, altitude=altitude_label,
+                               speed=speed_label, payload=payload_status_label, eta=eta_label,
+                               battery=battery_label, fleet=fleet_summary_label)
     ttk.Separator(left_panel).pack(fill="x", padx=10, pady=10)
 
     # Action Buttons
     ttk.Button(left_panel, text="New Delivery", command=new_delivery_action, bootstyle="primary").pack(fill="x", padx=20, pady=5)
     ttk.Button(left_panel, text="View Missions", command=view_missions_action, bootstyle="info-outline").pack(fill="x", padx=20, pady=5)
     ttk.Button(left_panel, text="Maintenance Log", command=maintenance_log_action, bootstyle="light-outline").pack(fill="x", padx=20, pady=5)
-
-    update_drone_telemetry() # Start updating drone telemetry
+    ttk.Button(left_panel, text="Flight Replay", command=lambda: open_replay_window(parent_app), bootstyle="light-outline").pack(fill="x", padx=20, pady=5)
 
 
     # --- Center Panel: Active Mission Details & Map ---
@@ -200,31 +665,36 @@ def build_main_ui(parent_app, staff_name):
 
     ttk.Label(center_panel, text="Active Delivery Details", font=("Helvetica", 12, "bold"), bootstyle="info").pack(pady=(15, 5))
 
-    # TkinterMapView setup
-    map_widget = tkintermapview.TkinterMapView(center_panel, width=700, height=500, corner_radius=0)
+    # TkinterMapView setup (DroneMapView: tkintermapview with an LRU, memory-budgeted tile cache)
+    map_widget = DroneMapView(center_panel, width=700, height=500, corner_radius=0,
+                              tile_cache_bytes=MAP_TILE_CACHE_MB * 1024 * 1024, route_buffer_m=ROUTE_PREFETCH_BUFFER_M,
+                              decode_processes=TILE_DECODE_PROCESSES)
     map_widget.pack(fill="both", expand=True, padx=10, pady=10)
 
-    # --- IMPORTANT: Configure for OFFLINE Tiles ---
-    # You need to pre-download map tiles and store them locally.
-    # Replace "path/to/your/local/tiles/{z}/{x}/{y}.png" with the actual path
-    # where your map tiles are stored.
-    # Example: If your tiles are in a folder named 'my_offline_maps'
-    # and organized like my_offline_maps/10/500/300.png, the path would be:
-    # "my_offline_maps/{z}/{x}/{y}.png"
-    #
-    # For a 500 sq. km radius, you'll need tools like Maperitive or SAS.Planet
-    # to download OSM tiles for your specific bounding box and zoom levels.
-    #
-    # If you want to test with online maps temporarily, uncomment the line below
-    # and comment out the set_tile_server line.
-    map_widget.set_tile_server("https://a.tile.openstreetmap.org/{z}/{x}/{y}.png") # Online OSM
-
-    # For offline use, point to your local tile directory:
-    # Make sure this path exists and contains your downloaded tiles.
-    # Example dummy path - YOU MUST CHANGE THIS TO YOUR ACTUAL TILE PATH
-    # The map will appear blank if tiles are not found at this path.
-    # offline_tile_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "map_tiles", "{z}", "{x}", "{y}.png")
-    # map_widget.set_tile_server(offline_tile_path)
+    # --- Offline tiles ---
+    # Put MBTiles files covering the operating area into map_tiles/ (e.g. exported with
+    # Maperitive, SAS.Planet or tilemaker); without them the online OSM server is used.
+    try:
+        offline_tiles = MBTilesSource.from_directory(OFFLINE_TILES_DIR, pool_size=MBTILES_CONNECTIONS)
+    except (MBTilesError, sqlite3.DatabaseError, OSError) as e:
+        print(f"[map] offline tiles not loaded: {e}")
+        offline_tiles = None
+    if offline_tiles is not None:
+        map_widget.set_tile_source(offline_tiles)
+        print(f"[map] offline tiles: {offline_tiles.name}, zoom {offline_tiles.min_zoom}-{offline_tiles.max_zoom}")
+    else:
+        map_widget.set_tile_server("https://a.tile.openstreetmap.org/{z}/{x}/{y}.png") # Online OSM
+
+    # --- No-fly zones ---
+    # Put GeoJSON or KML restriction files (airports, military areas, ...) into airspace/
+    try:
+        airspace = Airspace.from_directory(AIRSPACE_DIR)
+    except (AirspaceError, OSError) as e:
+        print(f"[map] airspace not loaded: {e}")
+        airspace = None
+    if airspace is not None:
+        airspace_layer = AirspaceLayer(map_widget, airspace)
+        print(f"[map] airspace: {len(airspace)} no-fly zones")
 
 
     # Set initial position for testing (e.g., a city in India)
@@ -234,6 +704,9 @@ def build_main_ui(parent_app, staff_name):
 
     # Add a marker for a hypothetical ground station
     map_widget.set_marker(28.6139, 77.2090, text="Base Station")
+    fleet_layer = ClusterLayer(map_widget, cell_px=FLEET_CLUSTER_CELL_PX, on_click=select_drone_on_map)
+    fleet_animator = FleetAnimator(map_widget, drone_tracker, fleet_layer, fps=MARKER_ANIMATION_FPS)
+    fleet_animator.start()
 
 
     # Delivery Information (placeholders)
@@ -279,17 +752,38 @@ def build_main_ui(parent_app, staff_name):
     if not listbox_bg_color:
         listbox_bg_color = "#2D323E" # A default dark gray color
 
-    alerts_listbox = tk.Listbox(right_panel, height=10, borderwidth=0, highlightthickness=0,
-                                bg=listbox_bg_color, # Use the looked-up color here
-                                fg='white', # Keep foreground white for contrast on dark background
-                                font=("Helvetica", 9), selectbackground=parent_app.style.colors.primary,
-                                selectforeground='white')
-    alerts_listbox.pack(fill="both", expand=True, padx=10, pady=5)
-    # Add a scrollbar to the listbox
-    scrollbar = ttk.Scrollbar(right_panel, command=alerts_listbox.yview, bootstyle="round")
-    scrollbar.pack(side="right", fill="y")
-    alerts_listbox.config(yscrollcommand=scrollbar.set)
+    alert_filter_frame = ttk.Frame(right_panel)
+    alert_filter_frame.pack(fill="x", padx=10)
+    alert_level_filter = ttk.Combobox(alert_filter_frame, values=list(ALERT_LEVEL_FILTERS), state="readonly", width=14)
+    alert_level_filter.set("All levels")
+    alert_level_filter.pack(side="left", fill="x", expand=True)
+    alert_time_filter = ttk.Combobox(alert_filter_frame, values=list(ALERT_TIME_FILTERS), state="readonly", width=10)
+    alert_time_filter.set("Any time")
+    alert_time_filter.pack(side="left", fill="x", expand=True, padx=(5, 0))
+    alert_level_filter.bind("<<ComboboxSelected>>", apply_alert_filter)
+    alert_time_filter.bind("<<ComboboxSelected>>", apply_alert_filter)
+    alert_search_entry = ttk.Entry(right_panel)
+    alert_search_entry.pack(fill="x", padx=10, pady=(5, 0))
+    alert_search_entry.bind("<Return>", search_alerts) # e.g. "payload released drone:7"
+
+    # Only the visible rows exist in the listbox; older alerts are read back from the spill file when scrolled to
+    alert_log = AlertLog(ALERTS_DIR, capacity=ALERT_MEMORY_CAPACITY)
+    alert_engine = AlertEngine(alert_log, rate=ALERT_RATE_PER_SECOND, burst=ALERT_BURST)
+    alert_store = AlertStore(ALERT_DATABASE, session=alert_log.session_id, commit_interval=ALERT_COMMIT_INTERVAL)
+    colors = parent_app.style.colors
+    alerts_view = VirtualAlertView(right_panel, alert_log, scrollbar_options={"bootstyle": "round"}, height=10,
+                                   level_colors={"info": colors.info, "success": colors.success,
+                                                 "warning": colors.warning, "danger": colors.danger},
+                                   bg=listbox_bg_color, # Use the looked-up color here
+                                   fg='white', # Keep foreground white for contrast on dark background
+                                   font=("Helvetica", 9), selectbackground=parent_app.style.colors.primary,
+                                   selectforeground='white')
+    alerts_view.pack(fill="both", expand=True, padx=10, pady=5)
 
     # Initial alert for testing
     add_alert("System initialized. Awaiting commands.", "info")
-    add_alert("Check drone pre-flight diagnostics.", "warning")
\ No newline at end of file
+    add_alert("Check drone pre-flight diagnostics.", "warning")
+
+    # Start telemetry once every panel it renders into exists
+    start_telemetry_ingest() # Start the telemetry worker thread
+    render_tick() # Start rendering the latest telemetry once per frame
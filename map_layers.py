@@ -0,0 +1,334 @@
+"""
+Map layers drawn by DroneMapView on top of the tiles.
+
+A layer is any object with a `draw()` method; DroneMapView.add_layer
+registers it and the map calls `draw()` whenever the view moves or zooms.
+Layers own their canvas items, tag them "layer" (DroneMapView keeps that
+tag between paths and markers) and redraw as little as they can.
+"""
+import math
+import time
+from typing import Callable, Hashable, List, Optional
+
+import numpy as np
+
+from projection import CanvasView, decimal_to_world, world_to_decimal
+
+LAYER_TAG = "layer"
+
+
+class ClusterLayer:
+    """
+    Point markers clustered on a screen grid: the markers within one
+    `cell_px` x `cell_px` cell of the current zoom level are drawn as one
+    badge with their count, a lone marker as a dot.
+
+    Positions live in NumPy columns (world coordinates, i.e. tile
+    coordinates at zoom 0). Moving markers only re-grids those markers, and
+    only clusters in and around the viewport are drawn, from a pool of canvas
+    items that are moved and relabelled instead of recreated. Panning within
+    the area drawn last is a single canvas.move. `on_click(key, lat, lon)` is
+    called for a single marker; clicking a cluster zooms in on it.
+    """
+
+    def __init__(self, map_widget, cell_px: int = 64, color: str = "#3b8ed0", outline: str = "#ffffff",
+                 text_color: str = "#ffffff", font=("Helvetica", 9, "bold"), dot_radius: int = 5,
+                 on_click: Callable[[Hashable, float, float], None] = None, capacity: int = 1024):
+        self.map_widget = map_widget
+        self.canvas = map_widget.canvas
+        self.cell_px = cell_px
+        self.color, self.outline, self.text_color, self.font = color, outline, text_color, font
+        self.dot_radius = dot_radius
+        self.on_click = on_click
+        self.tag = f"cluster-{id(self)}"
+        self.version = 0  # incremented whenever a marker is added, moved or removed
+
+        self.count = 0
+        self.keys: List[Hashable] = []
+        self._row_of = {}
+        self._world = np.zeros((capacity, 2))
+        self._last_keys, self._last_rows = None, None  # set_many fast path for the same keys every time
+
+        self._grid_zoom = None
+        self._cells = np.zeros(capacity, dtype=np.int64)
+        self._stale = np.ones(capacity, dtype=bool)  # cell not computed for the current grid zoom
+
+        self._items: List[tuple] = []  # (circle, text) canvas items, reused
+        self._drawn: List[Optional[tuple]] = []  # per item: (x, y, count) as drawn, None if hidden
+        self._clusters = None  # (rows per item, counts) of the last full draw
+        self._view = None  # (zoom, version, width, height, view span, drawn area) of the last full draw
+        self._origin = None  # upper left tile position the items are currently drawn for
+        self._drawn_origin = None  # ... and the one self._drawn was recorded for
+        self._refresh_pending = False
+
+        self.canvas.tag_bind(self.tag, "<Button-1>", self._click)
+        map_widget.add_layer(self)
+
+    def __len__(self):
+        return self.count
+
+    # --- markers ---
+
+    def set(self, key: Hashable, lat: float, lon: float):
+        self.set_many([key], [lat], [lon])
+
+    def set_many(self, keys, lats, lons):
+        """ adds or moves the markers `keys` (any hashable, e.g. drone ids) """
+        rows = self._rows(keys)
+        x, y = decimal_to_world(lats, lons)
+        moved = (self._world[rows, 0] != x) | (self._world[rows, 1] != y)
+        if not moved.any():
+            return
+        self._world[rows, 0] = x
+        self._world[rows, 1] = y
+        self._stale[rows[moved]] = True
+        self.version += 1
+        self.refresh()
+
+    def remove(self, key: Hashable):
+        row = self._row_of.pop(key, None)
+        if row is None:
+            return
+        last = self.count - 1
+        if row != last:  # move the last marker into the hole
+            moved_key = self.keys[last]
+            self.keys[row] = moved_key
+            self._row_of[moved_key] = row
+            self._world[row] = self._world[last]
+            self._cells[row] = self._cells[last]
+            self._stale[row] = self._stale[last]
+        self.keys.pop()
+        self.count = last
+        self._last_keys = None
+        self.version += 1
+        self.refresh()
+
+    def clear(self):
+        self.count = 0
+        self.keys.clear()
+        self._row_of.clear()
+        self._last_keys = None
+        self.version += 1
+        self.refresh()
+
+    def position(self, key: Hashable) -> tuple:
+        """ (lat, lon) of marker `key` """
+        lat, lon = world_to_decimal(*self._world[self._row_of[key]])
+        return float(lat), float(lon)
+
+    def _rows(self, keys) -> np.ndarray:
+        if self._last_keys is not None and len(keys) == len(self._last_keys) and \
+                np.array_equal(np.asarray(keys), self._last_keys):
+            return self._last_rows
+        rows = np.empty(len(keys), dtype=np.int64)
+        for i, key in enumerate(keys.tolist() if isinstance(keys, np.ndarray) else keys):
+            row = self._row_of.get(key)
+            if row is None:
+                row = self._append(key)
+            rows[i] = row
+        self._last_keys, self._last_rows = np.array(keys, copy=True), rows
+        return rows
+
+    def _append(self, key: Hashable) -> int:
+        if self.count == len(self._world):
+            capacity = len(self._world) * 2
+            self._world = np.resize(self._world, (capacity, 2))
+            self._cells = np.resize(self._cells, capacity)
+            self._stale = np.resize(self._stale, capacity)
+        row = self.count
+        self.keys.append(key)
+        self._row_of[key] = row
+        self._world[row] = np.nan  # compares unequal, so set_many sees the first position as a move
+        self._stale[row] = True
+        self.count += 1
+        return row
+
+    # --- drawing ---
+
+    def refresh(self):
+        """ schedules a draw at the next idle moment; many updates in one frame draw once """
+        if not self._refresh_pending:
+            self._refresh_pending = True
+            self.canvas.after_idle(self._refresh)
+
+    def _refresh(self):
+        self._refresh_pending = False
+        self.draw()
+
+    def draw(self):
+        """ Draws the clusters of the current view (called by the map on every move and zoom). """
+        widget = self.map_widget
+        zoom = round(widget.zoom)
+        (left, top), (right, bottom) = widget.upper_left_tile_pos, widget.lower_right_tile_pos
+        view = self._view
+        if view is not None and view[:5] == (zoom, self.version, widget.width, widget.height, round(right - left, 6)):
+            area_left, area_top, area_right, area_bottom = view[5]
+            if area_left <= left and right <= area_right and area_top <= top and bottom <= area_bottom:
+                scale = widget.width / (right - left)
+                self.canvas.move(self.tag, (self._origin[0] - left) * scale, (self._origin[1] - top) * scale)
+                self._origin = (left, top)
+                return
+        self._draw_clusters(zoom, left, top, right, bottom)
+
+    def _draw_clusters(self, zoom: int, left: float, top: float, right: float, bottom: float):
+        widget = self.map_widget
+        scale = widget.width / (right - left)  # canvas pixels per tile
+        self._update_cells(zoom)
+
+        # everything within half a view around the viewport, so most pans only move the items
+        pad_x, pad_y = (right - left) / 2, (bottom - top) / 2
+        area = (left - pad_x, top - pad_y, right + pad_x, bottom + pad_y)
+        n = self.count
+        tiles = self._world[:n] * (1 << zoom)
+        inside = np.flatnonzero((tiles[:, 0] >= area[0]) & (tiles[:, 0] < area[2]) &
+                                (tiles[:, 1] >= area[1]) & (tiles[:, 1] < area[3]))
+        if len(inside):
+            cells, first, inverse, counts = np.unique(self._cells[inside], return_index=True, return_inverse=True,
+                                                      return_counts=True)
+            xs = (np.bincount(inverse, weights=tiles[inside, 0]) / counts - left) * scale
+            ys = (np.bincount(inverse, weights=tiles[inside, 1]) / counts - top) * scale
+            rows = inside[first]  # one marker of each cluster, for clicks on single markers
+        else:
+            xs = ys = counts = rows = np.empty(0)
+
+        self._ensure_items(len(counts))
+        canvas = self.canvas
+        in_place = self._origin == self._drawn_origin  # not shifted by canvas.move since self._drawn was recorded
+        for i, (x, y, count) in enumerate(zip(xs.round(1).tolist(), ys.round(1).tolist(), counts.tolist())):
+            state = (x, y, count)
+            drawn = self._drawn[i]
+            if in_place and drawn == state:
+                continue
+            circle, text = self._items[i]
+            radius = self.dot_radius if count == 1 else 9 + 4 * math.log10(count)
+            canvas.coords(circle, x - radius, y - radius, x + radius, y + radius)
+            canvas.coords(text, x, y)
+            if drawn is None or drawn[2] != count:
+                canvas.itemconfigure(text, text="" if count == 1 else str(count), state="normal")
+                canvas.itemconfigure(circle, state="normal")
+            self._drawn[i] = state
+        for i in range(len(counts), len(self._items)):
+            if self._drawn[i] is not None:
+                canvas.itemconfigure(self._items[i][0], state="hidden")
+                canvas.itemconfigure(self._items[i][1], state="hidden")
+                self._drawn[i] = None
+
+        self._clusters = (rows, counts)
+        self._view = (zoom, self.version, widget.width, widget.height, round(right - left, 6), area)
+        self._origin = self._drawn_origin = (left, top)
+
+    def _update_cells(self, zoom: int):
+        n = self.count
+        if zoom != self._grid_zoom:
+            self._grid_zoom = zoom
+            self._stale[:n] = True
+        stale = np.flatnonzero(self._stale[:n])
+        if len(stale):
+            cell_size = self.cell_px / self.map_widget.tile_size  # in tiles
+            cells = np.floor(self._world[stale] * ((1 << zoom) / cell_size)).astype(np.int64)
+            self._cells[stale] = cells[:, 0] * (1 << 32) + cells[:, 1]
+            self._stale[stale] = False
+
+    def _ensure_items(self, count: int):
+        while len(self._items) < count:
+            tags = (LAYER_TAG, self.tag)
+            circle = self.canvas.create_oval(0, 0, 0, 0, fill=self.color, outline=self.outline, width=2, tags=tags)
+            text = self.canvas.create_text(0, 0, fill=self.text_color, font=self.font, tags=tags)
+            self._items.append((circle, text))
+            self._drawn.append(None)
+
+    def _click(self, event):
+        current = self.canvas.find_withtag("current")
+        if not current or self._clusters is None:
+            return
+        item = next(i for i, pair in enumerate(self._items) if current[0] in pair)
+        rows, counts = self._clusters
+        if item >= len(counts):
+            return
+        lat, lon = self.map_widget.convert_canvas_coords_to_decimal_coords(event.x, event.y)
+        if counts[item] > 1:
+            self.map_widget.set_position(lat, lon)
+            self.map_widget.set_zoom(min(round(self.map_widget.zoom) + 2, self.map_widget.max_zoom))
+        elif self.on_click is not None:
+            key = self.keys[rows[item]]
+            self.on_click(key, *self.position(key))
+
+
+class FleetAnimator:
+    """
+    Moves drone markers smoothly between telemetry reports: one shared
+    `after` tick at `fps` asks `tracker` (a DeadReckoning) where every
+    drone is now and moves the ones in view.
+
+    The fleet is drawn by `layer` (a ClusterLayer); single markers (e.g. the
+    selected drone's CanvasPositionMarker) can be attached with `follow`.
+    Only drones within the view and moved by at least `min_step_px` since
+    their last frame are touched, so the per-frame cost follows the moving,
+    visible drones rather than the fleet size.
+    """
+
+    def __init__(self, map_widget, tracker, layer: ClusterLayer = None, fps: float = 60.0, min_step_px: float = 0.5):
+        self.map_widget = map_widget
+        self.tracker = tracker
+        self.layer = layer
+        self.interval_ms = max(int(1000 / fps), 1)
+        self.min_step_px = min_step_px
+        self.markers = {}  # key -> CanvasPositionMarker
+        self.frames = 0
+        self.moved = 0  # markers moved in the last frame
+        self._shown = np.zeros((0, 2))  # canvas position per tracker row at the last frame
+        self._view = None
+        self._after_id = None
+
+    def follow(self, key: Hashable, marker):
+        self.markers[key] = marker
+
+    def unfollow(self, key: Hashable):
+        self.markers.pop(key, None)
+
+    def start(self):
+        if self._after_id is None:
+            self._after_id = self.map_widget.after(self.interval_ms, self._tick)
+
+    def stop(self):
+        if self._after_id is not None:
+            self.map_widget.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _tick(self):
+        started = time.perf_counter()
+        self.tick()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._after_id = self.map_widget.after(max(int(self.interval_ms - elapsed_ms), 1), self._tick)
+
+    def tick(self, now: float = None):
+        """ one animation frame """
+        self.frames += 1
+        tracker, widget = self.tracker, self.map_widget
+        n = tracker.count
+        if n == 0:
+            self.moved = 0
+            return
+        lats, lons = tracker.positions(now)
+        canvas_view = CanvasView(widget)
+        x, y = canvas_view.decimal_to_canvas(lats, lons)
+        canvas = np.column_stack((x, y))
+
+        view = (canvas_view.zoom, canvas_view.left, canvas_view.top, canvas_view.scale)
+        if view != self._view or len(self._shown) != n:  # the map moved: the map redrew the markers itself
+            self._view, self._shown = view, np.full((n, 2), np.nan)
+        visible = canvas_view.contains(x, y, margin=50)
+        step = np.abs(canvas - self._shown).max(axis=1)
+        moved = np.flatnonzero(visible & ~(step < self.min_step_px))  # NaN (never shown) counts as moved
+        self.moved = len(moved)
+        if not len(moved):
+            return
+        self._shown[moved] = canvas[moved]
+
+        keys = [tracker.keys[row] for row in moved.tolist()]
+        if self.layer is not None:
+            self.layer.set_many(keys, lats[moved], lons[moved])
+        for key, row in zip(keys, moved.tolist()):
+            marker = self.markers.get(key)
+            if marker is not None and not marker.deleted:
+                marker.set_position(float(lats[row]), float(lons[row]))
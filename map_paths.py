@@ -0,0 +1,393 @@
+"""
+Paths for long flight tracks.
+
+tkintermapview's CanvasPath projects every point on every pan and zoom. A
+SimplifiedPath stores its points in chunks, each with a Douglas-Peucker
+importance per point, so every zoom level draws only the points that
+matter at that scale, and only the chunks that overlap the viewport.
+
+LiveTrail is the cheap way to show where a drone has been: a bounded,
+appendable line that is extended in place instead of rebuilt.
+
+ProjectedPolygon is tkintermapview's CanvasPolygon with its vertices
+projected as one array instead of one decimal_to_osm call each.
+"""
+import math
+import tkinter
+from typing import List
+
+import numpy as np
+from tkintermapview.canvas_path import CanvasPath
+from tkintermapview.canvas_polygon import CanvasPolygon
+
+from projection import CanvasView, decimal_to_world
+
+SIMPLIFY_TOLERANCE_PX = 0.75  # points closer than this to the simplified line are left out
+CHUNK_POINTS = 256  # points per chunk; appending a point re-simplifies only the last chunk
+
+
+def douglas_peucker_importance(x: np.ndarray, y: np.ndarray, min_tolerance: float = 0.0,
+                               starts: np.ndarray = None) -> np.ndarray:
+    """
+    Per point, the largest Douglas-Peucker tolerance that still keeps it:
+    simplifying with tolerance t keeps exactly the points with importance
+    >= t. The end points are infinitely important; points that would only
+    appear below `min_tolerance` get 0.
+
+    `starts` splits x and y into independent lines (each from its start to
+    the point before the next one), simplified together in one pass. The
+    segments of one depth are split all at once, so the Python work follows
+    the depth of the recursion rather than the number of points kept.
+    """
+    n = len(x)
+    importance = np.zeros(n)
+    starts = np.zeros(1, dtype=np.int64) if starts is None else np.asarray(starts, dtype=np.int64)
+    stops = np.append(starts[1:], n) - 1
+    importance[starts] = importance[stops] = np.inf
+    first, last, parent = starts, stops, np.full(len(starts), np.inf)
+    while True:
+        wide = last - first >= 2
+        first, last, parent = first[wide], last[wide], parent[wide]
+        if not len(first):
+            break
+        inner = last - first - 1
+        offsets = np.cumsum(inner) - inner
+        segment = np.repeat(np.arange(len(first)), inner)
+        index = np.repeat(first + 1 - offsets, inner) + np.arange(len(segment))
+        dx, dy = (x[last] - x[first])[segment], (y[last] - y[first])[segment]
+        px, py = x[index] - x[first][segment], y[index] - y[first][segment]
+        length = np.hypot(dx, dy)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            distance = np.where(length > 0, np.abs(dx * py - dy * px) / length, np.hypot(px, py))
+        best = np.maximum.reduceat(distance, offsets)
+        hits = np.flatnonzero(distance == best[segment])
+        split = index[hits[np.unique(segment[hits], return_index=True)[1]]]  # the first farthest point, like argmax
+        split_off = best >= min_tolerance
+        # a point can't be more important than the one that split its segment off
+        value = np.minimum(best, parent)[split_off]
+        split, first, last = split[split_off], first[split_off], last[split_off]
+        importance[split] = value
+        first, last, parent = np.concatenate((first, split)), np.concatenate((split, last)), np.concatenate((value, value))
+    return importance
+
+
+class _Chunk:
+    __slots__ = ("start", "stop", "importance", "resolved_zoom", "bbox", "kept")
+
+    def __init__(self, start: int, stop: int):
+        self.start, self.stop = start, stop  # points start .. stop, both included; stop is the next chunk's start
+        self.importance = None
+        self.resolved_zoom = -1  # importance is exact down to this zoom level's tolerance
+        self.bbox = None
+        self.kept = {}  # zoom -> indices of the points drawn at that zoom
+
+
+class SimplifiedPath(CanvasPath):
+    """
+    CanvasPath with a Douglas-Peucker pyramid and viewport culling.
+
+    The points are split into chunks of CHUNK_POINTS. Per chunk, every
+    point's importance is computed when the chunk is first drawn, down to
+    the detail of the zoom level drawn (again when drawn at a deeper level,
+    and for the last chunk after points are appended); the indices kept at
+    a zoom level are cached per chunk. A draw tests the chunk bounding boxes against the viewport plus
+    half a view around it and projects only the kept points of those
+    chunks, joining consecutive chunks into one canvas line. Panning within
+    the drawn area is a canvas.move.
+    """
+
+    def __init__(self, map_widget, position_list: list, color: str = "#3E69CB", command=None, name: str = None,
+                 width: int = 9, data=None):
+        super().__init__(map_widget, [], color, command, name, width, data)
+        self.tag = f"path-{id(self)}"
+        self._lines: List[int] = []  # canvas line items, reused
+        self._shown = 0  # how many of them are in use
+        self._view = None  # (zoom, version, width, height, span, drawn area) of the last full draw
+        self._origin = None  # upper left tile position the lines are currently drawn for
+        self.version = 0
+        self._set_points(position_list)
+
+    # --- points ---
+
+    def _set_points(self, position_list: list):
+        self.position_list = list(position_list)
+        self._world = np.zeros((max(len(self.position_list), 64), 2))
+        self.count = 0
+        self._chunks: List[_Chunk] = []
+        self._bboxes = None  # chunk bounding boxes as one array, rebuilt after appends
+        if self.position_list:
+            lat, lon = np.asarray(self.position_list, dtype=np.float64).T
+            self._append_world(*decimal_to_world(lat, lon))
+
+    def _append_world(self, x: np.ndarray, y: np.ndarray):
+        n = self.count + len(x)
+        if n > len(self._world):
+            self._world = np.resize(self._world, (max(n, 2 * len(self._world)), 2))
+        self._world[self.count:n, 0] = x
+        self._world[self.count:n, 1] = y
+        self.count = n
+
+        if not self._chunks:
+            self._chunks.append(_Chunk(0, 0))
+        chunk = self._chunks[-1]
+        while True:
+            chunk.stop = min(chunk.start + CHUNK_POINTS, n - 1)
+            chunk.importance, chunk.kept = None, {}  # simplified when it is drawn
+            points = self._world[chunk.start:chunk.stop + 1]
+            chunk.bbox = (*points.min(axis=0), *points.max(axis=0))
+            if chunk.stop == n - 1:
+                break
+            chunk = _Chunk(chunk.stop, chunk.stop)
+            self._chunks.append(chunk)
+        self._bboxes = None
+        self.version += 1
+
+    def set_position_list(self, position_list: list):
+        self._set_points(position_list)
+        self.version += 1
+        self.draw()
+
+    def add_position(self, deg_x, deg_y, index=-1):
+        """ appends a point (cheap) or inserts one at `index` (re-simplifies everything); draws on the next pan/zoom """
+        if index != -1:
+            self.position_list.insert(index, (deg_x, deg_y))
+            self._set_points(self.position_list)
+            self.version += 1
+            return
+        self.position_list.append((deg_x, deg_y))
+        x, y = decimal_to_world(deg_x, deg_y)
+        self._append_world(np.atleast_1d(x), np.atleast_1d(y))
+
+    def remove_position(self, deg_x, deg_y):
+        self.position_list.remove((deg_x, deg_y))
+        self.set_position_list(self.position_list)
+
+    # --- drawing ---
+
+    def _kept(self, chunk: _Chunk, zoom: int) -> np.ndarray:
+        tile_size = self.map_widget.tile_size
+        if chunk.importance is None or zoom > chunk.resolved_zoom:
+            # simplified only as finely as needed so far (and two levels deeper), a track seen whole
+            # at a low zoom level never pays for the detail of the highest ones
+            points = self._world[chunk.start:chunk.stop + 1]
+            chunk.resolved_zoom = min(zoom + 2, self.map_widget.max_zoom)
+            finest = SIMPLIFY_TOLERANCE_PX / (tile_size * 2.0 ** chunk.resolved_zoom)
+            chunk.importance = douglas_peucker_importance(points[:, 0], points[:, 1], finest)
+            chunk.kept = {}
+        kept = chunk.kept.get(zoom)
+        if kept is None:
+            tolerance = SIMPLIFY_TOLERANCE_PX / (tile_size * 2.0 ** zoom)  # in world units
+            kept = chunk.kept[zoom] = chunk.start + np.flatnonzero(chunk.importance >= tolerance)
+        return kept
+
+    def draw(self, move=False):
+        widget = self.map_widget
+        if self.deleted or self.count < 2:
+            self._hide_lines(0)
+            return
+        zoom = round(widget.zoom)
+        (left, top), (right, bottom) = widget.upper_left_tile_pos, widget.lower_right_tile_pos
+        span = round(right - left, 6)
+        view = self._view
+        if move and view is not None and view[:5] == (zoom, self.version, widget.width, widget.height, span):
+            area_left, area_top, area_right, area_bottom = view[5]
+            if area_left <= left and right <= area_right and area_top <= top and bottom <= area_bottom:
+                scale = widget.width / (right - left)
+                widget.canvas.move(self.tag, (self._origin[0] - left) * scale, (self._origin[1] - top) * scale)
+                self._origin = (left, top)
+                return
+
+        canvas_view = CanvasView(widget)
+        n = 1 << zoom
+        pad_x, pad_y = (right - left) / 2, (bottom - top) / 2
+        area = (left - pad_x, top - pad_y, right + pad_x, bottom + pad_y)
+
+        if self._bboxes is None:
+            self._bboxes = np.array([chunk.bbox for chunk in self._chunks]).reshape(-1, 4)
+        boxes = self._bboxes * n
+        visible = np.flatnonzero((boxes[:, 2] >= area[0]) & (boxes[:, 0] <= area[2]) &
+                                 (boxes[:, 3] >= area[1]) & (boxes[:, 1] <= area[3]))
+
+        # consecutive visible chunks become one line
+        runs = np.split(visible, np.flatnonzero(np.diff(visible) != 1) + 1) if len(visible) else []
+        for line, run in enumerate(runs):
+            indices = np.concatenate([self._kept(self._chunks[i], zoom)[:-1] for i in run] +
+                                     [[self._chunks[run[-1]].stop]])
+            x, y = canvas_view.world_to_canvas(self._world[indices, 0], self._world[indices, 1])
+            self._line_coords(line, np.column_stack((x, y)).ravel().tolist())
+        self._hide_lines(len(runs))
+
+        widget.manage_z_order()
+        self._view = (zoom, self.version, widget.width, widget.height, span, area)
+        self._origin = (left, top)
+        self.last_upper_left_tile_pos = widget.upper_left_tile_pos
+
+    def _line_coords(self, line: int, coords: list):
+        canvas = self.map_widget.canvas
+        if line == len(self._lines):
+            item = canvas.create_line(coords, width=self.width, fill=self.path_color, capstyle=tkinter.ROUND,
+                                      joinstyle=tkinter.ROUND, tags=("path", self.tag))
+            if self.command is not None:
+                canvas.tag_bind(item, "<Enter>", self.mouse_enter)
+                canvas.tag_bind(item, "<Leave>", self.mouse_leave)
+                canvas.tag_bind(item, "<Button-1>", self.click)
+            self._lines.append(item)
+        else:
+            canvas.coords(self._lines[line], coords)
+            if line >= self._shown:
+                canvas.itemconfigure(self._lines[line], state="normal")
+        self._shown = max(self._shown, line + 1)
+
+    def _hide_lines(self, keep: int):
+        for item in self._lines[keep:self._shown]:
+            self.map_widget.canvas.itemconfigure(item, state="hidden")
+        self._shown = min(self._shown, keep)
+
+    def delete(self):
+        if self in self.map_widget.canvas_path_list:
+            self.map_widget.canvas_path_list.remove(self)
+        self.map_widget.canvas.delete(self.tag)
+        self._lines, self._shown = [], 0
+        self.deleted = True
+
+
+class LiveTrail:
+    """
+    Where a drone has been: the last `max_points` positions as one canvas
+    line that grows in place.
+
+    The positions are kept in a ring buffer of projected (world)
+    coordinates. `append` projects one point and extends the line with
+    canvas.insert, dropping the oldest point with canvas.dchars once the
+    ring is full, so the line is never rebuilt while the view stays put. A
+    pan moves the line; only a zoom re-projects the ring. Register it with
+    the map (`map_widget.add_layer`), which the constructor does.
+    """
+
+    def __init__(self, map_widget, max_points: int = 600, color: str = "#f0ad4e", width: int = 2):
+        self.map_widget = map_widget
+        self.canvas = map_widget.canvas
+        self.max_points = max(max_points, 2)
+        self.color, self.width = color, width
+        self.tag = f"trail-{id(self)}"
+        self.head = 0  # ring index of the oldest point
+        self.count = 0
+        self._ring = np.zeros((self.max_points, 2))
+        self._line = None
+        self._transform = None  # (zoom, width, span): the line's coordinates are valid for this view
+        self._origin = None  # upper left tile position the line is currently drawn for
+        self._scale = self._tile_scale = 1.0  # canvas pixels per world unit and per tile
+        map_widget.add_layer(self)
+
+    def __len__(self):
+        return self.count
+
+    def points(self) -> np.ndarray:
+        """ world coordinates of the points, oldest first """
+        return np.roll(self._ring, -self.head, axis=0)[:self.count]
+
+    def append(self, lat: float, lon: float):
+        x = (lon + 180.0) / 360.0
+        y = (1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0
+        full = self.count == self.max_points
+        if full:
+            self._ring[self.head] = x, y
+            self.head = (self.head + 1) % self.max_points
+        else:
+            self._ring[(self.head + self.count) % self.max_points] = x, y
+            self.count += 1
+
+        if self._line is None or self._transform is None:
+            if self.count >= 2:
+                self.draw()
+            return
+        left, top = self._origin
+        self.canvas.insert(self._line, "end", (x * self._scale - left * self._tile_scale,
+                                               y * self._scale - top * self._tile_scale))
+        if full:
+            self.canvas.dchars(self._line, 0, 1)  # coordinate indices: x and y of the oldest point
+
+    def clear(self):
+        self.head = self.count = 0
+        if self._line is not None:
+            self.canvas.delete(self._line)
+            self._line = None
+
+    def delete(self):
+        self.clear()
+        if self in self.map_widget.layers:
+            self.map_widget.remove_layer(self)
+
+    def draw(self):
+        widget = self.map_widget
+        (left, top), (right, _) = widget.upper_left_tile_pos, widget.lower_right_tile_pos
+        zoom = round(widget.zoom)
+        transform = (zoom, widget.width, round(right - left, 6))
+        if self._line is not None and transform == self._transform:
+            if (left, top) != self._origin:
+                self.canvas.move(self._line, (self._origin[0] - left) * self._tile_scale,
+                                 (self._origin[1] - top) * self._tile_scale)
+                self._origin = (left, top)
+            return
+        if self.count < 2:
+            return
+
+        view = CanvasView(widget)
+        self._tile_scale, self._scale = view.scale, view.world_scale
+        self._transform, self._origin = transform, (left, top)
+        points = self.points()
+        coords = np.column_stack(view.world_to_canvas(points[:, 0], points[:, 1])).ravel().tolist()
+        if self._line is None:
+            self._line = self.canvas.create_line(coords, fill=self.color, width=self.width, capstyle=tkinter.ROUND,
+                                                 joinstyle=tkinter.ROUND, tags=("path", self.tag))
+            widget.manage_z_order()
+        else:
+            self.canvas.coords(self._line, coords)
+
+
+class ProjectedPolygon(CanvasPolygon):
+    """
+    A CanvasPolygon (same arguments) that keeps its vertices in world
+    coordinates, projects them all at once on zoom and pans with canvas.move.
+    Like CanvasPolygon, it notices changes to position_list by its length.
+    """
+    _world = None
+
+    def _project(self, resized: bool):
+        if self._world is None or resized:
+            lat, lon = np.asarray(self.position_list, dtype=np.float64).reshape(-1, 2).T
+            self._world = np.column_stack(decimal_to_world(lat, lon))
+        x, y = CanvasView(self.map_widget).world_to_canvas(self._world[:, 0], self._world[:, 1])
+        self.canvas_polygon_positions = np.column_stack((x, y)).ravel().tolist()
+
+    def draw(self, move=False):
+        widget = self.map_widget
+        resized = self.last_position_list_length != len(self.position_list)
+        self.last_position_list_length = len(self.position_list)
+        canvas = widget.canvas
+        if self.deleted:
+            canvas.delete(self.canvas_polygon)
+            self.canvas_polygon = None
+            return
+
+        if move and not resized and self.canvas_polygon is not None and self.last_upper_left_tile_pos is not None:
+            view = CanvasView(widget)
+            last_left, last_top = self.last_upper_left_tile_pos
+            canvas.move(self.canvas_polygon, float((last_left - view.left) * view.scale),
+                        float((last_top - view.top) * view.scale))
+        else:
+            self._project(resized)
+            if self.canvas_polygon is None:
+                self.canvas_polygon = canvas.create_polygon(self.canvas_polygon_positions, width=self.border_width,
+                                                            outline=self.outline_color, joinstyle=tkinter.ROUND,
+                                                            stipple="gray25", tag="polygon",
+                                                            fill="" if self.fill_color is None else self.fill_color)
+                if self.command is not None:
+                    canvas.tag_bind(self.canvas_polygon, "<Enter>", self.mouse_enter)
+                    canvas.tag_bind(self.canvas_polygon, "<Leave>", self.mouse_leave)
+                    canvas.tag_bind(self.canvas_polygon, "<Button-1>", self.click)
+            else:
+                canvas.coords(self.canvas_polygon, self.canvas_polygon_positions)
+
+        widget.manage_z_order()
+        self.last_upper_left_tile_pos = widget.upper_left_tile_pos
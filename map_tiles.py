@@ -0,0 +1,230 @@
+"""
+Tile storage for the map widget.
+
+TileCache replaces tkintermapview's `tile_image_cache` dict, which is keyed
+by the ambiguous string f"{zoom}{x}{y}" (zoom 1, x 12, y 3 and zoom 11, x 2,
+y 3 share a key) and trimmed by deleting arbitrary entries past 10,000.
+
+RoutePrefetcher warms the cache along a mission route before the drone
+gets there.
+"""
+import heapq
+import math
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from projection import decimal_to_osm
+
+TileKey = Tuple[int, int, int]  # (zoom, x, y)
+
+DEFAULT_TILE_BYTES = 256 * 256 * 4  # decoded RGBA tile
+
+
+class TileCache:
+    """
+    Thread-safe LRU cache of decoded tiles keyed by (zoom, x, y), bounded by
+    an estimate of the memory the tiles take rather than by their number.
+
+    `get` counts a hit or a miss and marks the tile as recently used;
+    `in` only checks presence, so background prefetching neither skews the
+    counters nor keeps tiles alive. Putting a tile evicts the least recently
+    used ones until the cache is back under `max_bytes`.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._tiles: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (image, nbytes), oldest first
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._tiles)
+
+    def __contains__(self, key: Hashable):
+        return key in self._tiles
+
+    def get(self, key: Hashable) -> Optional[object]:
+        with self._lock:
+            entry = self._tiles.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._tiles.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, image, nbytes: int = DEFAULT_TILE_BYTES):
+        with self._lock:
+            old = self._tiles.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._tiles[key] = (image, nbytes)
+            self.bytes += nbytes
+            while self.bytes > self.max_bytes and len(self._tiles) > 1:
+                _, (_, evicted_bytes) = self._tiles.popitem(last=False)
+                self.bytes -= evicted_bytes
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._tiles.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {"tiles": len(self._tiles), "bytes": self.bytes, "max_bytes": self.max_bytes, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0}
+
+
+def overzoom_box(source_zoom: int, source_x: int, source_y: int, zoom: int, x: int, y: int, tile_size: int = 256) -> tuple:
+    """
+    Crop box (left, top, right, bottom) within ancestor tile (source_zoom,
+    source_x, source_y) that covers tile (zoom, x, y); scaled up to
+    `tile_size` it stands in for the missing tile.
+    """
+    shift = zoom - source_zoom
+    size = max(tile_size >> shift, 1)
+    left = (x - (source_x << shift)) * tile_size / (1 << shift)
+    top = (y - (source_y << shift)) * tile_size / (1 << shift)
+    return int(left), int(top), int(left) + size, int(top) + size
+
+
+# --- Route prefetching ---
+
+EARTH_CIRCUMFERENCE_M = 40_075_016.686
+
+
+def corridor_tiles(route: Sequence[Tuple[float, float]], zoom: int, buffer_m: float) -> np.ndarray:
+    """
+    (x, y) of every tile at `zoom` within about `buffer_m` of the polyline
+    `route` ((lat, lon) points), as an int array of shape (n, 2).
+    """
+    points = np.asarray(route, dtype=np.float64).reshape(-1, 2)
+    x, y = decimal_to_osm(points[:, 0], points[:, 1], zoom)
+
+    # sample every segment at least every quarter tile, then take the tiles around each sample
+    starts, ends = np.column_stack((x[:-1], y[:-1])), np.column_stack((x[1:], y[1:]))
+    if len(points) == 1:
+        samples = np.column_stack((x, y))
+    else:
+        steps = np.maximum(np.ceil(np.hypot(*(ends - starts).T) * 4).astype(np.int64), 1)
+        t = np.concatenate([np.arange(count + 1) / count for count in steps])
+        segment = np.repeat(np.arange(len(steps)), steps + 1)
+        samples = starts[segment] + (ends[segment] - starts[segment]) * t[:, None]
+
+    tile_m = EARTH_CIRCUMFERENCE_M * math.cos(math.radians(float(points[:, 0].mean()))) / 2 ** zoom
+    radius = int(math.ceil(buffer_m / tile_m))
+    centers = np.unique(np.floor(samples).astype(np.int64), axis=0)
+    offsets = np.stack(np.meshgrid(np.arange(-radius, radius + 1), np.arange(-radius, radius + 1)), -1).reshape(-1, 2)
+    tiles = np.unique((centers[:, None, :] + offsets[None, :, :]).reshape(-1, 2), axis=0)
+    in_world = (tiles >= 0).all(axis=1) & (tiles < 2 ** zoom).all(axis=1)
+    return tiles[in_world]
+
+
+class PrefetchJob:
+    """ one route's tiles, handed out nearest to the drone first; see RoutePrefetcher """
+
+    def __init__(self, tiles: np.ndarray, position: Tuple[float, float], max_tiles: int = None):
+        self.loaded = 0
+        self.skipped = 0  # already cached
+        self.cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._heap: List[tuple] = []
+        self._prioritize(tiles.reshape(-1, 3), *position)
+        if max_tiles is not None and len(self._heap) > max_tiles:  # keep the nearest ones
+            self._heap = heapq.nsmallest(max_tiles, self._heap)
+        self.total = len(self._heap)
+
+    def _prioritize(self, tiles: np.ndarray, lat: float, lon: float):
+        zoom, x, y = tiles.T
+        px, py = decimal_to_osm(lat, lon, zoom)
+        # distance in fractions of the world's width, so every zoom level shares one scale
+        distance = np.hypot(x + 0.5 - px, y + 0.5 - py) / 2.0 ** zoom
+        # the same distance goes to the most detailed level first, that's what the drone camera follows
+        self._heap = list(zip(distance.tolist(), (-zoom).tolist(), zoom.tolist(), x.tolist(), y.tolist()))
+        heapq.heapify(self._heap)
+
+    def set_position(self, lat: float, lon: float):
+        """ re-prioritizes the remaining tiles by distance to (lat, lon) """
+        with self._lock:
+            if self._heap:
+                self._prioritize(np.array([entry[2:] for entry in self._heap], dtype=np.int64), lat, lon)
+
+    def pop(self) -> Optional[TileKey]:
+        with self._lock:
+            if not self._heap or self.cancelled.is_set():
+                return None
+            return heapq.heappop(self._heap)[2:]
+
+    @property
+    def done(self) -> bool:
+        return not self._heap or self.cancelled.is_set()
+
+
+class RoutePrefetcher:
+    """
+    Loads the tiles of a buffered corridor around a route into the tile
+    cache in the background, nearest to the drone first.
+
+    `load(zoom, x, y)` fetches one tile and stores it in `cache` (e.g. the
+    map's request_image). Starting a new route cancels the previous one;
+    `cancel()` stops without a replacement. At most `max_tiles` are queued,
+    so a long route can't flush the whole cache.
+    """
+
+    def __init__(self, load: Callable[[int, int, int], object], cache: TileCache, workers: int = 4,
+                 buffer_m: float = 500.0, max_tiles: int = 2000):
+        self.load = load
+        self.cache = cache
+        self.buffer_m = buffer_m
+        self.max_tiles = max_tiles
+        self.job: Optional[PrefetchJob] = None
+        self._wakeup = threading.Condition()
+        self._threads = [threading.Thread(daemon=True, name=f"tile-prefetch-{i}", target=self._run)
+                         for i in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def prefetch(self, route: Sequence[Tuple[float, float]], position: Tuple[float, float],
+                 zooms: Iterable[int]) -> PrefetchJob:
+        """ starts warming the corridor of `route` at `zooms`; `position` is the drone's (lat, lon) """
+        self.cancel()
+        tiles = [np.column_stack((np.full(len(xy), zoom), xy)) for zoom in zooms
+                 for xy in [corridor_tiles(route, zoom, self.buffer_m)]]
+        job = PrefetchJob(np.concatenate(tiles) if tiles else np.empty((0, 3), np.int64), position, self.max_tiles)
+        with self._wakeup:
+            self.job = job
+            self._wakeup.notify_all()
+        return job
+
+    def update_position(self, lat: float, lon: float):
+        job = self.job
+        if job is not None and not job.done:
+            job.set_position(lat, lon)
+
+    def cancel(self):
+        job = self.job
+        if job is not None:
+            job.cancelled.set()
+
+    def _run(self):
+        while True:
+            with self._wakeup:
+                while self.job is None or self.job.done:
+                    self._wakeup.wait()
+                job = self.job
+            tile = job.pop()
+            if tile is None:
+                continue
+            if tile in self.cache:
+                job.skipped += 1
+                continue
+            self.load(*tile)
+            job.loaded += 1
@@ -0,0 +1,274 @@
+"""
+The ground station's map widget.
+
+DroneMapView is a tkintermapview.TkinterMapView with the parts that don't
+scale to a fleet replaced; the vendored library itself is left untouched.
+"""
+import sqlite3
+import time
+
+import PIL
+import requests
+import tkintermapview
+from PIL import ImageTk
+
+from map_layers import LAYER_TAG
+from map_paths import ProjectedPolygon, SimplifiedPath
+from map_tiles import PrefetchJob, RoutePrefetcher, TileCache, overzoom_box
+from tile_decoder import DecodedTile, TileDecoder
+
+TILE_REQUEST_TIMEOUT = 10  # seconds
+PRE_CACHE_RADIUS = 8  # tiles around the view center loaded ahead of panning
+ROUTE_PREFETCH_WORKERS = 4
+TILE_UPLOAD_BUDGET_MS = 8  # Tk-thread time per tick spent turning decoded tiles into PhotoImages
+
+
+class DroneMapView(tkintermapview.TkinterMapView):
+    """
+    TkinterMapView whose tile cache is a TileCache (LRU over (zoom, x, y)
+    with a byte budget) instead of a dict trimmed at random, and which can
+    read tiles from a local tile source (e.g. MBTilesSource) instead of a
+    tile server. `prefetch_route` loads the tiles along a route ahead of
+    the drone.
+
+    Loader threads only fetch encoded tiles; a TileDecoder decodes them in
+    `decode_processes` worker processes, and the Tk thread turns at most
+    TILE_UPLOAD_BUDGET_MS worth of them per tick into PhotoImages, visible
+    tiles before prefetched ones.
+
+    Layers (see map_layers) added with `add_layer` are redrawn with the map
+    and stacked between paths and markers. Paths are SimplifiedPaths, which
+    draw only the detail visible at the current zoom.
+    """
+
+    def __init__(self, *args, tile_cache_bytes: int = 256 * 1024 * 1024, route_buffer_m: float = 500.0,
+                 decode_processes: int = 2, **kwargs):
+        # the base constructor starts the loader threads, everything they use has to exist before that
+        self._tile_cache = TileCache(tile_cache_bytes)
+        self.tile_source = None  # object with get_tile(zoom, x, y) -> TileData or None, and tile_size
+        self.decode_processes = decode_processes
+        self.tile_decoder = TileDecoder(256, decode_processes)
+        self.prefetched_tiles = []  # ((zoom, x, y), DecodedTile or None), decoded ahead of being visible
+        self.layers = []
+        super().__init__(*args, **kwargs)
+        self.route_prefetcher = RoutePrefetcher(self.request_image, self._tile_cache, ROUTE_PREFETCH_WORKERS,
+                                                buffer_m=route_buffer_m)
+
+    def set_tile_server(self, tile_server: str, tile_size: int = 256, max_zoom: int = 19):
+        self.tile_source = None
+        self.route_prefetcher.cancel()
+        self._set_decoder_tile_size(tile_size)
+        super().set_tile_server(tile_server, tile_size, max_zoom)
+
+    def destroy(self):
+        self.route_prefetcher.cancel()
+        super().destroy()
+        self.tile_decoder.close()
+
+    def _set_decoder_tile_size(self, tile_size: int):
+        if tile_size != self.tile_decoder.tile_size:
+            old, self.tile_decoder = self.tile_decoder, TileDecoder(tile_size, self.decode_processes)
+            old.close()
+        self.prefetched_tiles = []
+
+    def set_path(self, position_list: list, **kwargs) -> SimplifiedPath:
+        path = SimplifiedPath(self, position_list, **kwargs)
+        path.draw()
+        self.canvas_path_list.append(path)
+        return path
+
+    def set_polygon(self, position_list: list, **kwargs) -> ProjectedPolygon:
+        polygon = ProjectedPolygon(self, position_list, **kwargs)
+        polygon.draw()
+        self.canvas_polygon_list.append(polygon)
+        return polygon
+
+    def add_layer(self, layer):
+        self.layers.append(layer)
+        layer.draw()
+
+    def remove_layer(self, layer):
+        self.layers.remove(layer)
+
+    def draw_initial_array(self):
+        super().draw_initial_array()
+        for layer in self.layers:
+            layer.draw()
+
+    def draw_move(self, called_after_zoom: bool = False):
+        super().draw_move(called_after_zoom)
+        for layer in self.layers:
+            layer.draw()
+
+    def manage_z_order(self):
+        self.canvas.lift("polygon")
+        self.canvas.lift("path")
+        self.canvas.lift(LAYER_TAG)
+        self.canvas.lift("marker")
+        self.canvas.lift("marker_image")
+        self.canvas.lift("corner")
+        self.canvas.lift("button")
+
+    def set_tile_source(self, source, max_zoom: int = None):
+        """ reads tiles from `source` (e.g. an MBTilesSource) from now on, overzooming past its highest level """
+        self.tile_source = source
+        self.route_prefetcher.cancel()
+        self._set_decoder_tile_size(source.tile_size)
+        if max_zoom is None:
+            max_zoom = source.max_zoom + getattr(source, "max_overzoom", 0)
+        super().set_tile_server(source.name, source.tile_size, max_zoom)
+
+    @property
+    def tile_image_cache(self) -> TileCache:
+        return self._tile_cache
+
+    @tile_image_cache.setter
+    def tile_image_cache(self, value):
+        # TkinterMapView resets the cache by assigning {} (e.g. in set_tile_server)
+        self._tile_cache.clear()
+
+    def _tile_bytes(self) -> int:
+        return self.tile_size * self.tile_size * 4
+
+    def prefetch_route(self, route, position, zoom_margin: int = 1) -> PrefetchJob:
+        """
+        Loads the tiles within route_buffer_m of `route` ((lat, lon) points)
+        in the background, nearest to `position` first, at the current zoom
+        level and `zoom_margin` levels either side. Replaces the previous
+        route's prefetch; uses at most half of the tile cache.
+        """
+        zoom = round(self.zoom)
+        zooms = range(max(zoom - zoom_margin, self.min_zoom), min(zoom + zoom_margin, self.max_zoom) + 1)
+        self.route_prefetcher.max_tiles = self._tile_cache.max_bytes // self._tile_bytes() // 2
+        return self.route_prefetcher.prefetch(route, position, zooms)
+
+    def get_tile_image_from_cache(self, zoom: int, x: int, y: int):
+        image = self._tile_cache.get((zoom, x, y))
+        return False if image is None else image
+
+    def request_image(self, zoom: int, x: int, y: int, db_cursor=None):
+        """
+        Loads and decodes one tile for the cache without showing it (pre-cache
+        and route prefetch threads); the Tk thread makes the PhotoImage later.
+        """
+        tile = self._load_tile(zoom, x, y, db_cursor, background=True)
+        if tile is not None:
+            self.prefetched_tiles.append(((zoom, x, y), tile))
+        return tile
+
+    def load_images_background(self):
+        """ loader thread: decodes the tiles of image_load_queue_tasks for update_canvas_tile_images """
+        db_cursor = sqlite3.connect(self.database_path).cursor() if self.database_path is not None else None
+        while self.running:
+            try:
+                (zoom, x, y), canvas_tile = self.image_load_queue_tasks.pop()
+            except IndexError:
+                time.sleep(0.01)
+                continue
+            image = self.get_tile_image_from_cache(zoom, x, y)
+            if image is False:
+                image = self._load_tile(zoom, x, y, db_cursor)
+            self.image_load_queue_results.append(((zoom, x, y), canvas_tile, image))
+
+    def update_canvas_tile_images(self):
+        """ Tk thread: turns decoded tiles into cached PhotoImages and shows the visible ones, within a time budget """
+        deadline = time.perf_counter() + TILE_UPLOAD_BUDGET_MS / 1000
+        results, prefetched = self.image_load_queue_results, self.prefetched_tiles
+        while self.running and (results or prefetched) and time.perf_counter() < deadline:
+            if results:
+                (zoom, x, y), canvas_tile, image = results.pop(0)
+            else:
+                (zoom, x, y), image = prefetched.pop(0)
+                canvas_tile = None
+            image = self._cache_tile((zoom, x, y), image)
+            if canvas_tile is not None and zoom == round(self.zoom):
+                canvas_tile.set_image(image)
+        if self.running:
+            self.after(10, self.update_canvas_tile_images)
+
+    def _cache_tile(self, key: tuple, tile) -> ImageTk.PhotoImage:
+        if isinstance(tile, DecodedTile):
+            if tile.decoder is not self.tile_decoder:  # decoded before a tile size change
+                return self.empty_tile_image
+            image_tk = tile.photo_image()
+            self._tile_cache.put(key, image_tk, self._tile_bytes())
+            return image_tk
+        if tile is None:  # failed, try again next time
+            return self.empty_tile_image
+        if tile is self.empty_tile_image:  # no tile there, remember that cheaply
+            self._tile_cache.put(key, tile, 0)
+        return tile
+
+    def _load_tile(self, zoom: int, x: int, y: int, db_cursor=None, background: bool = False):
+        """
+        Fetches and decodes one tile (loader threads). Returns a DecodedTile,
+        a cached PhotoImage, empty_tile_image if there is no tile there, or
+        None if loading failed.
+        """
+        decoder = self.tile_decoder
+        try:
+            if self.tile_source is not None:
+                source = self.tile_source
+                tile = source.get_tile(zoom, x, y)
+                if tile is None:
+                    return self.empty_tile_image
+                box = None
+                if tile.zoom != zoom:  # overzoomed: crop the part of the ancestor, the decoder scales it up
+                    box = overzoom_box(tile.zoom, tile.x, tile.y, zoom, x, y, source.tile_size)
+                decoded = decoder.decode(tile.data, box, background=background)
+                return decoded if self.running and source is self.tile_source else None
+
+            if db_cursor is not None:
+                try:
+                    db_cursor.execute("SELECT t.tile_image FROM tiles t WHERE t.zoom=? AND t.x=? AND t.y=? AND t.server=?;",
+                                      (zoom, x, y, self.tile_server))
+                    result = db_cursor.fetchone()
+                    if result is not None:
+                        return decoder.decode(result[0], background=background)
+                    if self.use_database_only:
+                        return self.empty_tile_image
+                except sqlite3.OperationalError:
+                    if self.use_database_only:
+                        return self.empty_tile_image
+
+            data = self._download(self.tile_server, zoom, x, y)
+            overlay = None
+            if self.overlay_tile_server is not None:
+                overlay = self._download(self.overlay_tile_server, zoom, x, y)
+            decoded = decoder.decode(data, overlay=overlay, background=background)
+            return decoded if self.running else None
+
+        except PIL.UnidentifiedImageError:  # the server has no tile here
+            return self.empty_tile_image
+        except Exception:  # offline, timeout, ...: try again next time
+            return None
+
+    @staticmethod
+    def _download(url_template: str, zoom: int, x: int, y: int) -> bytes:
+        url = url_template.replace("{x}", str(x)).replace("{y}", str(y)).replace("{z}", str(zoom))
+        return requests.get(url, headers={"User-Agent": "TkinterMapView"}, timeout=TILE_REQUEST_TIMEOUT).content
+
+    def pre_cache(self):
+        """ loads tiles in growing rings around self.pre_cache_position (runs on its own thread) """
+        if self.database_path is not None:
+            db_cursor = sqlite3.connect(self.database_path).cursor()
+        else:
+            db_cursor = None
+
+        last_position, radius, zoom = None, 1, round(self.zoom)
+        while self.running:
+            position = self.pre_cache_position
+            if position != last_position:
+                last_position, radius, zoom = position, 1, round(self.zoom)
+
+            if position is None or radius > PRE_CACHE_RADIUS:
+                time.sleep(0.1)
+                continue
+
+            center_x, center_y = position
+            ring = [(x, center_y + dy) for x in range(center_x - radius, center_x + radius + 1) for dy in (-radius, radius)]
+            ring += [(center_x + dx, y) for y in range(center_y - radius + 1, center_y + radius) for dx in (-radius, radius)]
+            for x, y in ring:
+                if (zoom, x, y) not in self._tile_cache:
+                    self.request_image(zoom, x, y, db_cursor=db_cursor)
+            radius += 1
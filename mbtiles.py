@@ -0,0 +1,175 @@
+"""
+Offline map tiles from MBTiles files (https://github.com/mapbox/mbtiles-spec).
+
+An MBTiles file is an SQLite database with a `tiles` table (zoom_level,
+tile_column, tile_row, tile_data) in TMS order, i.e. row 0 is the southmost
+row, and a `metadata` table with name/value pairs such as minzoom, maxzoom
+and bounds.
+"""
+import glob
+import math
+import os
+import queue
+import sqlite3
+from contextlib import contextmanager
+from typing import Iterator, List, NamedTuple, Optional, Sequence
+
+
+class MBTilesError(Exception):
+    pass
+
+
+class TileData(NamedTuple):
+    data: bytes  # encoded image (PNG, JPEG, WebP)
+    zoom: int  # zoom, x and y of the tile the data belongs to; less than requested when overzoomed
+    x: int
+    y: int
+
+
+def tile_bounds(zoom: int, x: int, y: int) -> tuple:
+    """ (west, south, east, north) of an XYZ tile in degrees """
+    n = 2 ** zoom
+
+    def lat(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return x / n * 360.0 - 180.0, lat(y + 1), (x + 1) / n * 360.0 - 180.0, lat(y)
+
+
+# --- Connection pool ---
+
+class ConnectionPool:
+    """
+    Fixed set of read-only connections to one SQLite file, shared by the
+    map's tile loader threads. A thread borrows a connection for one query
+    and waits if all of them are in use.
+    """
+
+    def __init__(self, path: str, size: int = 4, mmap_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self._idle: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._all: List[sqlite3.Connection] = []
+        uri = "file:" + os.path.abspath(path).replace("\\", "/") + "?mode=ro"
+        for _ in range(size):
+            connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            connection.execute("PRAGMA query_only=ON")
+            # reads straight from the OS page cache instead of copying pages into SQLite's own cache
+            connection.execute(f"PRAGMA mmap_size={mmap_bytes}")
+            self._all.append(connection)
+            self._idle.put(connection)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        connection = self._idle.get()
+        try:
+            yield connection
+        finally:
+            self._idle.put(connection)
+
+    def close(self):
+        for connection in self._all:
+            connection.close()
+        self._all.clear()
+
+
+# --- Tile source ---
+
+class MBTilesFile:
+    def __init__(self, path: str, pool_size: int = 4):
+        self.path = path
+        self.pool = ConnectionPool(path, pool_size)
+        with self.pool.connection() as connection:
+            try:
+                metadata = dict(connection.execute("SELECT name, value FROM metadata"))
+                if "minzoom" in metadata and "maxzoom" in metadata:
+                    self.min_zoom, self.max_zoom = int(metadata["minzoom"]), int(metadata["maxzoom"])
+                else:
+                    self.min_zoom, self.max_zoom = connection.execute(
+                        "SELECT MIN(zoom_level), MAX(zoom_level) FROM tiles").fetchone()
+                bounds = metadata.get("bounds")
+                self.bounds = tuple(float(value) for value in bounds.split(",")) if bounds else (-180.0, -85.06, 180.0, 85.06)
+            except (sqlite3.DatabaseError, TypeError, ValueError) as err:
+                self.pool.close()
+                raise MBTilesError(f"{path}: not a readable MBTiles file ({err})") from err
+        if self.min_zoom is None:
+            self.pool.close()
+            raise MBTilesError(f"{path}: contains no tiles")
+        self.name = metadata.get("name", os.path.basename(path))
+        self.format = metadata.get("format", "png")
+
+    def covers(self, zoom: int, x: int, y: int) -> bool:
+        if not self.min_zoom <= zoom <= self.max_zoom:
+            return False
+        west, south, east, north = tile_bounds(zoom, x, y)
+        return west < self.bounds[2] and east > self.bounds[0] and south < self.bounds[3] and north > self.bounds[1]
+
+    def read(self, zoom: int, x: int, y: int) -> Optional[bytes]:
+        with self.pool.connection() as connection:
+            row = connection.execute(
+                "SELECT tile_data FROM tiles WHERE zoom_level=? AND tile_column=? AND tile_row=?",
+                (zoom, x, (1 << zoom) - 1 - y)).fetchone()  # XYZ -> TMS row
+        return row[0] if row else None
+
+    def close(self):
+        self.pool.close()
+
+
+class MBTilesSource:
+    """
+    Tile source over one or more MBTiles files with possibly overlapping
+    coverage. For each tile the files are tried from the most detailed
+    (highest max zoom) down. Beyond the available zoom levels the closest
+    ancestor tile is returned, up to `max_overzoom` levels up, for the
+    caller to crop and scale.
+    """
+
+    def __init__(self, paths: Sequence[str], pool_size: int = 4, max_overzoom: int = 3, tile_size: int = 256,
+                 skip_unreadable: bool = False):
+        if not paths:
+            raise MBTilesError("MBTilesSource: no files given")
+        files = []
+        for path in paths:
+            try:
+                files.append(MBTilesFile(path, pool_size))
+            except (MBTilesError, sqlite3.DatabaseError, OSError) as err:
+                if not skip_unreadable:
+                    for f in files:
+                        f.close()
+                    raise
+                print(f"[map] skipping offline tiles {os.path.basename(path)}: {err}")
+        if not files:
+            raise MBTilesError("MBTilesSource: none of the files is readable")
+        self.files = sorted(files, key=lambda f: f.max_zoom, reverse=True)
+        self.max_overzoom = max_overzoom
+        self.tile_size = tile_size
+        self.min_zoom = min(f.min_zoom for f in self.files)
+        self.max_zoom = max(f.max_zoom for f in self.files)
+        self.name = "mbtiles:" + ",".join(os.path.basename(f.path) for f in self.files)
+
+    @classmethod
+    def from_directory(cls, directory: str, **kwargs) -> Optional["MBTilesSource"]:
+        """
+        source over every readable *.mbtiles file in `directory`, or None if
+        there are none; unreadable or empty files (e.g. left by an interrupted
+        tile_bundle.py run) are skipped and logged
+        """
+        paths = sorted(glob.glob(os.path.join(directory, "*.mbtiles")))
+        try:
+            return cls(paths, skip_unreadable=True, **kwargs) if paths else None
+        except MBTilesError:  # every file was skipped
+            return None
+
+    def get_tile(self, zoom: int, x: int, y: int) -> Optional[TileData]:
+        for level in range(zoom, max(zoom - self.max_overzoom, 0) - 1, -1):
+            shift = zoom - level
+            tile_x, tile_y = x >> shift, y >> shift
+            for f in self.files:
+                if f.covers(level, tile_x, tile_y):
+                    data = f.read(level, tile_x, tile_y)
+                    if data is not None:
+                        return TileData(data, level, tile_x, tile_y)
+        return None
+
+    def close(self):
+        for f in self.files:
+            f.close()
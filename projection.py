@@ -0,0 +1,84 @@
+"""
+Web Mercator projection for whole arrays of coordinates.
+
+tkintermapview's decimal_to_osm and osm_to_decimal convert one point at a
+time in pure Python, and its markers, paths and polygons call them for
+every point on every redraw. These are the same conversions over NumPy
+arrays (scalars work too), plus CanvasView, which takes them on to canvas
+pixels for the map's current view.
+
+Coordinates come in three kinds:
+- decimal: (lat, lon) in degrees
+- tile:    fractional XYZ tile coordinates at some zoom (tkintermapview's "osm")
+- world:   tile coordinates at zoom 0, in [0, 1); what layers and paths store,
+           since they hold for every zoom level
+"""
+import math
+from typing import Tuple
+
+import numpy as np
+
+
+def decimal_to_osm(lat, lon, zoom: int) -> Tuple[np.ndarray, np.ndarray]:
+    """ fractional tile coordinates (x, y) of lat/lon degrees at `zoom` """
+    n = 2.0 ** np.asarray(zoom, dtype=np.float64)
+    lat_rad = np.radians(np.asarray(lat, dtype=np.float64))
+    x = (np.asarray(lon, dtype=np.float64) + 180.0) * (n / 360.0)
+    y = (1.0 - np.arcsinh(np.tan(lat_rad)) / math.pi) * (n / 2.0)
+    return x, y
+
+
+def osm_to_decimal(x, y, zoom: int) -> Tuple[np.ndarray, np.ndarray]:
+    """ (lat, lon) degrees of fractional tile coordinates at `zoom` """
+    n = 2.0 ** np.asarray(zoom, dtype=np.float64)
+    lon = np.asarray(x, dtype=np.float64) * (360.0 / n) - 180.0
+    lat = np.degrees(np.arctan(np.sinh(math.pi * (1.0 - 2.0 * np.asarray(y, dtype=np.float64) / n))))
+    return lat, lon
+
+
+def decimal_to_world(lat, lon) -> Tuple[np.ndarray, np.ndarray]:
+    return decimal_to_osm(lat, lon, 0)
+
+
+def world_to_decimal(x, y) -> Tuple[np.ndarray, np.ndarray]:
+    return osm_to_decimal(x, y, 0)
+
+
+class CanvasView:
+    """
+    The map widget's view at one moment: converts between world or decimal
+    coordinates and canvas pixels, for whole arrays at once.
+
+    Take a new one after the map moves; it doesn't follow the widget.
+    """
+    __slots__ = ("zoom", "left", "top", "right", "bottom", "width", "height", "scale", "world_scale")
+
+    def __init__(self, map_widget):
+        self.zoom = round(map_widget.zoom)
+        (self.left, self.top), (self.right, self.bottom) = \
+            map_widget.upper_left_tile_pos, map_widget.lower_right_tile_pos
+        self.width, self.height = map_widget.width, map_widget.height
+        self.scale = self.width / (self.right - self.left)  # canvas pixels per tile
+        self.world_scale = self.scale * (1 << self.zoom)  # canvas pixels per world unit
+
+    def world_to_canvas(self, x, y) -> Tuple[np.ndarray, np.ndarray]:
+        return (np.asarray(x) * self.world_scale - self.left * self.scale,
+                np.asarray(y) * self.world_scale - self.top * self.scale)
+
+    def decimal_to_canvas(self, lat, lon) -> Tuple[np.ndarray, np.ndarray]:
+        x, y = decimal_to_osm(lat, lon, self.zoom)
+        return (x - self.left) * self.scale, (y - self.top) * self.scale
+
+    def canvas_to_decimal(self, x, y) -> Tuple[np.ndarray, np.ndarray]:
+        return osm_to_decimal(np.asarray(x) / self.scale + self.left, np.asarray(y) / self.scale + self.top,
+                              self.zoom)
+
+    def bounds(self) -> Tuple[float, float, float, float]:
+        """ (south, west, north, east) of the view in degrees """
+        north, west = osm_to_decimal(self.left, self.top, self.zoom)
+        south, east = osm_to_decimal(self.right, self.bottom, self.zoom)
+        return float(south), float(west), float(north), float(east)
+
+    def contains(self, x, y, margin: float = 0.0) -> np.ndarray:
+        """ which canvas points (x, y arrays) are in view, or within `margin` pixels of it """
+        return (x > -margin) & (x < self.width + margin) & (y > -margin) & (y < self.height + margin)
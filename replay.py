@@ -0,0 +1,178 @@
+import bisect
+import threading
+import time
+from typing import List
+
+import numpy as np
+
+from fleet_state import TELEMETRY_DTYPE
+from telemetry import TelemetryRingBuffer, TelemetrySample
+from telemetry_recorder import open_flight
+
+SEEK_WARMUP = 10.0  # seconds of history replayed instantly after a seek so every drone shows up
+
+
+# --- Timestamp index ---
+
+class ReplayIndex:
+    """
+    Time-ordered view over the memory-mapped segments of one flight.
+
+    Records are addressed by a global position 0 .. len-1 in timestamp order.
+    Segments whose timestamps are already non-decreasing (the normal case)
+    are used as-is; the rare out-of-order segment gets an argsort
+    permutation. `position_of` is a bisect over segment start times followed
+    by a binary search inside the segment, i.e. O(log n), no scan.
+    """
+
+    def __init__(self, segments: List[np.ndarray]):
+        self.segments = [segment for segment in segments if len(segment)]
+        self._orders = []
+        self._timestamps = []
+        for segment in self.segments:
+            timestamps = segment["timestamp"]
+            if np.all(timestamps[1:] >= timestamps[:-1]):
+                self._orders.append(None)
+                self._timestamps.append(timestamps)
+            else:
+                order = np.argsort(timestamps, kind="stable")
+                self._orders.append(order)
+                self._timestamps.append(timestamps[order])
+
+        self._offsets = [0]
+        for segment in self.segments:
+            self._offsets.append(self._offsets[-1] + len(segment))
+        self._segment_starts = [float(timestamps[0]) for timestamps in self._timestamps]
+
+    def __len__(self):
+        return self._offsets[-1]
+
+    @property
+    def start_time(self) -> float:
+        return self._segment_starts[0] if self.segments else 0.0
+
+    @property
+    def end_time(self) -> float:
+        return float(max(timestamps[-1] for timestamps in self._timestamps)) if self.segments else 0.0
+
+    def position_of(self, timestamp: float) -> int:
+        """ number of records with a timestamp <= `timestamp` (assuming segments don't overlap in time) """
+        segment_index = bisect.bisect_right(self._segment_starts, timestamp) - 1
+        if segment_index < 0:
+            return 0
+        row = int(np.searchsorted(self._timestamps[segment_index], timestamp, side="right"))
+        return self._offsets[segment_index] + row
+
+    def read(self, start: int, end: int) -> np.ndarray:
+        """ records [start, end) in timestamp order """
+        start, end = max(start, 0), min(end, len(self))
+        if start >= end:
+            return np.empty(0, dtype=TELEMETRY_DTYPE)
+
+        chunks = []
+        segment_index = bisect.bisect_right(self._offsets, start) - 1
+        while start < end:
+            segment, order = self.segments[segment_index], self._orders[segment_index]
+            offset = self._offsets[segment_index]
+            stop = min(end, self._offsets[segment_index + 1])
+            rows = slice(start - offset, stop - offset)
+            chunks.append(segment[rows] if order is None else segment[order[rows]])
+            start = stop
+            segment_index += 1
+        return chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+
+
+# --- Player ---
+
+class TelemetryReplay(threading.Thread):
+    """
+    Plays a recorded flight into a TelemetryRingBuffer, the same ring the
+    live ingest thread writes to, so the GUI can't tell the difference.
+
+    The replay clock runs at `speed` times wall-clock time. Every `tick`
+    seconds all records up to the replay clock are pushed in one batch.
+    pause(), resume(), set_speed() and seek() may be called from the Tk
+    thread; once seek() returns no sample from before the seek is pushed
+    anymore, so the caller can skip the ring ahead and reset its state.
+    """
+
+    def __init__(self, flight_dir: str, ring: TelemetryRingBuffer, speed: float = 1.0,
+                 tick: float = 1 / 30, max_batch: int = 50_000):
+        super().__init__(daemon=True, name="telemetry-replay")
+        self.index = ReplayIndex(open_flight(flight_dir))
+        self.ring = ring
+        self.tick = tick
+        self.max_batch = max_batch  # caps one push when replaying at very high speed
+        self.pushed = 0
+
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._speed = speed
+        self._paused = False
+        self._position = 0
+        self._anchor_time = self.index.start_time  # replay time at `_anchor_wall`
+        self._anchor_wall = time.monotonic()
+
+    # --- controls ---
+
+    @property
+    def speed(self) -> float:
+        return self._speed
+
+    @property
+    def paused(self) -> bool:
+        return self._paused
+
+    @property
+    def finished(self) -> bool:
+        return self._position >= len(self.index)
+
+    def current_time(self) -> float:
+        with self._lock:
+            return self._clock()
+
+    def set_speed(self, speed: float):
+        with self._lock:
+            self._anchor_time, self._anchor_wall = self._clock(), time.monotonic()
+            self._speed = speed
+
+    def pause(self):
+        with self._lock:
+            self._anchor_time, self._anchor_wall = self._clock(), time.monotonic()
+            self._paused = True
+
+    def resume(self):
+        with self._lock:
+            self._anchor_wall = time.monotonic()
+            self._paused = False
+
+    def seek(self, timestamp: float):
+        timestamp = min(max(timestamp, self.index.start_time), self.index.end_time)
+        with self._lock:
+            self._position = self.index.position_of(timestamp - SEEK_WARMUP)
+            self._anchor_time, self._anchor_wall = timestamp, time.monotonic()
+
+    def stop(self, timeout: float = 1.0):
+        self._stop_event.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+
+    # --- playback ---
+
+    def _clock(self) -> float:
+        if self._paused:
+            return self._anchor_time
+        return self._anchor_time + (time.monotonic() - self._anchor_wall) * self._speed
+
+    def run(self):
+        while not self._stop_event.wait(self.tick):
+            with self._lock:
+                if self._paused or self.finished:
+                    continue
+                end = min(self.index.position_of(self._clock()), self._position + self.max_batch)
+                if end <= self._position:
+                    continue
+                records = self.index.read(self._position, end)
+                self._position = end
+                self.ring.push_many(map(TelemetrySample._make, records.tolist()))
+                self.pushed += len(records)
@@ -0,0 +1,228 @@
+import math
+import tkinter as tk
+from collections import deque
+from typing import Dict, Sequence
+
+import numpy as np
+
+# --- History ---
+
+class HistoryRing:
+    """
+    NumPy ring of up to `capacity` timestamped samples with one or more
+    value columns (e.g. altitude, speed and battery of one drone).
+
+    The arrays start at `initial` slots and double as samples arrive, so a
+    drone reporting slower than the rate `capacity` was sized for, or only
+    for a few minutes, doesn't hold a full-size ring.
+    """
+
+    def __init__(self, capacity: int, fields: Sequence[str], initial: int = 1024):
+        self.capacity = capacity
+        self.fields = tuple(fields)
+        size = min(initial, capacity)
+        self.times = np.zeros(size, dtype=np.float64)
+        self.values = np.zeros((size, len(self.fields)), dtype=np.float32)
+        self.write_count = 0  # total number of appended samples, doubles as a change counter
+
+    def __len__(self):
+        return min(self.write_count, self.capacity)
+
+    def append(self, timestamp: float, values: Sequence[float]):
+        i = self.write_count % self.capacity
+        if i == len(self.times):  # only before the first wrap, the samples are still in order
+            self._grow()
+        self.times[i] = timestamp
+        self.values[i] = values
+        self.write_count += 1
+
+    def _grow(self):
+        size = min(2 * len(self.times), self.capacity)
+        self.times = np.resize(self.times, size)
+        self.values = np.resize(self.values, (size, len(self.fields)))
+
+    @property
+    def last_time(self) -> float:
+        return float(self.times[(self.write_count - 1) % self.capacity]) if self.write_count else 0.0
+
+    def since(self, timestamp: float, field: str) -> tuple:
+        """
+        Returns (times, values) of one field for samples at or after
+        `timestamp`, oldest first. Samples are assumed to arrive in time order,
+        so each of the two halves of a wrapped ring is sorted and can be
+        binary searched; only the requested tail is copied.
+        """
+        column = self.fields.index(field)
+        n, start = len(self), self.write_count % self.capacity
+        if n < self.capacity or start == 0:
+            first = int(np.searchsorted(self.times[:n], timestamp))
+            return self.times[first:n], self.values[first:n, column]
+
+        first = start + int(np.searchsorted(self.times[start:], timestamp))
+        if first < self.capacity:
+            return (np.concatenate((self.times[first:], self.times[:start])),
+                    np.concatenate((self.values[first:, column], self.values[:start, column])))
+        first = int(np.searchsorted(self.times[:start], timestamp))
+        return self.times[first:start], self.values[first:start, column]
+
+
+# --- Downsampling ---
+
+class LttbDecimator:
+    """
+    Incremental Largest-Triangle-Three-Buckets downsampling of a growing,
+    time-ordered series to one point per bucket.
+
+    Buckets are anchored to absolute time (bucket k covers
+    [k * bucket_width, (k + 1) * bucket_width)), so a bucket never moves as
+    the window scrolls. LTTB picks the point of a bucket that forms the
+    largest triangle with the point picked in the previous bucket and the
+    centroid of the next one; once the next bucket is complete that choice
+    is final and cached. Each update therefore only recomputes the last two
+    buckets, no matter how much history is shown.
+    """
+
+    def __init__(self, bucket_width: float):
+        self.bucket_width = bucket_width
+        self._keys = deque()  # bucket index of each final point
+        self._times = deque()
+        self._values = deque()
+
+    @property
+    def resume_time(self) -> float:
+        """ samples from this time on are needed by the next update """
+        if not self._keys:
+            return -np.inf
+        return (self._keys[-1] + 1) * self.bucket_width
+
+    def update(self, times: np.ndarray, values: np.ndarray, first_key: int) -> tuple:
+        """
+        `times`/`values` are all samples since `resume_time`; `first_key` is
+        the oldest bucket still in the window. Returns the decimated (times,
+        values), ending with the newest sample.
+        """
+        while self._keys and self._keys[0] < first_key:
+            self._keys.popleft()
+            self._times.popleft()
+            self._values.popleft()
+        if len(times) == 0:
+            return np.array(self._times), np.array(self._values)
+
+        keys = np.floor(times / self.bucket_width).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        ends = np.r_[starts[1:], len(keys)]
+        counts = ends - starts
+        centroid_t = np.add.reduceat(times, starts) / counts
+        centroid_v = np.add.reduceat(values, starts, dtype=np.float64) / counts
+
+        if self._keys:
+            ax, ay = self._times[-1], self._values[-1]
+        else:
+            ax, ay = times[0], values[0]
+
+        tail_times, tail_values = [], []
+        buckets = len(starts)
+        for i in range(buckets):
+            s, e = starts[i], ends[i]
+            if i + 1 < buckets:
+                nx, ny = centroid_t[i + 1], centroid_v[i + 1]
+            else:
+                nx, ny = times[-1], values[-1]
+            area = np.abs((ax - nx) * (values[s:e] - ay) - (ax - times[s:e]) * (ny - ay))
+            j = s + int(area.argmax())
+            ax, ay = float(times[j]), float(values[j])
+
+            if i + 2 < buckets:  # bucket i + 1 is complete, so this choice is final
+                self._keys.append(int(keys[s]))
+                self._times.append(ax)
+                self._values.append(ay)
+            else:
+                tail_times.append(ax)
+                tail_values.append(ay)
+
+        tail_times.append(float(times[-1]))
+        tail_values.append(float(values[-1]))
+        return (np.array(list(self._times) + tail_times), np.array(list(self._values) + tail_values))
+
+
+# --- Widget ---
+
+class Sparkline(tk.Canvas):
+    """
+    Rolling line chart of one series, downsampled to about one point per
+    pixel column. The line and text items are created once and only their
+    coordinates and text are updated afterwards.
+    """
+
+    def __init__(self, master, title: str, unit: str, color: str, bg: str, window: float = 3600.0,
+                 height: int = 42, **kwargs):
+        super().__init__(master, height=height, bg=bg, highlightthickness=0, borderwidth=0, **kwargs)
+        self.title = title
+        self.unit = unit
+        self.window = window  # seconds of history shown
+        self.width = 1
+        self.height = height
+        self.line = self.create_line(0, 0, 0, 0, fill=color, width=1.5)
+        self.label = self.create_text(2, 1, anchor="nw", fill="white", font=("Helvetica", 8), text=f"{title}: --")
+        self.bind("<Configure>", self._resized)
+        self._history = None
+        self._drawn_count = 0
+        self._decimator = LttbDecimator(window)
+
+    def _resized(self, event):
+        if event.width != self.width:
+            self.width = max(event.width, 1)
+            self._history = None  # bucket width changed, start over
+
+    def draw(self, history: HistoryRing, field: str):
+        """ redraws from `history`; cheap no-op when nothing changed since the last call """
+        if history is not self._history or history.write_count < self._drawn_count:
+            self._history = history
+            self._drawn_count = 0
+            self._decimator = LttbDecimator(self.window / max(self.width - 2, 1))
+        if history.write_count == self._drawn_count:
+            return
+        self._drawn_count = history.write_count
+
+        decimator = self._decimator
+        first_key = math.floor((history.last_time - self.window) / decimator.bucket_width)
+        since = max(first_key * decimator.bucket_width, decimator.resume_time)
+        times, values = decimator.update(*history.since(since, field), first_key)
+        if len(times) == 0:
+            self.coords(self.line, 0, 0, 0, 0)
+            self.itemconfig(self.label, text=f"{self.title}: --")
+            return
+
+        top, bottom = 12, self.height - 2  # leave room for the label
+        low, high = float(values.min()), float(values.max())
+        span = high - low or 1.0
+        xs = (times - times[0]) / max(times[-1] - times[0], 1e-9) * (self.width - 1)
+        ys = bottom - (values - low) / span * (bottom - top)
+        coords = np.column_stack((xs, ys)).ravel()
+        if len(coords) < 4:
+            coords = np.tile(coords, 2)  # a line needs at least two points
+        self.coords(self.line, coords.tolist())
+        self.itemconfig(self.label, text=f"{self.title}: {values[-1]:.1f} {self.unit}")
+
+
+class TelemetryHistory:
+    """ One HistoryRing per drone, allocated small the first time a drone reports and grown from there. """
+
+    FIELDS = ("altitude", "speed", "battery")
+
+    def __init__(self, seconds: float = 3600.0, rate_hz: float = 20.0):
+        self.capacity = int(seconds * rate_hz)
+        self.rings: Dict[int, HistoryRing] = {}
+
+    def __getitem__(self, drone_id: int) -> HistoryRing:
+        ring = self.rings.get(drone_id)
+        if ring is None:
+            ring = self.rings[drone_id] = HistoryRing(self.capacity, self.FIELDS)
+        return ring
+
+    def add_samples(self, samples):
+        for sample in samples:
+            self[sample.drone_id].append(sample.timestamp, (sample.altitude, sample.speed, sample.battery))
+
+    def clear(self):
+        self.rings.clear()
@@ -0,0 +1,167 @@
+import threading
+import time
+from typing import Callable, Iterable, List, NamedTuple, Optional, Union
+
+# --- Telemetry sample and state tables ---
+# States travel as small integer codes so a sample packs into a fixed-width
+# record; the tables below turn them back into the text shown in the GUI.
+
+DRONE_STATES = ("IDLE", "AWAITING ASSIGNMENT", "EN ROUTE", "DELIVERING", "RETURNING", "CHARGING")
+GPS_STATES = ("Locked", "Acquiring...", "Lost!")
+PAYLOAD_STATES = ("Secured", "Released")
+
+NO_ETA = -1  # eta value used when the drone has no active delivery
+
+
+class TelemetrySample(NamedTuple):
+    drone_id: int
+    timestamp: float  # seconds since the epoch
+    state: int  # index into DRONE_STATES
+    gps: int  # index into GPS_STATES
+    payload: int  # index into PAYLOAD_STATES
+    lat: float
+    lon: float
+    altitude: float  # m
+    speed: float  # m/s
+    battery: float  # percent
+    eta: int  # minutes, NO_ETA if unknown
+
+
+# --- Ring buffer ---
+
+class TelemetryRingBuffer:
+    """
+    Fixed-size, preallocated ring of telemetry samples.
+
+    Written by exactly one producer thread and read by the Tk thread. The
+    producer stores the slot first and only then publishes the new sequence
+    number, so a reader never sees a half written entry and neither side
+    ever takes a lock. If the reader falls more than `capacity` samples
+    behind, the oldest samples are overwritten and reported as dropped.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        if capacity <= 0:
+            raise ValueError("TelemetryRingBuffer: capacity must be positive")
+        self.capacity = capacity
+        self._slots: List[Optional[TelemetrySample]] = [None] * capacity
+        self._write_seq = 0  # total number of samples ever pushed
+
+    def __len__(self):
+        return min(self._write_seq, self.capacity)
+
+    @property
+    def write_seq(self) -> int:
+        return self._write_seq
+
+    def push(self, sample: TelemetrySample):
+        seq = self._write_seq
+        self._slots[seq % self.capacity] = sample
+        self._write_seq = seq + 1  # publish after the slot is filled
+
+    def push_many(self, samples: Iterable[TelemetrySample]):
+        seq = self._write_seq
+        slots, capacity = self._slots, self.capacity
+        for sample in samples:
+            slots[seq % capacity] = sample
+            seq += 1
+        self._write_seq = seq
+
+    def latest(self) -> Optional[TelemetrySample]:
+        """ returns the most recent sample or None if nothing was pushed yet """
+        seq = self._write_seq
+        if seq == 0:
+            return None
+        return self._slots[(seq - 1) % self.capacity]
+
+    def read_since(self, cursor: int) -> tuple:
+        """
+        Returns (samples, new_cursor, dropped) for everything pushed after
+        `cursor`. Pass the returned cursor back in on the next call.
+        """
+        seq = self._write_seq
+        dropped = 0
+        if seq - cursor > self.capacity:
+            dropped = seq - cursor - self.capacity
+            cursor = seq - self.capacity
+
+        start, end = cursor % self.capacity, seq % self.capacity
+        if cursor == seq:
+            samples = []
+        elif start < end:
+            samples = self._slots[start:end]
+        else:
+            samples = self._slots[start:] + self._slots[:end]
+
+        # the producer may have lapped us while we were copying
+        lapped = self._write_seq - cursor - self.capacity
+        if lapped > 0:
+            dropped += lapped
+            samples = samples[lapped:]
+        return samples, seq, dropped
+
+
+# --- Ingest worker ---
+
+TelemetrySource = Callable[[], Union[TelemetrySample, Iterable[TelemetrySample], None]]
+
+
+class TelemetryIngest(threading.Thread):
+    """
+    Background thread that pulls telemetry from `source` and pushes it into
+    a TelemetryRingBuffer, so decoding never runs on the Tk thread.
+
+    `source` is called in a loop and may return a single sample, an iterable
+    of samples or None. Blocking sources (sockets, serial links) should block
+    with a timeout; polling sources can be paced with `rate_hz`.
+
+    `listeners` are called on this thread with every list of new samples,
+    e.g. to record them; they must not touch Tk.
+    """
+
+    def __init__(self, source: TelemetrySource, ring: TelemetryRingBuffer, rate_hz: float = None,
+                 listeners: Iterable[Callable[[List[TelemetrySample]], None]] = ()):
+        super().__init__(daemon=True, name="telemetry-ingest")
+        self.source = source
+        self.ring = ring
+        self.listeners = list(listeners)
+        self.period = 1.0 / rate_hz if rate_hz else 0.0
+        self.received = 0
+        self.errors = 0
+        self._stop_event = threading.Event()
+
+    def stop(self, timeout: float = 1.0):
+        self._stop_event.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop_event.is_set()
+
+    def run(self):
+        next_time = time.perf_counter()
+        while not self._stop_event.is_set():
+            try:
+                result = self.source()
+            except Exception as err:
+                self.errors += 1
+                print(f"[telemetry] source error: {err}")
+                self._stop_event.wait(0.1)
+                continue
+
+            if result is not None:
+                samples = [result] if isinstance(result, TelemetrySample) else list(result)
+                if samples:
+                    self.ring.push_many(samples)
+                    self.received += len(samples)
+                    for listener in self.listeners:
+                        listener(samples)
+
+            if self.period:
+                next_time += self.period
+                delay = next_time - time.perf_counter()
+                if delay > 0:
+                    self._stop_event.wait(delay)
+                else:
+                    next_time = time.perf_counter()  # fell behind, don't try to catch up in a burst
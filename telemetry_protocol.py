@@ -0,0 +1,184 @@
+"""
+Binary telemetry link protocol, modelled on MAVLink v1 framing.
+
+Frame layout (little endian):
+
+    offset  size  field
+    0       1     magic (0xFD)
+    1       1     payload length
+    2       1     sequence number (wraps at 256)
+    3       2     drone id
+    5       1     message id
+    6       n     payload (struct packed, see MESSAGES)
+    6+n     2     CRC-16/CCITT over bytes 1 .. 6+n-1
+
+Several frames may share one UDP datagram.
+"""
+import binascii
+import socket
+import struct
+from typing import List, Optional
+
+from telemetry import TelemetrySample
+
+MAGIC = 0xFD
+HEADER = struct.Struct("<BBBHB")
+CHECKSUM = struct.Struct("<H")
+HEADER_SIZE = HEADER.size
+OVERHEAD = HEADER.size + CHECKSUM.size
+CRC_SEED = 0xFFFF
+
+MAX_DATAGRAM_SIZE = 65535
+DEFAULT_PORT = 14550
+
+# --- Messages ---
+
+MSG_TELEMETRY = 1
+# timestamp, state, gps, payload, lat*1e7, lon*1e7, altitude, speed, battery, eta
+TELEMETRY_PAYLOAD = struct.Struct("<dBBBiifffh")
+
+MESSAGES = {
+    MSG_TELEMETRY: TELEMETRY_PAYLOAD,
+}
+
+
+class ProtocolError(ValueError):
+    pass
+
+
+def encode_frame(msg_id: int, drone_id: int, seq: int, payload: bytes) -> bytes:
+    if len(payload) > 255:
+        raise ProtocolError(f"encode_frame: payload too long ({len(payload)} bytes)")
+    header = HEADER.pack(MAGIC, len(payload), seq & 0xFF, drone_id, msg_id)
+    crc = binascii.crc_hqx(payload, binascii.crc_hqx(header[1:], CRC_SEED))
+    return header + payload + CHECKSUM.pack(crc)
+
+
+def encode_telemetry(sample: TelemetrySample, seq: int = 0) -> bytes:
+    payload = TELEMETRY_PAYLOAD.pack(sample.timestamp, sample.state, sample.gps, sample.payload,
+                                     round(sample.lat * 1e7), round(sample.lon * 1e7),
+                                     sample.altitude, sample.speed, sample.battery, sample.eta)
+    return encode_frame(MSG_TELEMETRY, sample.drone_id, seq, payload)
+
+
+# --- Decoder ---
+
+class FrameDecoder:
+    """
+    Parses frames straight out of a receive buffer.
+
+    `decode` works on any bytes-like buffer (e.g. the bytearray a socket was
+    `recv_into`'d) through a memoryview and `struct.unpack_from`, so no bytes
+    are copied per frame; only the unpacked field values are created (a
+    buffer without `find`, such as a memoryview, is copied once if junk has
+    to be skipped). It takes the buffer as one whole datagram: a frame
+    running past its end counts as skipped bytes. `feed` instead keeps
+    partial frames between calls for stream links such as serial ports.
+    """
+
+    def __init__(self):
+        self.frames = 0
+        self.crc_errors = 0
+        self.unknown_messages = 0
+        self.skipped_bytes = 0
+        self._pending = bytearray()
+
+    def decode(self, buffer, length: int = None) -> List[TelemetrySample]:
+        samples, _ = self._decode(buffer, len(buffer) if length is None else length, final=True)
+        return samples
+
+    def feed(self, data) -> List[TelemetrySample]:
+        pending = self._pending
+        pending += data
+        samples, consumed = self._decode(pending, len(pending), final=False)
+        del pending[:consumed]
+        return samples
+
+    def _decode(self, buffer, length: int, final: bool):
+        """ `final`: no more data follows `buffer`, so an incomplete frame is junk rather than pending """
+        samples = []
+        append = samples.append
+        view = memoryview(buffer)
+        find = getattr(buffer, "find", None)
+        crc_hqx = binascii.crc_hqx
+        unpack_header = HEADER.unpack_from
+        unpack_crc = CHECKSUM.unpack_from
+        unpack_telemetry = TELEMETRY_PAYLOAD.unpack_from
+        offset = 0
+        try:
+            while length - offset >= OVERHEAD:
+                if view[offset] != MAGIC:
+                    if find is None:
+                        find = view[:length].tobytes().find
+                    next_magic = find(MAGIC, offset + 1, length)
+                    if next_magic < 0:
+                        self.skipped_bytes += length - offset
+                        offset = length
+                        break
+                    self.skipped_bytes += next_magic - offset
+                    offset = next_magic
+                    continue
+
+                _, payload_length, _, drone_id, msg_id = unpack_header(view, offset)
+                end = offset + HEADER_SIZE + payload_length
+                if end + CHECKSUM.size > length:
+                    if not final:
+                        break  # incomplete frame, wait for more data
+                    self.skipped_bytes += 1  # a stray magic byte, resync on the next one
+                    offset += 1
+                    continue
+
+                if crc_hqx(view[offset + 1:end], CRC_SEED) != unpack_crc(view, end)[0]:
+                    self.crc_errors += 1
+                    self.skipped_bytes += 1
+                    offset += 1  # resync on the next magic byte
+                    continue
+
+                if msg_id == MSG_TELEMETRY and payload_length == TELEMETRY_PAYLOAD.size:
+                    (timestamp, state, gps, payload, lat, lon,
+                     altitude, speed, battery, eta) = unpack_telemetry(view, offset + HEADER_SIZE)
+                    append(TelemetrySample(drone_id, timestamp, state, gps, payload,
+                                           lat * 1e-7, lon * 1e-7, altitude, speed, battery, eta))
+                    self.frames += 1
+                else:
+                    self.unknown_messages += 1
+                offset = end + CHECKSUM.size
+            if final:  # a tail too short to be a frame
+                self.skipped_bytes += length - offset
+                offset = length
+        finally:
+            view.release()
+        return samples, offset
+
+
+# --- UDP link ---
+
+class UdpTelemetrySource:
+    """
+    Receives telemetry datagrams on a UDP port. Instances are callables
+    returning a list of samples, so they plug into TelemetryIngest directly.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT, timeout: float = 0.2):
+        self.decoder = FrameDecoder()
+        self.datagrams = 0
+        self._buffer = bytearray(MAX_DATAGRAM_SIZE)
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        self._socket.bind((host, port))
+        self._socket.settimeout(timeout)
+
+    @property
+    def address(self) -> tuple:
+        return self._socket.getsockname()
+
+    def __call__(self) -> Optional[List[TelemetrySample]]:
+        try:
+            length = self._socket.recv_into(self._buffer)
+        except socket.timeout:
+            return None
+        self.datagrams += 1
+        return self.decoder.decode(self._buffer, length)
+
+    def close(self):
+        self._socket.close()
@@ -0,0 +1,156 @@
+"""
+Append-only telemetry recording.
+
+A flight is a directory of segment files. Each segment is a 16 byte header
+followed by raw TELEMETRY_DTYPE records, so a reader can memory-map it and
+use it as a NumPy structured array without parsing anything:
+
+    recordings/<flight id>/segment-000000.tlm
+    recordings/<flight id>/segment-000001.tlm
+"""
+import glob
+import os
+import struct
+import threading
+import time
+from datetime import datetime
+from typing import Iterable, List
+
+import numpy as np
+
+from fleet_state import TELEMETRY_DTYPE
+from telemetry import TelemetrySample
+
+SEGMENT_MAGIC = b"NTLM"
+SEGMENT_VERSION = 1
+SEGMENT_HEADER = struct.Struct("<4sHHd")  # magic, version, record size, created (epoch seconds)
+SEGMENT_SUFFIX = ".tlm"
+
+
+class RecordingError(Exception):
+    pass
+
+
+# --- Writer ---
+
+class TelemetryRecorder:
+    """
+    Records telemetry for one flight.
+
+    `append` only extends an in-memory list under a lock, so it is safe and
+    cheap to call from the ingest thread. A writer thread converts whatever
+    accumulated into one structured array every `flush_interval` seconds,
+    writes it with a single call, fsyncs every `fsync_interval` seconds and
+    starts a new segment after `segment_records` records.
+    """
+
+    def __init__(self, directory: str, flight_id: str = None, segment_records: int = 1_000_000,
+                 flush_interval: float = 0.5, fsync_interval: float = 5.0):
+        if flight_id is None:
+            flight_id = datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.flight_dir = os.path.join(directory, flight_id)
+        os.makedirs(self.flight_dir, exist_ok=True)
+
+        self.segment_records = segment_records
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+
+        self.records_written = 0
+        self.batches_written = 0
+        self._pending: List[TelemetrySample] = []
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+        self._segment_index = len(list_segments(self.flight_dir))
+        self._segment_file = None
+        self._segment_count = 0
+        self._last_fsync = time.monotonic()
+
+        self._thread = threading.Thread(daemon=True, name="telemetry-recorder", target=self._run)
+        self._thread.start()
+
+    def append(self, samples: Iterable[TelemetrySample]):
+        with self._lock:
+            self._pending.extend(samples)
+
+    def close(self):
+        """ writes out everything still pending, fsyncs and closes the segment """
+        self._stop_event.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop_event.wait(self.flush_interval):
+            self._flush()
+        self._flush()
+        if self._segment_file is not None:
+            self._sync()
+            self._segment_file.close()
+            self._segment_file = None
+
+    def _flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if pending:
+            self._write(np.array(pending, dtype=TELEMETRY_DTYPE))
+        if self._segment_file is not None and time.monotonic() - self._last_fsync >= self.fsync_interval:
+            self._sync()
+
+    def _write(self, records: np.ndarray):
+        while len(records):
+            if self._segment_file is None or self._segment_count >= self.segment_records:
+                self._open_segment()
+            room = self.segment_records - self._segment_count
+            chunk, records = records[:room], records[room:]
+            self._segment_file.write(chunk.tobytes())
+            self._segment_count += len(chunk)
+            self.records_written += len(chunk)
+        self.batches_written += 1
+
+    def _open_segment(self):
+        if self._segment_file is not None:
+            self._sync()
+            self._segment_file.close()
+        path = os.path.join(self.flight_dir, f"segment-{self._segment_index:06d}{SEGMENT_SUFFIX}")
+        self._segment_index += 1
+        self._segment_file = open(path, "wb")
+        self._segment_file.write(SEGMENT_HEADER.pack(SEGMENT_MAGIC, SEGMENT_VERSION, TELEMETRY_DTYPE.itemsize, time.time()))
+        self._segment_count = 0
+
+    def _sync(self):
+        self._segment_file.flush()
+        os.fsync(self._segment_file.fileno())
+        self._last_fsync = time.monotonic()
+
+
+# --- Reader ---
+
+def list_segments(flight_dir: str) -> List[str]:
+    return sorted(glob.glob(os.path.join(flight_dir, f"segment-*{SEGMENT_SUFFIX}")))
+
+
+def list_flights(directory: str) -> List[str]:
+    return sorted(path for path in glob.glob(os.path.join(directory, "*")) if list_segments(path))
+
+
+def open_segment(path: str) -> np.ndarray:
+    """
+    Memory-maps a segment as a read-only TELEMETRY_DTYPE array. A partially
+    written trailing record (e.g. after a crash) is left out.
+    """
+    with open(path, "rb") as f:
+        header = f.read(SEGMENT_HEADER.size)
+    if len(header) < SEGMENT_HEADER.size:
+        raise RecordingError(f"open_segment: {path} is too short for a segment header")
+    magic, version, record_size, _ = SEGMENT_HEADER.unpack(header)
+    if magic != SEGMENT_MAGIC or version != SEGMENT_VERSION or record_size != TELEMETRY_DTYPE.itemsize:
+        raise RecordingError(f"open_segment: {path} is not a version {SEGMENT_VERSION} telemetry segment")
+
+    count = (os.path.getsize(path) - SEGMENT_HEADER.size) // record_size
+    if count == 0:
+        return np.empty(0, dtype=TELEMETRY_DTYPE)
+    return np.memmap(path, dtype=TELEMETRY_DTYPE, mode="r", offset=SEGMENT_HEADER.size, shape=(count,))
+
+
+def open_flight(flight_dir: str) -> List[np.ndarray]:
+    """ memory-maps every segment of a flight, in recording order """
+    return [open_segment(path) for path in list_segments(flight_dir)]
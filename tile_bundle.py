@@ -0,0 +1,317 @@
+"""
+Builds offline map bundles (MBTiles files for OFFLINE_TILES_DIR) from a
+tile server.
+
+    python tile_bundle.py map_tiles/delhi.mbtiles --bbox 76.95,28.45,77.45,28.80 --zooms 10-17 \
+        --server "https://tiles.example.com/{z}/{x}/{y}.png" --workers 8
+
+The area is a bounding box (west,south,east,north) or a polygon of lat,lon
+points. Tiles are fetched by a bounded pool of worker threads and written
+by one thread in batched transactions. The bundle is its own checkpoint:
+running the same command again skips every tile already in it (and every
+tile the server had no image for), so an interrupted build resumes where it
+stopped. Only use servers whose terms allow bulk downloads; the public
+OpenStreetMap tile servers don't.
+"""
+import argparse
+import math
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import requests
+
+from map_tiles import corridor_tiles
+from mbtiles import MBTilesError
+from projection import decimal_to_osm
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tiles (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB);
+CREATE UNIQUE INDEX IF NOT EXISTS tile_index ON tiles (zoom_level, tile_column, tile_row);
+CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT);
+-- tiles the server answered without an image (404, empty ocean tiles, ...), XYZ rows; not asked for again
+CREATE TABLE IF NOT EXISTS bundle_missing (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER,
+                                           PRIMARY KEY (zoom_level, tile_column, tile_row)) WITHOUT ROWID;
+"""
+
+REQUEST_TIMEOUT = 20  # seconds
+RETRIES = 3
+# Content-Type -> MBTiles "format" metadata
+TILE_FORMATS = {"image/png": "png", "image/jpeg": "jpg", "image/jpg": "jpg", "image/webp": "webp"}
+
+
+class BuildStats(NamedTuple):
+    planned: int
+    skipped: int  # already in the bundle
+    fetched: int
+    missing: int  # no image on the server
+    failed: int  # gave up after RETRIES, fetched on the next run
+    bytes: int
+    seconds: float
+
+    @property
+    def tiles_per_second(self) -> float:
+        return self.fetched / self.seconds if self.seconds else 0.0
+
+
+# --- Area to tiles ---
+
+def bbox_polygon(west: float, south: float, east: float, north: float) -> List[Tuple[float, float]]:
+    """ (lat, lon) ring of a bounding box """
+    return [(south, west), (south, east), (north, east), (north, west)]
+
+
+def area_tiles(polygon: Sequence[Tuple[float, float]], zoom: int) -> np.ndarray:
+    """
+    (x, y) of every tile at `zoom` that overlaps `polygon` ((lat, lon)
+    points): tiles whose center is inside, plus every tile the outline
+    passes through.
+    """
+    ring = np.asarray(polygon, dtype=np.float64)
+    px, py = decimal_to_osm(ring[:, 0], ring[:, 1], zoom)
+    xs = np.arange(int(px.min()), int(px.max()) + 1)
+    ys = np.arange(int(py.min()), int(py.max()) + 1)
+    cx, cy = np.meshgrid(xs + 0.5, ys + 0.5)
+    cx, cy = cx.ravel(), cy.ravel()
+
+    # even-odd rule, all tile centers against one edge at a time
+    inside = np.zeros(cx.shape, dtype=bool)
+    for x0, y0, x1, y1 in zip(px, py, np.roll(px, -1), np.roll(py, -1)):
+        if y0 == y1:
+            continue
+        crosses = (y0 > cy) != (y1 > cy)
+        inside ^= crosses & (cx < x0 + (cy - y0) * (x1 - x0) / (y1 - y0))
+    tiles = np.column_stack((cx[inside], cy[inside])).astype(np.int64)
+
+    outline = corridor_tiles(list(ring) + [ring[0]], zoom, 0.0)
+    return np.unique(np.concatenate((tiles, outline)), axis=0)
+
+
+def plan_tiles(polygon: Sequence[Tuple[float, float]], min_zoom: int, max_zoom: int) -> Iterator[Tuple[int, int, int]]:
+    """ (zoom, x, y) of the bundle, zoom level by zoom level, so an early stop still leaves a usable overview """
+    for zoom in range(min_zoom, max_zoom + 1):
+        for x, y in area_tiles(polygon, zoom).tolist():
+            yield zoom, x, y
+
+
+# --- Builder ---
+
+class TileBundleBuilder:
+    """
+    Downloads tiles from `server` (a "{z}/{x}/{y}" URL template) into the
+    MBTiles file at `path`, creating it if needed.
+
+    `workers` threads fetch with their own HTTP sessions; they take tiles
+    from a queue at most 4 * workers long, so planning never runs far ahead
+    of the downloads. The calling thread writes the results and commits
+    every `commit_every` tiles; anything not committed when the build is
+    interrupted is simply fetched again on the next run.
+    """
+
+    def __init__(self, path: str, server: str, workers: int = 8, commit_every: int = 200,
+                 name: str = None, report_interval: float = 5.0):
+        self.path = path
+        self.server = server
+        self.workers = workers
+        self.commit_every = commit_every
+        self.report_interval = report_interval
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+        metadata = dict(self.connection.execute("SELECT name, value FROM metadata"))
+        if metadata.get("bundle_server", server) != server:
+            raise MBTilesError(f"{path} was built from {metadata['bundle_server']}, not {server}")
+        with self.connection:
+            self.connection.executemany("INSERT OR IGNORE INTO metadata (name, value) VALUES (?, ?)",
+                                        [("name", name or os.path.splitext(os.path.basename(path))[0]),
+                                         ("type", "baselayer"), ("version", "1"), ("bundle_server", server)])
+        self.format = None  # from the Content-Type of the first tile fetched, written with the zoom metadata
+        self._stop = threading.Event()
+
+    def stop(self):
+        """ ends build() after the tiles in flight (from any thread) """
+        self._stop.set()
+
+    def existing(self, zoom: int) -> set:
+        """ (x, y) at `zoom` that need no download: in the bundle, or known to be missing on the server """
+        rows = self.connection.execute("SELECT tile_column, (1 << zoom_level) - 1 - tile_row FROM tiles "
+                                       "WHERE zoom_level=?", (zoom,)).fetchall()
+        rows += self.connection.execute("SELECT tile_column, tile_row FROM bundle_missing WHERE zoom_level=?",
+                                        (zoom,)).fetchall()
+        return set(rows)
+
+    def build(self, polygon: Sequence[Tuple[float, float]], min_zoom: int, max_zoom: int,
+              limit: int = None) -> BuildStats:
+        """ fetches every tile of `polygon` at min_zoom .. max_zoom not yet in the bundle (at most `limit`) """
+        tasks: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=self.workers * 4)
+        results: "queue.Queue[tuple]" = queue.Queue()
+        threads = [threading.Thread(daemon=True, name=f"bundle-fetch-{i}", target=self._fetch_loop,
+                                    args=(tasks, results)) for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+
+        counts = dict(planned=0, skipped=0, fetched=0, missing=0, failed=0, bytes=0)
+        started = last_report = time.perf_counter()
+        in_flight = uncommitted = 0
+        done_zoom, existing = None, set()
+
+        def drain(block: bool):
+            nonlocal in_flight, uncommitted
+            while in_flight:
+                try:
+                    (zoom, x, y), status, data, content_type = results.get(block=block, timeout=0.5 if block else None)
+                except queue.Empty:
+                    return
+                in_flight -= 1
+                block = False
+                if status == "ok":
+                    self.connection.execute("INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?)",
+                                            (zoom, x, (1 << zoom) - 1 - y, data))  # XYZ -> TMS row
+                    counts["fetched"] += 1
+                    counts["bytes"] += len(data)
+                    if self.format is None:
+                        self.format = TILE_FORMATS.get(content_type, content_type.partition("/")[2] or "png")
+                elif status == "missing":
+                    self.connection.execute("INSERT OR IGNORE INTO bundle_missing VALUES (?, ?, ?)", (zoom, x, y))
+                    counts["missing"] += 1
+                else:
+                    counts["failed"] += 1
+                uncommitted += 1
+                if uncommitted >= self.commit_every:
+                    self.connection.commit()
+                    uncommitted = 0
+
+        try:
+            for zoom, x, y in plan_tiles(polygon, min_zoom, max_zoom):
+                if zoom != done_zoom:
+                    done_zoom, existing = zoom, self.existing(zoom)
+                counts["planned"] += 1
+                if (x, y) in existing:
+                    counts["skipped"] += 1
+                    continue
+                if self._stop.is_set() or (limit is not None and counts["planned"] - counts["skipped"] > limit):
+                    break
+                while True:
+                    try:
+                        tasks.put((zoom, x, y), timeout=0.5)
+                        break
+                    except queue.Full:
+                        drain(block=True)
+                in_flight += 1
+                drain(block=False)
+                if time.perf_counter() - last_report >= self.report_interval:
+                    last_report = time.perf_counter()
+                    self._report(counts, last_report - started)
+            while in_flight:
+                drain(block=True)
+        except KeyboardInterrupt:
+            print("[bundle] interrupted, saving progress; run again to resume")
+            self._stop.set()
+            while in_flight:
+                drain(block=True)
+        finally:
+            for _ in threads:
+                tasks.put(None)
+            self._write_zoom_metadata()
+            self.connection.commit()
+
+        stats = BuildStats(seconds=time.perf_counter() - started, **counts)
+        self._report(counts, stats.seconds)
+        return stats
+
+    def close(self):
+        self.connection.close()
+
+    def _fetch_loop(self, tasks: queue.Queue, results: queue.Queue):
+        session = requests.Session()
+        session.headers["User-Agent"] = "Drone-GUI tile bundle builder"
+        while True:
+            tile = tasks.get()
+            if tile is None:
+                session.close()
+                return
+            results.put((tile, *self._fetch(session, *tile)))
+
+    def _fetch(self, session: requests.Session, zoom: int, x: int, y: int) -> tuple:
+        url = self.server.replace("{x}", str(x)).replace("{y}", str(y)).replace("{z}", str(zoom))
+        for attempt in range(RETRIES):
+            try:
+                response = session.get(url, timeout=REQUEST_TIMEOUT)
+                if response.status_code == 404 or response.status_code == 204:
+                    return "missing", None, None
+                content_type = response.headers.get("Content-Type", "image/png").partition(";")[0].strip().lower()
+                if response.ok and content_type.startswith("image"):
+                    return "ok", response.content, content_type
+            except requests.RequestException:
+                pass
+            if self._stop.is_set():
+                break
+            time.sleep(0.5 * 2 ** attempt)  # 429, 5xx, timeouts: back off
+        return "failed", None, None
+
+    def _write_zoom_metadata(self):
+        if self.format is not None:
+            self.connection.execute("INSERT OR REPLACE INTO metadata (name, value) VALUES ('format', ?)",
+                                    (self.format,))
+        min_zoom, max_zoom = self.connection.execute("SELECT MIN(zoom_level), MAX(zoom_level) FROM tiles").fetchone()
+        if min_zoom is None:
+            return
+        west, south, east, north = self._bounds(max_zoom)
+        self.connection.executemany("INSERT OR REPLACE INTO metadata (name, value) VALUES (?, ?)",
+                                    [("minzoom", str(min_zoom)), ("maxzoom", str(max_zoom)),
+                                     ("bounds", f"{west:.6f},{south:.6f},{east:.6f},{north:.6f}")])
+
+    def _bounds(self, zoom: int) -> tuple:
+        x0, x1, row0, row1 = self.connection.execute(
+            "SELECT MIN(tile_column), MAX(tile_column), MIN(tile_row), MAX(tile_row) FROM tiles WHERE zoom_level=?",
+            (zoom,)).fetchone()
+        n = 1 << zoom
+        y_top, y_bottom = n - 1 - row1, n - 1 - row0  # TMS -> XYZ
+
+        def lat(row):
+            return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+        return x0 / n * 360.0 - 180.0, lat(y_bottom + 1), (x1 + 1) / n * 360.0 - 180.0, lat(y_top)
+
+    @staticmethod
+    def _report(counts: dict, seconds: float):
+        rate = counts["fetched"] / seconds if seconds else 0.0
+        print(f"[bundle] {counts['fetched']:,} fetched ({counts['bytes'] / 1e6:,.1f} MB, {rate:,.1f} tiles/s), "
+              f"{counts['skipped']:,} already present, {counts['missing']:,} missing, {counts['failed']:,} failed, "
+              f"{counts['planned']:,} planned so far, {seconds:,.0f} s")
+
+
+def parse_zooms(text: str) -> Tuple[int, int]:
+    """ "10-17" -> (10, 17), "14" -> (14, 14) """
+    low, _, high = text.partition("-")
+    return int(low), int(high or low)
+
+
+def parse_polygon(text: str) -> List[Tuple[float, float]]:
+    """ "28.6,77.1 28.7,77.2 28.5,77.3" -> [(28.6, 77.1), ...] """
+    return [tuple(float(value) for value in point.split(",")) for point in text.split()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="MBTiles file to create or resume")
+    area = parser.add_mutually_exclusive_group(required=True)
+    area.add_argument("--bbox", help="west,south,east,north in degrees")
+    area.add_argument("--polygon", help='lat,lon points separated by spaces, e.g. "28.6,77.1 28.7,77.2 28.5,77.3"')
+    parser.add_argument("--zooms", default="10-17", help="zoom range, e.g. 10-17")
+    parser.add_argument("--server", required=True, help="tile URL template with {z}, {x} and {y}")
+    parser.add_argument("--workers", type=int, default=8, help="parallel downloads")
+    parser.add_argument("--limit", type=int, default=None, help="stop after this many downloads")
+    parser.add_argument("--name", default=None, help="bundle name in the metadata")
+    args = parser.parse_args()
+
+    polygon = bbox_polygon(*map(float, args.bbox.split(","))) if args.bbox else parse_polygon(args.polygon)
+    builder = TileBundleBuilder(args.path, args.server, args.workers, name=args.name)
+    try:
+        builder.build(polygon, *parse_zooms(args.zooms), limit=args.limit)
+    finally:
+        builder.close()
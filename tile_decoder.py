@@ -0,0 +1,172 @@
+"""
+Tile decoding in worker processes.
+
+Decoding a PNG tile (and scaling an overzoomed or overlaid one) holds the
+GIL for a millisecond or more, so the map's loader threads decoding tiles
+slow down the Tk thread exactly when the user zooms. TileDecoder does that
+work in a process pool. The workers write the RGBA pixels into slots of one
+shared memory block, so only the small encoded tile crosses a pipe; the Tk
+thread turns a slot into a PhotoImage (one copy into Tk) and frees it.
+"""
+import io
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+from PIL import Image, ImageTk
+
+
+class DecodedTile:
+    """
+    A decoded tile waiting in its shared memory slot. `photo_image` (Tk
+    thread only) copies it into Tk and frees the slot; a tile that is
+    dropped instead frees its slot when it is garbage collected.
+    """
+
+    __slots__ = ("decoder", "slot", "size", "background")
+
+    def __init__(self, decoder: "TileDecoder", slot: int, size: Tuple[int, int], background: bool = False):
+        self.decoder = decoder
+        self.slot = slot
+        self.size = size
+        self.background = background
+
+    @property
+    def nbytes(self) -> int:
+        return self.size[0] * self.size[1] * 4
+
+    def _view(self) -> Image.Image:
+        # shares the slot's memory, only valid until the slot is freed
+        return Image.frombuffer("RGBA", self.size, self.decoder.slot_view(self.slot, self.nbytes), "raw", "RGBA", 0, 1)
+
+    def image(self) -> Image.Image:
+        """ a copy of the pixels as a PIL image; frees the slot """
+        image = self._view().copy()
+        self.release()
+        return image
+
+    def photo_image(self) -> ImageTk.PhotoImage:
+        """ the tile as a PhotoImage (Tk thread only); frees the slot """
+        image_tk = ImageTk.PhotoImage(self._view())  # copies the pixels into Tk
+        self.release()
+        return image_tk
+
+    def release(self):
+        if self.slot is not None:
+            self.decoder.free_slot(self.slot, self.background)
+            self.slot = None
+
+    def __del__(self):
+        self.release()
+
+
+# --- worker side ---
+
+_worker_memory: Optional[shared_memory.SharedMemory] = None
+
+
+def _attach(name: str):
+    global _worker_memory
+    _worker_memory = shared_memory.SharedMemory(name=name)
+
+
+def _decode_into(buffer, offset: int, data: bytes, tile_size: int, box: Optional[tuple],
+                 overlay: Optional[bytes]) -> Tuple[int, int]:
+    """ decodes `data` (cropped to `box`, scaled to the tile size, `overlay` pasted on top) into buffer[offset:] """
+    image = Image.open(io.BytesIO(data))
+    if box is not None:
+        image = image.crop(box)
+    image = image.convert("RGBA")
+    if image.size != (tile_size, tile_size):
+        image = image.resize((tile_size, tile_size), Image.BILINEAR)
+    if overlay is not None:
+        overlay_image = Image.open(io.BytesIO(overlay)).convert("RGBA")
+        if overlay_image.size != image.size:
+            overlay_image = overlay_image.resize(image.size, Image.LANCZOS)
+        image.paste(overlay_image, (0, 0), overlay_image)
+    pixels = image.tobytes()
+    buffer[offset:offset + len(pixels)] = pixels
+    return image.size
+
+
+def _decode_in_worker(offset: int, data: bytes, tile_size: int, box, overlay) -> Tuple[int, int]:
+    return _decode_into(_worker_memory.buf, offset, data, tile_size, box, overlay)
+
+
+# --- main process side ---
+
+class TileDecoder:
+    """
+    Decodes encoded tiles into `slots` shared memory slots of
+    tile_size x tile_size RGBA, on `processes` worker processes (0 decodes
+    on the calling thread, e.g. where processes can't be started).
+
+    `decode` blocks the calling loader thread until a slot is free and the
+    tile is decoded; the slots bound both the shared memory and how far the
+    loaders can run ahead of the Tk thread. Background decodes (prefetching)
+    get at most half of the slots, so they never hold up visible tiles.
+    Raises PIL.UnidentifiedImageError for data that isn't an image.
+    """
+
+    def __init__(self, tile_size: int = 256, processes: int = 2, slots: int = 64):
+        self.tile_size = tile_size
+        self.slot_bytes = tile_size * tile_size * 4
+        self.slots = slots
+        self.decoded = 0
+        self._memory = shared_memory.SharedMemory(create=True, size=self.slot_bytes * slots)
+        self._free: "queue.Queue[int]" = queue.Queue()
+        for slot in range(slots):
+            self._free.put(slot)
+        self._background = threading.BoundedSemaphore(max(slots // 2, 1))
+        self._lock = threading.Lock()
+        self._pool = None
+        if processes > 0:
+            # spawned, not forked: the pool starts its workers on the first submit, from a map loader thread,
+            # and forking while Tk and the other loader threads run can deadlock the child
+            self._pool = ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context("spawn"),
+                                             initializer=_attach, initargs=(self._memory.name,))
+
+    @property
+    def free_slots(self) -> int:
+        return self._free.qsize()
+
+    def decode(self, data: bytes, box: tuple = None, overlay: bytes = None, background: bool = False) -> DecodedTile:
+        """ `box` crops the decoded image before it is scaled to the tile size, `overlay` is pasted on top """
+        if background:
+            self._background.acquire()
+        slot = self._free.get()
+        try:
+            offset = slot * self.slot_bytes
+            if self._pool is not None:
+                size = self._pool.submit(_decode_in_worker, offset, data, self.tile_size, box, overlay).result()
+            else:
+                size = _decode_into(self._memory.buf, offset, data, self.tile_size, box, overlay)
+        except BaseException:
+            self.free_slot(slot, background)
+            raise
+        with self._lock:
+            self.decoded += 1
+        return DecodedTile(self, slot, size, background)
+
+    def slot_view(self, slot: int, nbytes: int) -> memoryview:
+        offset = slot * self.slot_bytes
+        return self._memory.buf[offset:offset + nbytes]
+
+    def free_slot(self, slot: int, background: bool = False):
+        self._free.put(slot)
+        if background:
+            self._background.release()
+
+    def close(self):
+        """ stops the workers; tiles still waiting in slots must not be used afterwards """
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        try:
+            self._memory.close()
+            self._memory.unlink()
+        except BufferError:  # a slot view is still alive, the OS frees the block at exit
+            pass
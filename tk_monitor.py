@@ -0,0 +1,350 @@
+"""
+Diagnostics for the Tk event loop.
+
+LagMonitor schedules a high-frequency `after` probe and records how late it
+runs. A late probe means some callback held the Tk thread; a watchdog thread
+samples the Tk thread's stack while that happens so the culprit can be named.
+
+CallbackProfiler times every callback Tk dispatches into Python (button
+commands, `after` jobs, event bindings), keeps per-callback statistics and
+warns about callbacks over a frame budget, like asyncio's slow callback
+debug mode.
+"""
+import bisect
+import functools
+import logging
+import math
+import os
+import sys
+import threading
+import time
+import tkinter
+from typing import Dict, List, Optional, TextIO
+
+logger = logging.getLogger(__name__)
+
+_TKINTER_DIR = os.path.dirname(tkinter.__file__)
+
+
+# --- Histogram ---
+
+class LagHistogram:
+    """ Log-bucketed histogram of lag values in milliseconds (~5% resolution, 0.01 ms .. 60 s). """
+
+    GROWTH = 1.05
+    MIN_MS = 0.01
+    MAX_MS = 60_000.0
+
+    def __init__(self):
+        bucket_count = int(math.log(self.MAX_MS / self.MIN_MS, self.GROWTH)) + 2
+        self._edges = [self.MIN_MS * self.GROWTH ** i for i in range(bucket_count)]
+        self._counts = [0] * (bucket_count + 1)
+        self.count = 0
+        self.max = 0.0
+
+    def record(self, value_ms: float):
+        self._counts[bisect.bisect_left(self._edges, value_ms)] += 1
+        self.count += 1
+        if value_ms > self.max:
+            self.max = value_ms
+
+    def percentile(self, pct: float) -> float:
+        """ upper edge of the bucket holding the pct-th percentile (0 if empty) """
+        if self.count == 0:
+            return 0.0
+        rank = math.ceil(self.count * pct / 100)
+        seen = 0
+        for i, count in enumerate(self._counts):
+            seen += count
+            if seen >= rank:
+                return min(self._edges[min(i, len(self._edges) - 1)], self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        return {"count": self.count, "p50": self.percentile(50), "p95": self.percentile(95),
+                "p99": self.percentile(99), "max": self.max}
+
+    def reset(self):
+        self._counts = [0] * len(self._counts)
+        self.count = 0
+        self.max = 0.0
+
+
+def describe_callback(frame) -> str:
+    """
+    Names the Tk callback a stack belongs to: the first frame called from
+    tkinter's dispatch code (e.g. a button command or an `after` job), plus
+    the innermost line currently executing.
+    """
+    stack = []
+    while frame is not None:
+        stack.append(frame)
+        frame = frame.f_back
+    stack.reverse()  # outermost first
+
+    callback = None
+    inside_tkinter = False
+    for frame in stack:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_TKINTER_DIR) or filename == __file__:  # dispatch code, incl. the profiler
+            inside_tkinter = True
+        elif inside_tkinter:
+            callback = frame
+            break
+    innermost = stack[-1] if stack else None
+    if callback is None:
+        callback = innermost
+    if callback is None:
+        return "<unknown>"
+
+    name = f"{callback.f_code.co_name} ({os.path.basename(callback.f_code.co_filename)}:{callback.f_lineno})"
+    if innermost is not None and innermost is not callback:
+        name += f" -> {innermost.f_code.co_name} ({os.path.basename(innermost.f_code.co_filename)}:{innermost.f_lineno})"
+    return name
+
+
+# --- Lag monitor ---
+
+class LagMonitor:
+    """
+    Measures Tk scheduling lag: how much later than requested an `after`
+    probe actually runs. Every probe feeds `histogram`; any lag above
+    `spike_ms` is logged together with the callback that was running.
+    """
+
+    def __init__(self, widget, interval_ms: int = 10, spike_ms: float = 50.0):
+        self.widget = widget
+        self.interval_ms = interval_ms
+        self.spike_ms = spike_ms
+        self.histogram = LagHistogram()
+        self.spikes = 0
+        self.last_spike: Optional[str] = None
+
+        self._main_thread_id = threading.get_ident()
+        self._expected = None  # perf_counter time the next probe is due
+        self._stall_callback: Optional[str] = None  # set by the watchdog during a stall
+        self._running = False
+        self._job = None
+        self._watchdog = None
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._schedule()
+        self._watchdog = threading.Thread(daemon=True, name="tk-lag-watchdog", target=self._watch)
+        self._watchdog.start()
+
+    def stop(self):
+        self._running = False
+        if self._job is not None:
+            try:
+                self.widget.after_cancel(self._job)
+            except tkinter.TclError:
+                pass
+            self._job = None
+
+    def _schedule(self):
+        self._expected = time.perf_counter() + self.interval_ms / 1000
+        self._job = self.widget.after(self.interval_ms, self._probe)
+
+    def _probe(self):
+        lag_ms = max(0.0, (time.perf_counter() - self._expected) * 1000)
+        self.histogram.record(lag_ms)
+        if lag_ms >= self.spike_ms:
+            self.spikes += 1
+            self.last_spike = self._stall_callback or "<not sampled>"
+            logger.warning("Tk event loop lagged %.1f ms while running %s", lag_ms, self.last_spike)
+        self._stall_callback = None
+        if self._running:
+            self._schedule()
+
+    def _watch(self):
+        """ samples the Tk thread's stack once a probe is overdue by more than half the spike threshold """
+        check_interval = self.spike_ms / 2000
+        while self._running:
+            time.sleep(check_interval)
+            expected = self._expected
+            if expected is None or self._stall_callback is not None:
+                continue
+            if (time.perf_counter() - expected) * 1000 >= self.spike_ms / 2:
+                frame = sys._current_frames().get(self._main_thread_id)
+                if frame is not None:
+                    self._stall_callback = describe_callback(frame)
+
+    def summary_text(self) -> str:
+        s = self.histogram.summary()
+        return f"lag p50 {s['p50']:.1f} | p95 {s['p95']:.1f} | p99 {s['p99']:.1f} | max {s['max']:.0f} ms"
+
+
+class LagHud:
+    """
+    Optional header overlay showing the LagMonitor percentiles. Toggled with
+    `toggle()`; refreshes twice a second while visible.
+    """
+
+    def __init__(self, label, monitor: LagMonitor, refresh_ms: int = 500):
+        self.label = label
+        self.monitor = monitor
+        self.refresh_ms = refresh_ms
+        self.visible = False
+        self._job = None
+        label.grid_remove()
+
+    def toggle(self, event=None):
+        if self.visible:
+            self.visible = False
+            self.label.grid_remove()
+            if self._job is not None:
+                self.label.after_cancel(self._job)
+                self._job = None
+        else:
+            self.visible = True
+            self.label.grid()
+            self._refresh()
+
+    def _refresh(self):
+        if not self.visible or not self.label.winfo_exists():
+            return
+        self.label.config(text=self.monitor.summary_text(),
+                          bootstyle="danger" if self.monitor.histogram.percentile(99) >= self.monitor.spike_ms else "light")
+        self._job = self.label.after(self.refresh_ms, self._refresh)
+
+
+# --- Callback profiler ---
+
+def callback_name(func) -> str:
+    """ readable, stable name of a Tk callback, e.g. "main_app.render_tick" """
+    code = getattr(func, "__code__", None)
+    if code is not None and code.co_name == "callit" and func.__closure__:
+        # Misc.after() wraps the job in a `callit` closure, report the job itself
+        free_vars = dict(zip(code.co_freevars, func.__closure__))
+        if "func" in free_vars:
+            return callback_name(free_vars["func"].cell_contents)
+
+    target = getattr(func, "__func__", func)  # unwrap bound methods
+    if isinstance(target, functools.partial):
+        return callback_name(target.func)
+    qualname = getattr(target, "__qualname__", None) or type(target).__qualname__
+    module = getattr(target, "__module__", None) or type(target).__module__
+    name = f"{module}.{qualname}"
+    if getattr(target, "__name__", None) == "<lambda>":
+        name += f" ({os.path.basename(target.__code__.co_filename)}:{target.__code__.co_firstlineno})"
+    return name
+
+
+class CallbackStats:
+    __slots__ = ("calls", "total_ms", "max_ms", "over_budget")
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.over_budget = 0
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.calls if self.calls else 0.0
+
+
+class CallbackProfiler:
+    """
+    Times every Python callback Tk dispatches while installed.
+
+    `install()` patches tkinter.CallWrapper.__call__, the single entry point
+    Tk uses to call Python, so every callback dispatched while the profiler
+    is installed is timed, whenever it was registered. Calls slower than
+    `budget_ms` are logged. `report()` / `dump()` return or print the
+    aggregate table.
+    """
+
+    def __init__(self, budget_ms: float = 16.0):
+        self.budget_ms = budget_ms
+        self.stats: Dict[str, CallbackStats] = {}
+        self.current: Optional[str] = None  # callback running right now, if any
+        self._original_call = None
+
+    def install(self):
+        global _active_profiler
+        if self._original_call is not None:
+            return
+        if _active_profiler is not None:
+            _active_profiler.uninstall()
+        self._original_call = tkinter.CallWrapper.__call__
+        _active_profiler = self
+        tkinter.CallWrapper.__call__ = _profiled_call
+
+    def uninstall(self):
+        global _active_profiler
+        if self._original_call is None:
+            return
+        tkinter.CallWrapper.__call__ = self._original_call
+        self._original_call = None
+        if _active_profiler is self:
+            _active_profiler = None
+
+    def wrap(self, func, name: str = None):
+        """ times calls of `func` that don't go through Tk (e.g. direct calls from other code) """
+        name = name or callback_name(func)
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            previous, self.current = self.current, name
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.current = previous
+                self.record(name, (time.perf_counter() - start) * 1000)
+        return timed
+
+    def record(self, name: str, elapsed_ms: float):
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = CallbackStats()
+        stats.calls += 1
+        stats.total_ms += elapsed_ms
+        if elapsed_ms > stats.max_ms:
+            stats.max_ms = elapsed_ms
+        if elapsed_ms > self.budget_ms:
+            stats.over_budget += 1
+            logger.warning("Slow Tk callback %s took %.1f ms (budget %.0f ms)", name, elapsed_ms, self.budget_ms)
+
+    def reset(self):
+        self.stats.clear()
+
+    def report(self, sort_by: str = "total_ms") -> List[dict]:
+        rows = [{"callback": name, "calls": s.calls, "total_ms": s.total_ms, "mean_ms": s.mean_ms,
+                 "max_ms": s.max_ms, "over_budget": s.over_budget} for name, s in self.stats.items()]
+        rows.sort(key=lambda row: row[sort_by], reverse=True)
+        return rows
+
+    def dump(self, file: TextIO = None, sort_by: str = "total_ms"):
+        file = file or sys.stdout
+        rows = self.report(sort_by)
+        width = max([len(row["callback"]) for row in rows] + [len("callback")])
+        print(f"{'callback':<{width}}  {'calls':>8}  {'total ms':>10}  {'mean ms':>8}  {'max ms':>8}  "
+              f"{f'>{self.budget_ms:g} ms':>8}", file=file)
+        for row in rows:
+            print(f"{row['callback']:<{width}}  {row['calls']:>8}  {row['total_ms']:>10.1f}  {row['mean_ms']:>8.2f}  "
+                  f"{row['max_ms']:>8.1f}  {row['over_budget']:>8}", file=file)
+
+
+_active_profiler: Optional[CallbackProfiler] = None
+
+
+def _profiled_call(wrapper, *args):
+    profiler = _active_profiler
+    if profiler is None or profiler._original_call is None:
+        return _unprofiled_call(wrapper, *args)
+    name = callback_name(wrapper.func)
+    previous, profiler.current = profiler.current, name
+    start = time.perf_counter()
+    try:
+        return profiler._original_call(wrapper, *args)
+    finally:
+        profiler.current = previous
+        profiler.record(name, (time.perf_counter() - start) * 1000)
+
+
+_unprofiled_call = tkinter.CallWrapper.__call__
@@ -0,0 +1,77 @@
+"""
+Local drone simulator that streams binary telemetry frames over UDP.
+
+    python udp_simulator.py --drones 50 --rate 20 --port 14550
+
+Use --rate 0 to send as fast as possible (for benchmarking the receiver).
+The fleet is simulated by DroneSimulator with a fixed step of 1 / rate
+seconds (1 / 10 s when unthrottled), so a seed always replays the same flights.
+"""
+import argparse
+import socket
+import time
+
+from drone_simulator import DroneSimulator
+from telemetry_protocol import DEFAULT_PORT, encode_telemetry
+
+MAX_PAYLOAD_PER_DATAGRAM = 1400  # stay below a typical Ethernet MTU
+
+
+def pack_datagrams(frames):
+    datagram = bytearray()
+    for frame in frames:
+        if len(datagram) + len(frame) > MAX_PAYLOAD_PER_DATAGRAM:
+            yield bytes(datagram)
+            datagram.clear()
+        datagram += frame
+    if datagram:
+        yield bytes(datagram)
+
+
+def run(host: str, port: int, drone_count: int, rate_hz: float, seconds: float = None, seed: int = 0,
+        time_scale: float = 1.0):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    simulator = DroneSimulator(drone_count, seed=seed, dt=1.0 / (rate_hz or 10.0), time_scale=time_scale)
+    seq = 0
+    frames_sent = 0
+    started = time.perf_counter()
+    next_tick = started
+
+    try:
+        while True:
+            batch = simulator()
+            frames = []
+            for sample in batch:
+                frames.append(encode_telemetry(sample, seq))
+                seq += 1
+            for datagram in pack_datagrams(frames):
+                sock.sendto(datagram, (host, port))
+            frames_sent += len(frames)
+
+            now = time.perf_counter()
+            if seconds is not None and now - started >= seconds:
+                break
+            if rate_hz:
+                next_tick += 1.0 / rate_hz
+                if next_tick > now:
+                    time.sleep(next_tick - now)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sock.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"[udp_simulator] sent {frames_sent:,} frames in {elapsed:.1f} s ({frames_sent / elapsed:,.0f} frames/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--drones", type=int, default=1)
+    parser.add_argument("--rate", type=float, default=10.0, help="telemetry rate per drone in Hz, 0 = unthrottled")
+    parser.add_argument("--seconds", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--time-scale", type=float, default=1.0, help="simulated seconds per step period")
+    args = parser.parse_args()
+    run(args.host, args.port, args.drones, args.rate, args.seconds, args.seed, args.time_scale)